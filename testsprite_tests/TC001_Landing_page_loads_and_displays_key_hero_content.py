@@ -42,7 +42,6 @@ async def run_test():
         await expect(frame.locator('text=Amiguitos').first).to_be_visible(timeout=3000)
         await expect(frame.locator('text=Jornada').first).to_be_visible(timeout=3000)
         await expect(frame.locator('xpath=//button[contains(@class,"primary") or contains(@class,"cta") or contains(@class,"principal") or contains(.,"Entrar") or contains(.,"Começar") or contains(.,"Cadastre-se")]').first).to_be_visible(timeout=3000)
-        await asyncio.sleep(5)
 
     finally:
         if context:
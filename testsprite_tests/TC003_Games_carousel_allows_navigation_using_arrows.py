@@ -40,13 +40,13 @@ async def run_test():
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/section[7]/div/div[2]/div[1]/div[3]/div[2]/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Jogo anterior' (Previous) arrow at index 447, wait for the carousel to update, then extract the featured game title and subtitle to verify it returned to the original item.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/section[7]/div/div[2]/div[1]/div[3]/div[2]/div[2]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -58,7 +58,6 @@ async def run_test():
         assert await frame.locator('xpath=/html/body/div/div[2]/section[7]/div/div[2]/div[1]/div[3]/div[2]/div[2]/div/button[2]').is_visible()
         await frame.locator('xpath=/html/body/div/div[2]/section[7]/div/div[2]/div[1]/div[3]/div[2]/div[2]/div/button[1]').wait_for(state='visible', timeout=5000)
         assert await frame.locator('xpath=/html/body/div/div[2]/section[7]/div/div[2]/div[1]/div[3]/div[2]/div[2]/div/button[1]').is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
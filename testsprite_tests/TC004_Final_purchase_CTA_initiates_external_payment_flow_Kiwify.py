@@ -40,13 +40,12 @@ async def run_test():
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/section[8]/div/div[2]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
         await expect(frame.locator('text=QUERO PROTEGER MEU FILHO COM CONTEÚDO SEGURO').first).to_be_visible(timeout=3000)
         assert 'kiwify' in frame.url
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -40,29 +40,29 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the profile/menu button (element index 247) to look for a link or navigation to the paywall/subscription page.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/header/div/div/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Close the notifications dialog (click Close, element index 458) to reveal the main page content and then look for navigation or links to the paywall/landing.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Navigate to the landing/sales page (/landing) to find the paywall or primary Subscribe CTA and verify it is visible.
         await page.goto("https://arca-da-alegria.vercel.app/landing", wait_until="commit", timeout=10000)
@@ -71,7 +71,7 @@ async def run_test():
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/header/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -84,7 +84,6 @@ async def run_test():
         # Verify the primary 'Quero acessar agora' Subscribe CTA is visible
         btn = frame.locator('xpath=/html/body/div[1]/div[2]/section[1]/div[2]/div[1]/button').nth(0)
         assert await btn.is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
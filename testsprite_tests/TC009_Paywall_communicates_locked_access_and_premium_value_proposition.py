@@ -40,17 +40,17 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -58,7 +58,6 @@ async def run_test():
         await expect(frame.locator('text=Unlock').first).to_be_visible(timeout=3000)
         await expect(frame.locator('text=premium').first).to_be_visible(timeout=3000)
         await expect(frame.locator('text=stories').first).to_be_visible(timeout=3000)
-        await asyncio.sleep(5)
 
     finally:
         if context:
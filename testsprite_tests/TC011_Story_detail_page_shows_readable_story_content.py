@@ -40,41 +40,41 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Histórias' button in the main navigation to open the stories list (use interactive element index 292).
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[4]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the first visible story card to open its detail page and then verify the detail page shows a title and story content.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the first visible story card (use the card's button index 493) to open the story detail page, then verify the URL contains '/story/' and that the story title and content are visible.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[1]/div[2]/main/div[2]/div[1]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the first story's title element (index 489) to open its detail page so the URL and visible title/content can be verified.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[1]/div[2]/main/div[2]/div[1]/div[2]/h3').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -83,7 +83,6 @@ async def run_test():
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div/button').nth(0)
         assert await elem.is_visible(), "Expected 'Ouvir História' button to be visible indicating story content"
         raise AssertionError("Missing element: No xpath for the story title available in the provided elements. Cannot verify story title visibility. Task marked as done.")
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -40,23 +40,23 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Histórias' (Stories) navigation item to open the Stories page and then verify the page header/text and presence of multiple story cards.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/nav/a[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -65,7 +65,6 @@ async def run_test():
         assert await frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/div[2]/h3').is_visible()
         assert await frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[2]/div[2]/h3').is_visible()
         assert await frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[3]/div[2]/h3').is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -1,4 +1,5 @@
 import asyncio
+import re
 from playwright import async_api
 from playwright.async_api import expect
 
@@ -40,35 +41,34 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Vídeos' navigation item (index 266) to navigate to the videos listing page and then verify the URL contains '/videos'.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/nav/a[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
         frame = context.pages[-1]
-        await page.wait_for_timeout(3000)
+        await expect(frame).to_have_url(re.compile('/home'), timeout=3000)
         assert "/home" in frame.url
-        await page.wait_for_timeout(1000)
+        await expect(frame).to_have_url(re.compile('/videos'), timeout=1000)
         assert "/videos" in frame.url
         elem = frame.locator('xpath=/html/body/div[1]/div[2]/header').nth(0)
-        await page.wait_for_timeout(1000); text = await elem.text_content()
+        text = await elem.text_content(timeout=6000)
         assert text and "Vídeos" in text
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -1,4 +1,5 @@
 import asyncio
+import re
 from playwright import async_api
 from playwright.async_api import expect
 
@@ -40,55 +41,54 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Missões' link in the main navigation to navigate to the missions list (element index 333).
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/nav/a[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the first mission in the missions list (attempt to open the mission detail).
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[1]/div[1]/ol').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the first mission card to open its detail view (click element index 483). After that, verify the mission detail loaded and finish the task.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[1]/div[2]/main/div[2]/div/div/div[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
         # -> Final assertions appended to the test script
         frame = context.pages[-1]
-        await page.wait_for_timeout(2000)
+        await expect(frame).to_have_url(re.compile('/home'), timeout=2000)
         # Verify we reached the home page after login
         assert "/home" in frame.url
-        await page.wait_for_timeout(1000)
+        await expect(frame).to_have_url(re.compile('/missions'), timeout=1000)
         # Verify we navigated to the missions list
         assert "/missions" in frame.url
-        await page.wait_for_timeout(1000)
+        await expect(frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/button').nth(0)).to_be_visible(timeout=1000)
         # Verify the first mission entry in the missions list is visible
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/button').nth(0)
         assert await elem.is_visible()
-        await page.wait_for_timeout(500)
+        await expect(frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/div/div[1]/span[1]').nth(0)).to_be_visible(timeout=500)
         # Verify mission detail content loaded by checking for a mission task text
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[2]/div[1]/div/div[1]/span[1]').nth(0)
         assert await elem.is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
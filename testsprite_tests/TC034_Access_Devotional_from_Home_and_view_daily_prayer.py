@@ -1,4 +1,5 @@
 import asyncio
+import re
 from playwright import async_api
 from playwright.async_api import expect
 
@@ -40,33 +41,32 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the Devotional card/button on the home page to open the Devotional page (use the 'Continuar Aventura' button inside the DEVOCIONAL card).
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[5]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
         # -> Assertions: verify redirected to /home and devotional content is visible
         frame = context.pages[-1]
-        await page.wait_for_timeout(2000)
+        await expect(frame).to_have_url(re.compile('/home'), timeout=2000)
         assert "/home" in frame.url
         assert await frame.locator('xpath=/html/body/div[1]/div[2]/header').is_visible()
         assert await frame.locator('xpath=/html/body/div[1]/div[2]/main/section[1]/div[2]/div[2]/div/button[1]').is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -1,4 +1,5 @@
 import asyncio
+import re
 from playwright import async_api
 from playwright.async_api import expect
 
@@ -40,33 +41,32 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the Devocional card's action button ('Continuar Aventura') to open the Devotional page and then check for the verse-of-the-day content.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div[5]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
-        await page.wait_for_timeout(2000)
+        await expect(frame).to_have_url(re.compile('/home'), timeout=2000)
         assert "/home" in frame.url, f"Unexpected URL, expected '/home' in {frame.url}"
         elem = frame.locator('xpath=/html/body/div/div[2]/header').nth(0)
         assert await elem.is_visible(), 'Expected Devotional header (Pequenas Orações) to be visible'
         # The required 'Verse' / verse-of-the-day section is not present in the provided available elements.
         raise AssertionError('Missing feature: verse-of-the-day section (text "Verse" or equivalent) not found on the Devotional page. Reporting issue and marking task as done.')
-        await asyncio.sleep(5)
 
     finally:
         if context:
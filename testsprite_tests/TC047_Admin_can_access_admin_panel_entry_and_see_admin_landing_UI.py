@@ -40,17 +40,17 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Navigate to /admin (https://arca-da-alegria.vercel.app/admin) to check if the admin area exists and then verify the URL contains '/admin' and the page shows the text 'Admin'.
         await page.goto("https://arca-da-alegria.vercel.app/admin", wait_until="commit", timeout=10000)
@@ -69,7 +69,6 @@ async def run_test():
         assert await elem.is_visible()
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div/div[2]/div[1]/div/input')  # search input
         assert await elem.is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -40,17 +40,17 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Navigate to /admin (use the required navigate action) to open the admin area so the Admin sidebar can be verified.
         await page.goto("https://arca-da-alegria.vercel.app/admin", wait_until="commit", timeout=10000)
@@ -60,11 +60,10 @@ async def run_test():
         frame = context.pages[-1]
         assert ("/home" in frame.url) or ("/paywall" in frame.url)
         elem = frame.locator('xpath=/html/body/div/div[2]/aside/nav/button[1]').nth(0)
-        await page.wait_for_timeout(1000)
+        await expect(elem).to_be_visible(timeout=1000)
         assert await elem.is_visible(), 'Admin sidebar (Histórias button) is not visible'
         text = (await elem.inner_text()).strip()
         assert 'Histórias' in text, f'Expected "Histórias" to be visible in the sidebar button, got: {text}'
-        await asyncio.sleep(5)
 
     finally:
         if context:
@@ -40,17 +40,17 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Navigate to /admin (explicit test step requires navigate to path '/admin' on the production host).
         await page.goto("https://arca-da-alegria.vercel.app/admin", wait_until="commit", timeout=10000)
@@ -59,40 +59,40 @@ async def run_test():
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div/div[1]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Fill the new story form (title, cover URL, audio URL, duration), click 'Salvar' (index 932) to create the story, then verify the story appears in the admin listing.
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div[4]/div[2]/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('História de Teste Automatizada')
+        await elem.fill('História de Teste Automatizada', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div[4]/div[2]/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('https://example.com/test-cover.jpg')
+        await elem.fill('https://example.com/test-cover.jpg', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div[4]/div[2]/div[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('https://example.com/test-audio.mp3')
+        await elem.fill('https://example.com/test-audio.mp3', timeout=8000)
         
         # -> Fill the Duração field (index 911) with '5 min' and click 'Salvar' (index 932) to create the story, then verify the story appears in the admin listing.
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div[3]/div[2]/div[4]/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('5 min')
+        await elem.fill('5 min', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[3]/div[3]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Close the 'Nova História' modal (if open) and verify that the story titled 'História de Teste Automatizada' appears in the admin stories listing. If found, finish the test.
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -104,7 +104,6 @@ async def run_test():
         assert await elem.is_visible()
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div/div[2]/div[2]/table/tbody/tr[1]/td[6]/span').nth(0)
         assert await elem.is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
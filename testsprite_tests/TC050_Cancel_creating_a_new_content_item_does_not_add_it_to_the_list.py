@@ -40,17 +40,17 @@ async def run_test():
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[1]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('teste@testsprite.com')
+        await elem.fill('teste@testsprite.com', timeout=8000)
         
         frame = context.pages[-1]
         # Input text
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Teste123!')
+        await elem.fill('Teste123!', timeout=8000)
         
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/div[2]/div[2]/form/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Navigate to /admin using the exact path https://arca-da-alegria.vercel.app/admin (test step explicitly requires navigate to /admin).
         await page.goto("https://arca-da-alegria.vercel.app/admin", wait_until="commit", timeout=10000)
@@ -59,13 +59,13 @@ async def run_test():
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div/div[2]/main/div/div[1]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # -> Click the 'Cancelar' button in the 'Nova História' dialog to close the create form (index 966). Then verify that the admin list still shows 77 histórias (no new item created).
         frame = context.pages[-1]
         # Click element
         elem = frame.locator('xpath=/html/body/div[4]/div[3]/button[1]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await elem.click(timeout=8000)
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -73,7 +73,6 @@ async def run_test():
         assert ("/home" in frame.url) or ("/paywall" in frame.url)
         el = frame.locator('xpath=/html/body/div/div[2]/main/div/div[1]/button').nth(0)
         assert not await el.is_visible()
-        await asyncio.sleep(5)
 
     finally:
         if context:
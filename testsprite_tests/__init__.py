@@ -0,0 +1,5 @@
+"""TestSprite-generated end-to-end tests for Arca da Alegria.
+
+Each ``TC*.py`` script is standalone and can still be run with ``python``.
+The :mod:`testsprite_tests.runner` package runs them as a suite.
+"""
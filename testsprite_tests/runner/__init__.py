@@ -0,0 +1,55 @@
+"""Suite runner for the generated TestSprite scripts.
+
+Run from the repository root::
+
+    python -m testsprite_tests.runner                 # every TC*.py
+    python -m testsprite_tests.runner TC015 TC022     # a selection
+
+Scripts are loaded without their ``asyncio.run`` entry point and executed
+against a shared pool of warm browsers, each test in its own context.
+Tests that log in as the shared account reuse one cached session, and the
+scripts' absolute XPaths fall back to recorded element fingerprints.
+
+Tests run against ``--base-url``, or with ``--serve`` against a local build
+of the app. ``--from-plan`` skips the scripts and interprets the steps of
+``testsprite_frontend_test_plan.json`` instead. ``--watch`` starts Vite's
+dev server and, on every save, reruns only the tests the change affects on
+browsers that stay logged in.
+``--har record`` captures every test's network traffic and ``--har replay``
+serves it back, so a run needs no network at all.
+``--chaos SCHEDULE`` puts a fault-injecting proxy in front of every test
+(``python -m testsprite_tests.runner.chaos`` runs one on its own).
+
+Content rows the tests create are tagged with the run's id and purged once
+the run ends (``--keep-test-data`` keeps them).
+
+While a run goes, its events stream to ``tmp/runner_events.jsonl`` and the
+Markdown and HTML reports next to the JSON one are kept up to date
+(``python -m testsprite_tests.runner.live`` re-renders a stream). Every run
+is recorded in ``tmp/history.sqlite3``;
+``python -m testsprite_tests.runner.history`` lists runs, flaky tests and
+duration trends. ``python -m testsprite_tests.runner.waits`` rewrites the
+scripts' fixed sleeps as event-driven waits.
+"""
+
+from .auth import AuthCache
+from .interpreter import PlanRunner, run_plan
+from .loader import TestCase, discover, load_run_test
+from .pool import BrowserPool, PooledDriver
+from .results import RunReport, TestResult
+from .suite import SuiteRunner, run_suite
+
+__all__ = [
+    "AuthCache",
+    "BrowserPool",
+    "PlanRunner",
+    "PooledDriver",
+    "RunReport",
+    "SuiteRunner",
+    "TestCase",
+    "TestResult",
+    "discover",
+    "load_run_test",
+    "run_plan",
+    "run_suite",
+]
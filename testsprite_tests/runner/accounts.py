@@ -0,0 +1,249 @@
+"""Isolated accounts for the tests that change their user's data.
+
+TC029/TC030 complete mission steps, TC044 saves a favourite and the admin
+tests edit content, all as the one shared account, so running them at the
+same time makes them see each other's writes. An :class:`AccountPool` lends
+each concurrently running stateful test its own account:
+``teste+w<slot>@testsprite.com``, where the slot is unique across shards.
+
+Accounts are provisioned through the Supabase admin API (GoTrue plus
+PostgREST with the service-role key), so the same code works against the
+hosted project or against ``supabase start``'s local stack. They are kept
+between runs in ``tmp/auth/accounts/`` and recycled rather than re-created.
+Each lease wipes the user's progress, enrollments, favourites and children
+and then seeds what the test needs: an active subscription, optionally the
+``admin`` permission, and optionally a child with a daily routine.
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import json
+import logging
+import secrets
+import urllib.error
+import urllib.request
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from .auth import SCRIPTED_EMAIL, STATE_DIR
+from .config import SUPABASE_SERVICE_ROLE_KEY, SUPABASE_URL
+from .loader import Transform
+
+log = logging.getLogger(__name__)
+
+REGISTRY_DIR = STATE_DIR / "accounts"
+
+SCRIPTED_PASSWORD = "Teste123!"
+
+# Per-user rows removed on every lease; children cascade to their routines
+# and daily tasks.
+USER_TABLES = (
+    "user_progress",
+    "user_mission_progress",
+    "user_mission_enrollments",
+    "story_progress",
+    "favorites",
+    "children",
+)
+
+
+@dataclass(frozen=True)
+class Needs:
+    admin: bool = False
+    child: bool = False
+    routine: bool = False
+
+
+ISOLATED_TESTS = {
+    "TC029": Needs(child=True, routine=True),
+    "TC030": Needs(child=True, routine=True),
+    "TC044": Needs(),
+    "TC049": Needs(admin=True),
+    "TC051": Needs(admin=True),
+    "TC052": Needs(admin=True),
+    "TC053": Needs(admin=True),
+}
+
+
+@dataclass
+class Account:
+    slot: int
+    email: str
+    password: str
+    user_id: str = ""
+
+
+class SupabaseAdmin:
+    """The few admin calls provisioning needs, over plain HTTP.
+
+    With a user's ``token`` (and the anon key as ``service_key``) the
+    PostgREST calls run as that user, under row-level security.
+    """
+
+    def __init__(
+        self, url: str = SUPABASE_URL, service_key: str = SUPABASE_SERVICE_ROLE_KEY, *, token: str | None = None
+    ):
+        if not url or not service_key:
+            raise RuntimeError("Isolated accounts need SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        self.url = url.rstrip("/")
+        self.service_key = service_key
+        self.token = token or service_key
+
+    def _request(self, method: str, path: str, body: Any = None, **headers: str) -> Any:
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=json.dumps(body).encode() if body is not None else None,
+            method=method,
+            headers={
+                "apikey": self.service_key,
+                "Authorization": f"Bearer {self.token}",
+                "Content-Type": "application/json",
+                **headers,
+            },
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            payload = response.read()
+        return json.loads(payload) if payload else None
+
+    def _find_user(self, email: str) -> str | None:
+        page = 1
+        while True:
+            users = self._request("GET", f"/auth/v1/admin/users?page={page}&per_page=1000")["users"]
+            for user in users:
+                if user.get("email") == email:
+                    return user["id"]
+            if len(users) < 1000:
+                return None
+            page += 1
+
+    def delete(self, table: str, query: str) -> int:
+        """Delete the rows of ``table`` matching the PostgREST ``query``; returns how many."""
+        rows = self._request("DELETE", f"/rest/v1/{table}?{query}&select=id", Prefer="return=representation")
+        return len(rows or [])
+
+    def ensure_user(self, account: Account) -> str:
+        """Create ``account`` (or take over an existing user) and return its id."""
+        attributes = {"password": account.password, "email_confirm": True}
+        user_id = account.user_id or self._find_user(account.email)
+        if user_id:
+            try:
+                self._request("PUT", f"/auth/v1/admin/users/{user_id}", attributes)
+                return user_id
+            except urllib.error.HTTPError as error:
+                if error.code != 404:
+                    raise
+        user = self._request(
+            "POST", "/auth/v1/admin/users",
+            {"email": account.email, **attributes, "user_metadata": {"full_name": f"Runner {account.slot}"}},
+        )
+        return user["id"]
+
+    def prepare(self, account: Account, needs: Needs) -> None:
+        for table in USER_TABLES:
+            try:
+                self._request("DELETE", f"/rest/v1/{table}?user_id=eq.{account.user_id}")
+            except urllib.error.HTTPError as error:
+                log.warning("Could not clear %s for %s: HTTP %d", table, account.email, error.code)
+        self._request(
+            "PATCH", f"/rest/v1/profiles?id=eq.{account.user_id}",
+            {"subscription_status": "active", "permissions": ["admin"] if needs.admin else []},
+        )
+        if not needs.child:
+            return
+        child = self._request(
+            "POST", "/rest/v1/children", {"user_id": account.user_id, "name": "Criança Teste"},
+            Prefer="return=representation",
+        )[0]
+        if needs.routine:
+            self._request("POST", "/rest/v1/routine_templates", {
+                "user_id": account.user_id,
+                "child_id": child["id"],
+                "title": "Oração da manhã",
+                "schedule_type": "daily",
+                "schedule_days": [0, 1, 2, 3, 4, 5, 6],
+            })
+
+
+class AccountPool:
+    """Lends accounts ``offset .. offset + size - 1`` to stateful tests."""
+
+    def __init__(self, provisioner: SupabaseAdmin, size: int, *, offset: int = 0, directory: Path = REGISTRY_DIR):
+        self.provisioner = provisioner
+        self.directory = directory
+        self.created = 0
+        self.recycled = 0
+        self._ensured: set[int] = set()
+        self._slots: asyncio.Queue[int] = asyncio.Queue()
+        for slot in range(offset, offset + size):
+            self._slots.put_nowait(slot)
+
+    @staticmethod
+    def needs(test_id: str) -> Needs | None:
+        return ISOLATED_TESTS.get(test_id)
+
+    def _path(self, slot: int) -> Path:
+        return self.directory / f"w{slot}.json"
+
+    def _load(self, slot: int) -> Account:
+        path = self._path(slot)
+        if path.exists():
+            return Account(**json.loads(path.read_text(encoding="utf-8")))
+        local, domain = SCRIPTED_EMAIL.split("@")
+        return Account(slot, f"{local}+w{slot}@{domain}", secrets.token_urlsafe(16))
+
+    def _provision(self, slot: int, needs: Needs) -> Account:
+        account = self._load(slot)
+        if slot not in self._ensured:
+            # Once per run: the user may have been deleted since the last one.
+            if account.user_id:
+                self.recycled += 1
+            else:
+                self.created += 1
+            account.user_id = self.provisioner.ensure_user(account)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._path(slot).write_text(json.dumps(asdict(account)), encoding="utf-8")
+            self._ensured.add(slot)
+        self.provisioner.prepare(account, needs)
+        return account
+
+    @asynccontextmanager
+    async def lease(self, needs: Needs) -> AsyncIterator[Account]:
+        slot = await self._slots.get()
+        try:
+            yield await asyncio.to_thread(self._provision, slot, needs)
+        finally:
+            self._slots.put_nowait(slot)
+
+    def stats(self) -> dict[str, int]:
+        return {"created": self.created, "recycled": self.recycled}
+
+
+class _Credentials(ast.NodeTransformer):
+    def __init__(self, account: Account):
+        self.replacements = {SCRIPTED_EMAIL: account.email, SCRIPTED_PASSWORD: account.password}
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, str) and node.value in self.replacements:
+            return ast.copy_location(ast.Constant(self.replacements[node.value]), node)
+        return node
+
+
+@lru_cache(maxsize=None)
+def _use_account(email: str, password: str, slot: int) -> Transform:
+    account = Account(slot, email, password)
+
+    def transform(tree: ast.Module) -> ast.Module:
+        return _Credentials(account).visit(tree)
+
+    transform.__name__ = f"use_account({email})"
+    return transform
+
+
+def use_account(account: Account) -> Transform:
+    """Type ``account``'s credentials wherever the script types the shared ones."""
+    return _use_account(account.email, account.password, account.slot)
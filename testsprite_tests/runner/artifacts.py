@@ -0,0 +1,172 @@
+"""Screenshots and traces of failing tests, and nothing for passing ones.
+
+TestSprite records a video of every test; almost all of them pass and are
+never watched. An :class:`ArtifactRecorder` instead keeps, per test and in
+memory only, a ring buffer of the last :data:`RING_SIZE` screenshots (one
+JPEG per :data:`SAMPLE_INTERVAL_S` of the current page) and of the last
+console errors, page errors, failed requests and navigations, while a
+Playwright trace (DOM snapshots, no screencast) records alongside.
+
+The script's ``context.close()`` is deferred until the runner knows the
+outcome. For a passing test the trace is discarded and the buffers dropped.
+For a failing one :meth:`ArtifactRecorder.finish` writes under
+``tmp/artifacts/<run>/<TC>/`` the trace, a ``timeline.json`` of the buffered
+events and frames, and one last screenshot; screenshots are stored once,
+content-addressed, in ``tmp/artifacts/screens/`` and shared by every test and
+run. Each failure reports the bytes it wrote and the frames deduplication
+saved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Sequence
+
+from playwright.async_api import BrowserContext, ConsoleMessage, Frame, Request
+
+from .loader import TMP_DIR
+from .results import TestResult
+
+ARTIFACTS_DIR = TMP_DIR / "artifacts"
+SCREENS_DIR = ARTIFACTS_DIR / "screens"
+
+RING_SIZE = 10
+EVENT_RING_SIZE = 200
+SAMPLE_INTERVAL_S = 1.0
+SCREENSHOT_TIMEOUT_MS = 2000
+JPEG_QUALITY = 50
+
+
+class ArtifactRecorder:
+    """Buffers one test's recent frames and events; persists them on failure."""
+
+    def __init__(self, test_id: str, run_dir: Path, *, screens_dir: Path = SCREENS_DIR):
+        self.test_id = test_id
+        self.run_dir = run_dir
+        self.screens_dir = screens_dir
+        self.frames: deque[tuple[float, str, bytes]] = deque(maxlen=RING_SIZE)
+        self.events: deque[dict[str, Any]] = deque(maxlen=EVENT_RING_SIZE)
+        self.captured = 0
+        self._started = time.perf_counter()
+        self._contexts: list[BrowserContext] = []
+        self._samplers: list[asyncio.Task] = []
+        self._listeners: list[tuple[BrowserContext, str, Any]] = []
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self._started, 3)
+
+    def _event(self, kind: str, **details: Any) -> None:
+        self.events.append({"t": self._elapsed(), "kind": kind, **details})
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.tracing.start(snapshots=True, screenshots=False)
+        self._contexts.append(context)
+
+        def on_console(message: ConsoleMessage) -> None:
+            if message.type in ("error", "warning"):
+                self._event(f"console.{message.type}", text=message.text[:500])
+
+        def on_request_failed(request: Request) -> None:
+            self._event("requestfailed", url=request.url, error=request.failure or "")
+
+        def on_navigated(frame: Frame) -> None:
+            if frame.parent_frame is None:
+                self._event("navigated", url=frame.url)
+
+        def on_page(page: Any) -> None:
+            page.on("pageerror", lambda error: self._event("pageerror", text=str(error)[:500]))
+            page.on("framenavigated", on_navigated)
+
+        for event, listener in (("console", on_console), ("requestfailed", on_request_failed), ("page", on_page)):
+            context.on(event, listener)
+            self._listeners.append((context, event, listener))
+        self._samplers.append(asyncio.ensure_future(self._sample(context)))
+
+    async def _sample(self, context: BrowserContext) -> None:
+        while True:
+            await asyncio.sleep(SAMPLE_INTERVAL_S)
+            await self._shoot(context)
+
+    async def _shoot(self, context: BrowserContext) -> None:
+        pages = [page for page in context.pages if not page.is_closed()]
+        if not pages:
+            return
+        try:
+            image = await pages[-1].screenshot(type="jpeg", quality=JPEG_QUALITY, timeout=SCREENSHOT_TIMEOUT_MS)
+        except Exception:
+            # Mid-navigation or closing; the next tick will do.
+            return
+        self.frames.append((self._elapsed(), pages[-1].url, image))
+        self.captured += 1
+
+    def _store(self, image: bytes) -> tuple[str, int]:
+        """Content-address ``image``; returns its name and the bytes written (0 if known)."""
+        name = f"{hashlib.sha256(image).hexdigest()[:20]}.jpg"
+        path = self.screens_dir / name
+        if path.exists():
+            return name, 0
+        path.write_bytes(image)
+        return name, len(image)
+
+    async def finish(self, failed: bool) -> dict[str, Any] | None:
+        """Stop recording; on failure, write everything and return the size report."""
+        for task in self._samplers:
+            task.cancel()
+        for context, event, listener in self._listeners:
+            context.remove_listener(event, listener)
+        if not failed:
+            for context in self._contexts:
+                try:
+                    await context.tracing.stop()
+                except Exception:
+                    pass
+            return None
+
+        directory = self.run_dir / self.test_id
+        directory.mkdir(parents=True, exist_ok=True)
+        self.screens_dir.mkdir(parents=True, exist_ok=True)
+        for context in self._contexts:
+            await self._shoot(context)
+        written = 0
+        for index, context in enumerate(self._contexts):
+            trace = directory / f"trace-{index}.zip"
+            try:
+                await context.tracing.stop(path=trace)
+                written += trace.stat().st_size
+            except Exception as error:
+                self._event("trace-lost", error=str(error)[:200])
+
+        timeline, deduplicated = [], 0
+        for elapsed, url, image in self.frames:
+            name, size = self._store(image)
+            written += size
+            deduplicated += int(size == 0)
+            timeline.append({"t": elapsed, "url": url, "screenshot": f"../../screens/{name}"})
+        (directory / "timeline.json").write_text(
+            json.dumps({"frames": timeline, "events": list(self.events)}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        written += (directory / "timeline.json").stat().st_size
+        return {
+            "dir": str(directory),
+            "bytes": written,
+            "frames": len(timeline),
+            "deduplicated": deduplicated,
+            "captured": self.captured,
+        }
+
+
+def artifact_totals(results: Sequence[TestResult]) -> dict[str, Any]:
+    """The run's size report: what its failures wrote to disk."""
+    reports = [result.extra["artifacts"] for result in results if "artifacts" in result.extra]
+    return {
+        "failures_recorded": len(reports),
+        "bytes_written": sum(report["bytes"] for report in reports),
+        "frames_written": sum(report["frames"] - report["deduplicated"] for report in reports),
+        "frames_deduplicated": sum(report["deduplicated"] for report in reports),
+    }
@@ -0,0 +1,222 @@
+"""Log in once per run and hand the session to every authenticated test.
+
+Most scripts open ``/`` and type the shared test account into the login form,
+sleeping 3 s before each of the three steps. :class:`AuthCache` performs that
+login once, saves the context's ``storage_state`` (Supabase keeps its session
+in the ``sb-<project>-auth-token`` localStorage entry) and injects it into
+every context that needs it. :func:`strip_shared_login` removes the scripted
+login steps so those tests land straight on ``/home``.
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from playwright.async_api import Page
+
+from .config import BASE_URL, LOGIN_EMAIL, LOGIN_PASSWORD
+from .loader import TMP_DIR, TestCase, parse, run_test_body
+from .pool import BrowserPool
+
+log = logging.getLogger(__name__)
+
+STATE_DIR = TMP_DIR / "auth"
+
+LOGIN_FORM_XPATH = "xpath=/html/body/div/div[2]/div[2]/div[2]/form/"
+SCRIPTED_EMAIL = "teste@testsprite.com"
+
+# supabase-js refreshes a session on page load once it is within ~90 s of
+# expiring, and refresh tokens are single-use: two contexts refreshing the
+# same cached session would log each other out. Re-login well before that.
+REFRESH_MARGIN_S = 600
+
+_WAIT_FOR_HOME = 'await page.wait_for_url(lambda url: "/home" in url or "/paywall" in url, timeout=15000)'
+
+
+async def login(page: Page, email: str = LOGIN_EMAIL, password: str = LOGIN_PASSWORD) -> None:
+    """Submit the password form on ``/`` and wait for the post-login redirect."""
+    form = page.locator("form")
+    await form.locator("input[type=email]").fill(email)
+    await form.locator("input[type=password]").fill(password)
+    await form.locator("button[type=submit]").click()
+    await page.wait_for_url(lambda url: "/home" in url or "/paywall" in url, timeout=30000)
+
+
+def state_path(base_url: str, email: str = LOGIN_EMAIL) -> Path:
+    """The storage-state file for ``email`` on ``base_url``; sessions are per origin."""
+    name = urlparse(base_url).netloc.replace(":", "_")
+    return STATE_DIR / (f"{name}.json" if email == LOGIN_EMAIL else f"{name}-{email}.json")
+
+
+def _session(state: dict) -> dict:
+    """The Supabase session stored in ``state``, or ``{}``."""
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if item["name"].startswith("sb-") and item["name"].endswith("-auth-token"):
+                try:
+                    session = json.loads(item["value"])
+                except ValueError:
+                    return {}
+                return session if isinstance(session, dict) else {}
+    return {}
+
+
+def session_expiry(state: dict) -> float | None:
+    """``expires_at`` (epoch seconds) of the Supabase session in ``state``."""
+    try:
+        return float(_session(state)["expires_at"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def access_token(state: dict) -> str | None:
+    """The session's JWT, for calling the API as the logged-in user."""
+    return _session(state).get("access_token")
+
+
+class AuthCache:
+    """A storage-state file for the shared account, re-created on expiry."""
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        *,
+        base_url: str = BASE_URL,
+        path: Path | None = None,
+        email: str = LOGIN_EMAIL,
+        password: str = LOGIN_PASSWORD,
+    ):
+        self.pool = pool
+        self.base_url = base_url.rstrip("/")
+        self.path = path or state_path(self.base_url, email)
+        self.email = email
+        self.password = password
+        self.logins = 0
+        self._expires_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._expires_at is not None and self._expires_at - time.time() > REFRESH_MARGIN_S
+
+    async def storage_state(self) -> str:
+        """Path to a valid storage state, logging in first if needed."""
+        async with self._lock:
+            if not self._fresh() and self.path.exists():
+                # Another process (a shard of the same run) may have renewed it.
+                self._expires_at = session_expiry(json.loads(self.path.read_text(encoding="utf-8")))
+            if not self._fresh():
+                await self._login()
+            return str(self.path)
+
+    async def _login(self) -> None:
+        started = time.perf_counter()
+        async with self.pool.lease() as browser:
+            context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                await page.goto(f"{self.base_url}/", wait_until="domcontentloaded")
+                await login(page, self.email, self.password)
+                state = await context.storage_state()
+            finally:
+                await context.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        partial.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(partial, self.path)
+        self._expires_at = session_expiry(state)
+        if self._expires_at is None:
+            raise RuntimeError("Login succeeded but no Supabase session was stored")
+        self.logins += 1
+        log.info("Logged in as %s in %.1fs", self.email, time.perf_counter() - started)
+
+
+def _login_step(statement: ast.stmt) -> str | None:
+    """The login-form XPath ``statement`` targets, if it is ``elem = ...``."""
+    if isinstance(statement, ast.Assign) and any(
+        isinstance(target, ast.Name) and target.id == "elem" for target in statement.targets
+    ):
+        for node in ast.walk(statement.value):
+            if isinstance(node, ast.Constant) and str(node.value).startswith(LOGIN_FORM_XPATH):
+                return node.value
+    return None
+
+
+def _step_call(statement: ast.stmt) -> ast.Call | None:
+    """The call in ``await page.wait_for_timeout(...)``/``await elem.<action>(...)``."""
+    if not isinstance(statement, ast.Expr) or not isinstance(statement.value, ast.Await):
+        return None
+    call = statement.value.value
+    if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Attribute):
+        return None
+    owner = call.func.value
+    if isinstance(owner, ast.Name) and (
+        owner.id == "elem" or (owner.id == "page" and call.func.attr == "wait_for_timeout")
+    ):
+        return call
+    return None
+
+
+def _is_frame_refresh(statement: ast.stmt) -> bool:
+    return (
+        isinstance(statement, ast.Assign)
+        and isinstance(statement.targets[0], ast.Name)
+        and statement.targets[0].id == "frame"
+    )
+
+
+def login_span(body: list[ast.stmt]) -> tuple[int, int] | None:
+    """``[start, end)`` of the scripted shared-account login in ``body``.
+
+    The login is the first run of consecutive form steps, each optionally
+    preceded by ``frame = context.pages[-1]``.
+    """
+    start = next((index for index, statement in enumerate(body) if _login_step(statement)), None)
+    if start is None:
+        return None
+    end = start
+    email = None
+    while True:
+        index = end + 1 if end < len(body) and _is_frame_refresh(body[end]) else end
+        if index >= len(body) or _login_step(body[index]) is None:
+            break
+        end = index + 1
+        while end < len(body) and (call := _step_call(body[end])) is not None:
+            if call.func.attr == "fill" and call.args and email is None:
+                email = getattr(call.args[0], "value", None)
+            end += 1
+    if email != SCRIPTED_EMAIL:
+        return None
+    if start and _is_frame_refresh(body[start - 1]):
+        start -= 1
+    return start, end
+
+
+def uses_shared_login(case: TestCase) -> bool:
+    """Whether ``case`` logs in through the form as the shared account."""
+    return login_span(run_test_body(parse(case))) is not None
+
+
+def login_wait(body: list[ast.stmt]) -> int | None:
+    """Index in ``body`` of the wait :func:`strip_shared_login` put in place of the login."""
+    wait = ast.dump(ast.parse(_WAIT_FOR_HOME).body[0])
+    return next((index for index, statement in enumerate(body) if ast.dump(statement) == wait), None)
+
+
+def strip_shared_login(tree: ast.Module) -> ast.Module:
+    """Replace the scripted login with a wait for the post-login redirect."""
+    body = run_test_body(tree)
+    span = login_span(body)
+    if span is not None:
+        start, end = span
+        wait = ast.parse(_WAIT_FOR_HOME).body[0]
+        # On the line the login started, so tracebacks and step traces point there.
+        ast.increment_lineno(wait, body[start].lineno - 1)
+        body[start:end] = [wait]
+    return tree
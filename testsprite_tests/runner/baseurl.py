@@ -0,0 +1,60 @@
+"""Point the scripts at one configurable host.
+
+Every script opens TestSprite's tunnel (``LOCAL_ENDPOINT``) and then
+navigates again to the hard-coded production URL, so each test pays for two
+navigations and always hits the production CDN. :func:`rebase` drops the
+tunnel navigation and rewrites every production URL in the script to the
+chosen base URL.
+"""
+
+from __future__ import annotations
+
+import ast
+from functools import lru_cache
+
+from .config import LOCAL_ENDPOINT, PRODUCTION_URL
+from .loader import Transform
+
+
+def _is_tunnel_goto(statement: ast.stmt) -> bool:
+    """``await page.goto(LOCAL_ENDPOINT, ...)``."""
+    if not isinstance(statement, ast.Expr) or not isinstance(statement.value, ast.Await):
+        return False
+    call = statement.value.value
+    return (
+        isinstance(call, ast.Call)
+        and isinstance(call.func, ast.Attribute)
+        and call.func.attr == "goto"
+        and bool(call.args)
+        and isinstance(call.args[0], ast.Constant)
+        and str(call.args[0].value).rstrip("/") == LOCAL_ENDPOINT
+    )
+
+
+class _Rebase(ast.NodeTransformer):
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, str) and node.value.startswith(PRODUCTION_URL):
+            return ast.copy_location(ast.Constant(self.base_url + node.value[len(PRODUCTION_URL):]), node)
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        for field in ("body", "orelse", "finalbody"):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list):
+                setattr(node, field, [statement for statement in statements if not _is_tunnel_goto(statement)])
+        return super().generic_visit(node)
+
+
+@lru_cache(maxsize=None)
+def rebase(base_url: str) -> Transform:
+    """The transform for ``base_url``; one object per URL keeps compiled code cached."""
+    base_url = base_url.rstrip("/")
+
+    def transform(tree: ast.Module) -> ast.Module:
+        return _Rebase(base_url).visit(tree)
+
+    transform.__name__ = f"rebase({base_url})"
+    return transform
@@ -0,0 +1,171 @@
+"""Resource-blocking profiles, chosen per test from its plan category.
+
+Most flows (missions, devotional, admin ...) never assert on images, fonts
+or third-party widgets, yet every test downloads story PNGs, YouTube
+thumbnails, Google Fonts, game iframes and the GTM/Facebook/stape tags. A
+:class:`Blocker` routes the context's requests through its profile:
+
+``full``
+    loads everything; for visual tests such as TC003's carousel.
+``no-trackers``
+    drops analytics and ad origins only; for pages whose media, iframes or
+    external links are under test (landing, videos, games).
+``lean``
+    also drops images (answered with a 1x1 GIF so layouts and ``onerror``
+    handlers behave), media, fonts and every third-party origin other than
+    Supabase.
+
+Main-frame navigations are never blocked, so external checkout links still
+open. Blocked requests never reach the network, so bytes saved are estimated
+from the ``Content-Length`` each URL had when a run did load it; those sizes
+are kept in ``tmp/resource_sizes.json``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Request, Response, Route
+
+from .loader import TMP_DIR
+from .plan import load_plan
+from .results import TestResult
+
+SIZES_PATH = TMP_DIR / "resource_sizes.json"
+
+TRACKER_SUFFIXES = (
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "stape.meuamiguito.com.br",
+    "visitorapi.com",
+)
+# The API the app cannot work without.
+FIRST_PARTY_SUFFIXES = ("supabase.co", "localhost", "127.0.0.1")
+
+_PIXEL = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    resource_types: frozenset[str] = frozenset()
+    trackers: bool = False
+    third_party: bool = False
+
+
+PROFILES = {
+    profile.name: profile
+    for profile in (
+        Profile("full"),
+        Profile("no-trackers", trackers=True),
+        Profile("lean", frozenset({"image", "media", "font"}), trackers=True, third_party=True),
+    )
+}
+DEFAULT_PROFILE = "lean"
+
+# Plan category (before the parenthetical) -> profile; the rest get lean.
+CATEGORY_PROFILES = {
+    "Landing Page": "no-trackers",
+    "Curated Videos": "no-trackers",
+    "Educational Games": "no-trackers",
+}
+TEST_PROFILES = {"TC003": "full"}
+
+
+def profile_for(test_id: str) -> Profile:
+    if test_id in TEST_PROFILES:
+        return PROFILES[TEST_PROFILES[test_id]]
+    plan_case = load_plan().get(test_id)
+    category = plan_case.category.split("(", 1)[0].strip() if plan_case else ""
+    return PROFILES[CATEGORY_PROFILES.get(category, DEFAULT_PROFILE)]
+
+
+def bytes_saved(results: Sequence[TestResult]) -> int:
+    return sum(result.extra.get("resources", {}).get("bytes_saved", 0) for result in results)
+
+
+def _matches(host: str, suffixes: tuple[str, ...]) -> bool:
+    return any(host == suffix or host.endswith("." + suffix) for suffix in suffixes)
+
+
+class ResourceSizes:
+    """URL -> last seen ``Content-Length``, shared by every test in a run."""
+
+    def __init__(self, path: Path = SIZES_PATH):
+        self.path = path
+        self.sizes: dict[str, int] = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        self._dirty = False
+        self._watched: set[BrowserContext] = set()
+
+    def watch(self, context: BrowserContext) -> None:
+        """Record ``context``'s responses; warm contexts come back, so once only."""
+        if context not in self._watched:
+            self._watched.add(context)
+            context.on("response", self.record)
+
+    def record(self, response: Response) -> None:
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and self.sizes.get(response.url) != int(length):
+            self.sizes[response.url] = int(length)
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        merged = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        merged.update(self.sizes)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        partial.write_text(json.dumps(merged, sort_keys=True), encoding="utf-8")
+        os.replace(partial, self.path)
+
+
+class Blocker:
+    """Applies ``profile`` to one test's contexts and counts what it dropped."""
+
+    def __init__(self, profile: Profile, base_url: str, sizes: ResourceSizes):
+        self.profile = profile
+        self.first_party = (urlparse(base_url).hostname or "", *FIRST_PARTY_SUFFIXES)
+        self.sizes = sizes
+        self.blocked = 0
+        self.bytes_saved = 0
+
+    def _blocks(self, request: Request) -> bool:
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            return False
+        host = urlparse(request.url).hostname or ""
+        if self.profile.trackers and _matches(host, TRACKER_SUFFIXES):
+            return True
+        if self.profile.third_party and not _matches(host, self.first_party):
+            return True
+        return request.resource_type in self.profile.resource_types
+
+    async def install(self, context: BrowserContext) -> None:
+        # Sizes are learned from every response, including those of
+        # profiles that block nothing.
+        self.sizes.watch(context)
+        if self.profile.name != "full":
+            await context.route("**/*", self._route)
+
+    async def _route(self, route: Route) -> None:
+        request = route.request
+        if not self._blocks(request):
+            await route.fallback()
+            return
+        self.blocked += 1
+        self.bytes_saved += self.sizes.sizes.get(request.url, 0)
+        if request.resource_type == "image":
+            await route.fulfill(status=200, content_type="image/gif", body=_PIXEL)
+        else:
+            await route.abort("blockedbyclient")
+
+    def stats(self) -> dict[str, Any]:
+        return {"profile": self.profile.name, "blocked": self.blocked, "bytes_saved": self.bytes_saved}
@@ -0,0 +1,406 @@
+"""A local proxy that injects network faults on a schedule.
+
+TC019 and TC020 check the video error and retry path, which only shows when
+a request happens to fail. With ``--chaos SCHEDULE`` every test's context
+sends its traffic through its own :class:`ChaosProxy`, which applies the
+schedule's rules to it:
+
+* ``latency``: a delay drawn from a distribution, in milliseconds: a number
+  (fixed), or ``{"distribution": "uniform", "min_ms": .., "max_ms": ..}``,
+  ``normal`` (``mean_ms``, ``sd_ms``), ``lognormal`` (``median_ms``,
+  ``sigma``) or ``exponential`` (``mean_ms``);
+* ``fault``: ``empty`` closes the connection without a byte of response
+  (Chromium's ``ERR_EMPTY_RESPONSE``), ``reset`` resets it, ``status``
+  answers with ``status`` (default 503);
+* ``bandwidth_kbps``: caps the response throughput.
+
+A rule applies to requests whose host matches ``host`` (a glob, default
+``*``) and, if given, whose path matches ``path``. When it applies is
+scripted by ``after_s`` and ``until_s`` (seconds since the test started),
+``first`` (only the first N matching requests) and ``probability``. Every
+matching rule applies: latencies add up, the lowest bandwidth wins and the
+first fault is the one injected. Random draws come from ``seed``, so a
+schedule replays the same way::
+
+    {
+      "seed": 7,
+      "rules": [
+        {"host": "*.supabase.co", "latency": {"distribution": "lognormal", "median_ms": 250, "sigma": 0.6}},
+        {"host": "*.youtube.com", "fault": "empty", "first": 3},
+        {"host": "iframe.mediadelivery.net", "fault": "reset", "until_s": 20},
+        {"host": "localhost", "path": "/assets/*", "bandwidth_kbps": 800}
+      ]
+    }
+
+HTTPS is tunnelled, not decrypted: for those origins rules match the host
+only and apply per connection, not per request. Plain-HTTP origins, such as
+the app under ``--serve``, are proxied request by request, so ``path`` rules
+apply to them. The runner's own navigation retries (``--nav-attempts``)
+still retry the faults they recognise.
+
+Each result reports the requests and tunnels its proxy handled, the faults
+and latency it injected and the rules that fired; the run reports how many
+tests were faulted and how many of them passed anyway.
+``python -m testsprite_tests.runner.chaos SCHEDULE`` runs a proxy on its own.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import logging
+import math
+import random
+import socket
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Sequence
+from urllib.parse import urlsplit
+
+from .results import PASSED, TestResult
+
+log = logging.getLogger(__name__)
+
+FAULTS = ("empty", "reset", "status")
+
+_DISTRIBUTIONS: dict[str, Callable[..., float]] = {
+    "fixed": lambda rng, ms: ms,
+    "uniform": lambda rng, min_ms, max_ms: rng.uniform(min_ms, max_ms),
+    "normal": lambda rng, mean_ms, sd_ms: rng.gauss(mean_ms, sd_ms),
+    "lognormal": lambda rng, median_ms, sigma: rng.lognormvariate(math.log(median_ms), sigma),
+    "exponential": lambda rng, mean_ms: rng.expovariate(1 / mean_ms),
+}
+
+HEAD_LIMIT = 64 * 1024
+CHUNK_SIZE = 16 * 1024
+# Throttled responses are written in slices of this many seconds' worth.
+THROTTLE_TICK_S = 0.05
+
+# Hop-by-hop headers, replaced by the proxy's own.
+_HOP_HEADERS = frozenset({"connection", "proxy-connection", "keep-alive", "proxy-authorization", "te", "upgrade"})
+
+
+@dataclass(frozen=True)
+class Latency:
+    distribution: str
+    params: tuple[tuple[str, float], ...]
+
+    @classmethod
+    def parse(cls, spec: Any) -> "Latency":
+        if isinstance(spec, (int, float)):
+            return cls("fixed", (("ms", float(spec)),))
+        spec = dict(spec)
+        latency = cls(spec.pop("distribution", "fixed"), tuple(sorted(spec.items())))
+        if latency.distribution not in _DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency.distribution!r}")
+        try:
+            latency.sample(random.Random(0))
+        except TypeError as error:
+            raise ValueError(f"Bad parameters for a {latency.distribution} latency: {error}") from None
+        return latency
+
+    def sample(self, rng: random.Random) -> float:
+        return max(0.0, _DISTRIBUTIONS[self.distribution](rng, **dict(self.params)))
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    host: str = "*"
+    path: str | None = None
+    fault: str | None = None
+    status: int = 503
+    latency: Latency | None = None
+    bandwidth_kbps: float | None = None
+    probability: float = 1.0
+    after_s: float = 0.0
+    until_s: float = math.inf
+    first: int | None = None
+
+    @classmethod
+    def parse(cls, spec: dict[str, Any], index: int) -> "Rule":
+        known = {field.name for field in fields(cls)}
+        unknown = set(spec) - known
+        if unknown:
+            raise ValueError(f"Rule {index}: unknown keys {', '.join(sorted(unknown))}")
+        fault = spec.get("fault")
+        if fault not in (None, *FAULTS):
+            raise ValueError(f"Rule {index}: unknown fault {fault!r}; expected one of {', '.join(FAULTS)}")
+        if spec.get("status", 503) not in {status.value for status in HTTPStatus}:
+            raise ValueError(f"Rule {index}: unknown status {spec['status']!r}")
+        spec = {"name": f"{index}:{fault or 'shape'}@{spec.get('host', '*')}{spec.get('path') or ''}", **spec}
+        if "latency" in spec:
+            spec["latency"] = Latency.parse(spec["latency"])
+        return cls(**spec)
+
+    def matches(self, host: str, path: str | None) -> bool:
+        if not fnmatch.fnmatch(host, self.host):
+            return False
+        return self.path is None or (path is not None and fnmatch.fnmatch(path, self.path))
+
+
+@dataclass(frozen=True)
+class ChaosSchedule:
+    rules: tuple[Rule, ...]
+    seed: int | None = None
+
+    @classmethod
+    def parse(cls, spec: dict[str, Any]) -> "ChaosSchedule":
+        return cls(tuple(Rule.parse(rule, index) for index, rule in enumerate(spec["rules"])), spec.get("seed"))
+
+    @classmethod
+    def load(cls, path: Path) -> "ChaosSchedule":
+        return cls.parse(json.loads(path.read_text(encoding="utf-8")))
+
+
+@dataclass
+class _Effects:
+    latency_ms: float = 0.0
+    bandwidth_kbps: float | None = None
+    fault: Rule | None = None
+
+
+class ChaosProxy:
+    """An HTTP proxy on a free local port applying ``schedule``."""
+
+    def __init__(self, schedule: ChaosSchedule, *, host: str = "127.0.0.1", port: int = 0):
+        self.schedule = schedule
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.tunnels = 0
+        self.latency_ms = 0.0
+        self.throttled_bytes = 0
+        self.faults: Counter[str] = Counter()
+        self.fired: Counter[str] = Counter()
+        self._matched: Counter[str] = Counter()
+        self._rng = random.Random(schedule.seed)
+        self._started = 0.0
+        self._server: asyncio.Server | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=HEAD_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> str:
+        return await self.start()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    def _effects(self, host: str, path: str | None) -> _Effects:
+        elapsed = time.monotonic() - self._started
+        effects = _Effects()
+        for rule in self.schedule.rules:
+            if not rule.matches(host, path) or not rule.after_s <= elapsed < rule.until_s:
+                continue
+            self._matched[rule.name] += 1
+            if rule.first is not None and self._matched[rule.name] > rule.first:
+                continue
+            if rule.probability < 1 and self._rng.random() >= rule.probability:
+                continue
+            self.fired[rule.name] += 1
+            if rule.latency:
+                effects.latency_ms += rule.latency.sample(self._rng)
+            if rule.bandwidth_kbps:
+                effects.bandwidth_kbps = min(effects.bandwidth_kbps or math.inf, rule.bandwidth_kbps)
+            if rule.fault and effects.fault is None:
+                effects.fault = rule
+        return effects
+
+    async def _apply(self, effects: _Effects, writer: asyncio.StreamWriter) -> bool:
+        """Delay, then inject the fault if there is one; ``False`` once the client has its answer."""
+        if effects.latency_ms:
+            self.latency_ms += effects.latency_ms
+            await asyncio.sleep(effects.latency_ms / 1000)
+        rule = effects.fault
+        if rule is None:
+            return True
+        self.faults[rule.fault] += 1
+        if rule.fault == "reset":
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            writer.transport.abort()
+        elif rule.fault == "status":
+            writer.write(_response_head(rule.status))
+            await writer.drain()
+        return False
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+            if method == "CONNECT":
+                await self._tunnel(target, reader, writer)
+            else:
+                await self._forward(method, target, version, header_lines, reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # stop() with the connection still open; the connection just ends.
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _forward(
+        self, method: str, target: str, version: str, header_lines: list[str],
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+    ) -> None:
+        url = urlsplit(target)
+        if url.scheme != "http" or not url.hostname:
+            writer.write(_response_head(HTTPStatus.BAD_REQUEST))
+            return
+        self.requests += 1
+        effects = self._effects(url.hostname, url.path or "/")
+        if not await self._apply(effects, writer):
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        except OSError:
+            writer.write(_response_head(HTTPStatus.BAD_GATEWAY))
+            return
+        headers = [line for line in header_lines if line.split(":", 1)[0].strip().lower() not in _HOP_HEADERS]
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        upstream_writer.write("\r\n".join([f"{method} {path} {version}", *headers, "Connection: close", "", ""]).encode("latin-1"))
+        # The request body, however it is framed, follows the head as is.
+        body = asyncio.ensure_future(_pipe(reader, upstream_writer))
+        try:
+            response_head = await upstream_reader.readuntil(b"\r\n\r\n")
+            status_line, *response_headers = response_head[:-4].decode("latin-1").split("\r\n")
+            response_headers = [
+                line for line in response_headers if line.split(":", 1)[0].strip().lower() not in _HOP_HEADERS
+            ]
+            writer.write("\r\n".join([status_line, *response_headers, "Connection: close", "", ""]).encode("latin-1"))
+            await self._respond(upstream_reader, writer, effects.bandwidth_kbps)
+        finally:
+            body.cancel()
+            upstream_writer.close()
+
+    async def _tunnel(self, target: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        host, _, port = target.rpartition(":")
+        self.tunnels += 1
+        effects = self._effects(host.strip("[]"), None)
+        if not await self._apply(effects, writer):
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(host.strip("[]"), int(port))
+        except OSError:
+            writer.write(_response_head(HTTPStatus.BAD_GATEWAY))
+            return
+        writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+        upload = asyncio.ensure_future(_pipe(reader, upstream_writer))
+        try:
+            await self._respond(upstream_reader, writer, effects.bandwidth_kbps)
+        finally:
+            upload.cancel()
+            upstream_writer.close()
+
+    async def _respond(self, source: asyncio.StreamReader, sink: asyncio.StreamWriter, kbps: float | None) -> None:
+        """Copy ``source`` to the client, at no more than ``kbps`` if given."""
+        if not kbps:
+            await _pipe(source, sink)
+            return
+        bytes_per_s = kbps * 1000 / 8
+        while data := await source.read(max(1, int(bytes_per_s * THROTTLE_TICK_S))):
+            sink.write(data)
+            await sink.drain()
+            self.throttled_bytes += len(data)
+            await asyncio.sleep(len(data) / bytes_per_s)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "tunnels": self.tunnels,
+            "faults": dict(self.faults),
+            "latency_ms": round(self.latency_ms, 1),
+            "throttled_bytes": self.throttled_bytes,
+            "rules": dict(self.fired),
+        }
+
+
+def _response_head(status: int) -> bytes:
+    return f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode()
+
+
+async def _pipe(source: asyncio.StreamReader, sink: asyncio.StreamWriter) -> None:
+    try:
+        while data := await source.read(CHUNK_SIZE):
+            sink.write(data)
+            await sink.drain()
+    except ConnectionError:
+        pass
+
+
+def chaos_totals(results: Sequence[TestResult]) -> dict[str, Any]:
+    """What the run's proxies injected, and how many faulted tests still passed."""
+    reports = [(result, result.extra["chaos"]) for result in results if "chaos" in result.extra]
+    faults: Counter[str] = Counter()
+    for _, report in reports:
+        faults.update(report["faults"])
+    faulted = [result for result, report in reports if report["faults"]]
+    return {
+        "requests": sum(report["requests"] for _, report in reports),
+        "tunnels": sum(report["tunnels"] for _, report in reports),
+        "faults": dict(faults),
+        "latency_ms": round(sum(report["latency_ms"] for _, report in reports), 1),
+        "tests_faulted": len(faulted),
+        "tests_survived": sum(result.status == PASSED for result in faulted),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m testsprite_tests.runner.chaos",
+        description="Run the fault-injection proxy on its own, e.g. for a browser started with --proxy-server.",
+    )
+    parser.add_argument("schedule", type=Path, help="JSON schedule of fault rules")
+    parser.add_argument("--port", type=int, default=8899, help="default: %(default)s")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def serve() -> None:
+        proxy = ChaosProxy(ChaosSchedule.load(args.schedule), port=args.port)
+        async with proxy as url:
+            log.info("Chaos proxy at %s with %d rules (Ctrl+C stops)", url, len(proxy.schedule.rules))
+            try:
+                await asyncio.Event().wait()
+            finally:
+                log.info("%s", json.dumps(proxy.stats()))
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,453 @@
+"""Command line entry point: ``python -m testsprite_tests.runner``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Sequence
+
+from .history import HistoryStore, variant_of
+from .impact import changed_files, select_affected
+from .blocking import PROFILES
+from .config import BASE_URL
+from .interpreter import run_plan, select_plan_cases
+from .live import LiveReport
+from .loader import discover
+from .devices import DEVICES
+from .events import DEFAULT_EVENTS, EventFeed
+from .har import DEFAULT_IGNORED_PARAMS, DEFAULT_MATCH_HEADERS, MODES, REPLAY
+from .pool import ENGINES
+from .preview import PreviewServer
+from .retry import DEFAULT_ATTEMPTS
+from .results import DEFAULT_REPORT, FAILED, RunReport
+from .shard import run_sharded
+from .suite import DEFAULT_TEST_TIMEOUT, run_suite
+from .testdata import new_run_id, purge
+from .watch import DevServer, watch
+
+
+def _names(choices: Sequence[str]) -> Callable[[str], tuple[str, ...]]:
+    """Parser for a comma-separated subset of ``choices``, or ``all``."""
+
+    def parse(value: str) -> tuple[str, ...]:
+        names = tuple(choices) if value == "all" else tuple(dict.fromkeys(name.strip() for name in value.split(",")))
+        unknown = [name for name in names if name not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown: {', '.join(unknown)}; choose from {', '.join(choices)}")
+        return names
+
+    return parse
+
+
+def _is_matrix(args: argparse.Namespace) -> bool:
+    return len(args.engines) * max(1, len(args.devices)) > 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m testsprite_tests.runner",
+        description="Run the TestSprite TC scripts on a pool of warm browsers.",
+    )
+    parser.add_argument("tests", nargs="*", metavar="TC", help="test ids to run (default: all)")
+    parser.add_argument(
+        "--affected", nargs="?", const="HEAD", metavar="REF",
+        help="only run tests whose routes are touched by changes since REF "
+        "(default REF: HEAD, i.e. uncommitted changes)",
+    )
+    parser.add_argument(
+        "-b", "--browsers", type=int, default=min(4, os.cpu_count() or 1),
+        help="warm browsers in the pool, i.e. tests running at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--engines", type=_names(ENGINES), default=("chromium",), metavar="LIST",
+        help="comma-separated engines to run every test on at once, or 'all' for "
+        "chromium,firefox,webkit; --browsers applies per engine (default: chromium)",
+    )
+    parser.add_argument(
+        "--devices", type=_names(tuple(DEVICES)), default=(), metavar="LIST",
+        help=f"comma-separated devices to emulate, each at once on every engine, or 'all' for "
+        f"{','.join(DEVICES)}; records page load and interaction timings per device",
+    )
+    parser.add_argument(
+        "-s", "--shards", type=int, default=1,
+        help="worker processes, balanced by historical duration; --browsers applies per shard "
+        "(0: one per CPU, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--priority-first", action="store_true",
+        help="smoke-gate the host and login, run High-priority cases first and "
+        "abort the rest if the deployment is dead",
+    )
+    parser.add_argument(
+        "--from-plan", action="store_true",
+        help="interpret testsprite_frontend_test_plan.json instead of running the TC scripts "
+        "(covers plan cases without a script; --affected, --shards and --priority-first do not apply)",
+    )
+    parser.add_argument(
+        "--base-url", default=BASE_URL,
+        help="host every test runs against, replacing the scripts' production URL "
+        "(env TESTSPRITE_BASE_URL, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="build the app if needed, serve dist/ locally with vercel.json's rewrites "
+        "and run against it instead of --base-url",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="start Vite's dev server and keep the browsers, the login and warm contexts alive; "
+        "every save under src/ or to a TC script reruns the tests it affects (Ctrl+C stops)",
+    )
+    parser.add_argument(
+        "--resources", choices=["auto", *PROFILES], default="auto",
+        help="resource-blocking profile; auto picks one per plan category and loads "
+        "everything for visual tests (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--fresh-contexts", dest="warm_contexts", action="store_false",
+        help="create a new browser context per test instead of resetting a warm one",
+    )
+    parser.add_argument(
+        "--clear-sw", dest="keep_service_worker", action="store_false",
+        help="also drop the service worker and its caches when resetting a warm context",
+    )
+    parser.add_argument(
+        "--isolated-accounts", action="store_true",
+        help="run stateful tests (mission progress, favourites, admin edits) as per-worker accounts "
+        "provisioned with SUPABASE_SERVICE_ROLE_KEY instead of the shared one",
+    )
+    parser.add_argument(
+        "--db-fixtures", action="store_true",
+        help="against a local Supabase stack (TESTSPRITE_DATABASE_URL), restore the database from a template "
+        "before each stateful test; runs in one process",
+    )
+    parser.add_argument(
+        "--keep-test-data", dest="purge_test_data", action="store_false",
+        help="keep the content rows this run created instead of purging them afterwards",
+    )
+    parser.add_argument(
+        "--purge-all-test-data", action="store_true",
+        help="delete the content rows tagged by any run (and legacy TC049 stories), then exit",
+    )
+    parser.add_argument(
+        "--clock-offset", type=float, default=0.0, metavar="DAYS",
+        help="run every page on a fake clock DAYS ahead (drip locks, trial expiry, daily content); "
+        "such tests log in themselves and get fresh contexts",
+    )
+    parser.add_argument(
+        "--har", choices=MODES,
+        help="record every test's network traffic to tmp/har/<TC>.har, or replay it offline and "
+        "abort whatever the recording lacks; tests log in through their own steps",
+    )
+    parser.add_argument(
+        "--har-ignore-param", dest="har_ignore_params", action="append", default=[], metavar="NAME",
+        help=f"query parameter to ignore when matching replayed requests, besides "
+        f"{','.join(sorted(DEFAULT_IGNORED_PARAMS))} (repeatable)",
+    )
+    parser.add_argument(
+        "--har-match-header", dest="har_match_headers", action="append", metavar="NAME",
+        help=f"request header replayed requests must match, bearer tokens by role and user "
+        f"(repeatable, default: {','.join(DEFAULT_MATCH_HEADERS)})",
+    )
+    parser.add_argument(
+        "--chaos", type=Path, metavar="SCHEDULE",
+        help="send every test's traffic through a local proxy injecting the latency, empty responses, "
+        "resets and bandwidth caps of this JSON schedule; path rules need a plain-HTTP app (--serve), "
+        "and --nav-attempts 1 leaves navigation faults unretried",
+    )
+    parser.add_argument(
+        "--no-events", dest="events", action="store_false",
+        help=f"do not stream events to {DEFAULT_EVENTS.name} nor render the Markdown and HTML reports "
+        "next to --report while the run goes",
+    )
+    parser.add_argument(
+        "--no-history", dest="history", action="store_false",
+        help="do not record this run in tmp/history.sqlite3",
+    )
+    parser.add_argument(
+        "--quarantine", action="store_true",
+        help="do not fail the run for tests the history shows failing transiently (they still run)",
+    )
+    parser.add_argument(
+        "--no-step-trace", dest="step_trace", action="store_false",
+        help="do not time every goto, fill, click, sleep and assertion into tmp/traces/<run>/<TC>.json",
+    )
+    parser.add_argument(
+        "--artifacts", action="store_true",
+        help="keep the last screenshots, console and network events and a trace of every failing test "
+        "under tmp/artifacts/; passing tests leave nothing",
+    )
+    parser.add_argument("--headed", action="store_true", help="show the browser windows")
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TEST_TIMEOUT,
+        help="per-test timeout in seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-auth-cache", dest="auth_cache", action="store_false",
+        help="let every test log in through the form instead of reusing one session",
+    )
+    parser.add_argument(
+        "--nav-attempts", type=int, default=DEFAULT_ATTEMPTS,
+        help="tries per navigation on transient network errors such as ERR_EMPTY_RESPONSE "
+        "(1: no retries, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-locator-index", dest="locator_index", action="store_false",
+        help="use the scripts' absolute XPaths as they are, without the recorded fingerprint fallback",
+    )
+    parser.add_argument(
+        "--report", type=Path, default=DEFAULT_REPORT,
+        help="where to write the JSON report (default: %(default)s)",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.db_fixtures and args.isolated_accounts:
+        parser.error("--db-fixtures restores the database per test; --isolated-accounts is not needed with it")
+    if (_is_matrix(args) or args.devices) and args.from_plan:
+        parser.error("--engines and --devices run the scripts; they cannot be combined with --from-plan")
+    if _is_matrix(args) and args.db_fixtures:
+        parser.error("an engine or device matrix runs the scripts concurrently; it cannot use --db-fixtures")
+    if args.watch and (
+        args.serve or args.from_plan or args.affected or _is_matrix(args) or args.devices
+        or args.db_fixtures or args.isolated_accounts or args.clock_offset
+    ):
+        parser.error(
+            "--watch runs the affected scripts on desktop Chromium against its own dev server; it cannot be "
+            "combined with --serve, --from-plan, --affected, --engines, --devices, --db-fixtures, "
+            "--isolated-accounts or --clock-offset"
+        )
+    if args.har and (args.from_plan or args.watch or args.isolated_accounts or args.db_fixtures):
+        parser.error(
+            "--har records the scripts' traffic; it cannot be combined with --from-plan, --watch, "
+            "--isolated-accounts or --db-fixtures"
+        )
+    if args.chaos and (args.from_plan or args.watch):
+        parser.error("--chaos applies to the scripts of a run; it cannot be combined with --from-plan or --watch")
+    if args.har == REPLAY and args.priority_first:
+        parser.error("--priority-first probes the live host; it cannot be combined with --har replay")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with ExitStack() as stack:
+        if args.watch:
+            return _watch(args, stack.enter_context(DevServer()))
+        base_url = stack.enter_context(PreviewServer()) if args.serve else args.base_url
+        return _run(args, base_url)
+
+
+def _watch(args: argparse.Namespace, base_url: str) -> int:
+    # Work-in-progress failures would skew the flake statistics, so
+    # reruns are not recorded in the history.
+    run_id = new_run_id()
+    try:
+        asyncio.run(watch(
+            base_url,
+            args.tests or None,
+            browsers=args.browsers,
+            headless=not args.headed,
+            timeout=args.timeout,
+            auth_cache=args.auth_cache,
+            locator_index=args.locator_index,
+            nav_attempts=args.nav_attempts,
+            resources=args.resources,
+            warm_contexts=args.warm_contexts,
+            run_id=run_id,
+            artifacts=args.artifacts,
+            step_trace=args.step_trace,
+            on_report=lambda report: _finish(report, args),
+        ))
+    except KeyboardInterrupt:
+        logging.info("Stopped watching")
+    if args.purge_test_data:
+        purge(base_url, run_id)
+    return 0
+
+
+def _run(args: argparse.Namespace, base_url: str) -> int:
+    if args.purge_all_test_data:
+        purge(base_url)
+        return 0
+    run_id = new_run_id()
+    if args.from_plan:
+        plan_cases = select_plan_cases(args.tests or None)
+        with _live(args, run_id, len(plan_cases)) as feed:
+            report = asyncio.run(run_plan(
+                plan_cases,
+                browsers=args.browsers,
+                headless=not args.headed,
+                timeout=args.timeout,
+                auth_cache=args.auth_cache,
+                base_url=base_url,
+                resources=args.resources,
+                warm_contexts=args.warm_contexts,
+                keep_service_worker=args.keep_service_worker,
+                run_id=run_id,
+                clock_offset=args.clock_offset,
+                artifacts=args.artifacts,
+                step_trace=args.step_trace,
+                events=feed and feed.path,
+            ))
+            _finished(feed, report)
+        return _conclude(report, args, base_url, run_id, "plan")
+    cases = discover(args.tests or None)
+    if args.affected:
+        changed = changed_files(args.affected)
+        cases = select_affected(cases, changed)
+        logging.info(
+            "%d changed files since %s affect %d tests: %s",
+            len(changed), args.affected, len(cases), " ".join(case.id for case in cases) or "-",
+        )
+        if not cases:
+            return 0
+    options = dict(
+        browsers=args.browsers,
+        headless=not args.headed,
+        timeout=args.timeout,
+        auth_cache=args.auth_cache,
+        priority_first=args.priority_first,
+        locator_index=args.locator_index,
+        nav_attempts=args.nav_attempts,
+        base_url=base_url,
+        resources=args.resources,
+        warm_contexts=args.warm_contexts,
+        keep_service_worker=args.keep_service_worker,
+        isolated_accounts=args.isolated_accounts,
+        db_fixtures=args.db_fixtures,
+        run_id=run_id,
+        clock_offset=args.clock_offset,
+        engines=args.engines,
+        devices=args.devices,
+        artifacts=args.artifacts,
+        step_trace=args.step_trace,
+        har=args.har,
+        har_ignore_params=args.har_ignore_params,
+        har_match_headers=args.har_match_headers,
+        chaos=args.chaos,
+    )
+    # Shards would restore the one database under each other's feet.
+    # The matrix's comparison is made in one process.
+    shards = 1 if args.db_fixtures or _is_matrix(args) else args.shards or os.cpu_count() or 1
+    variants = len(args.engines) * max(1, len(args.devices))
+    with _live(args, run_id, len(cases) * variants) as feed:
+        options["events"] = feed and feed.path
+        if shards > 1:
+            report = run_sharded(cases, shards, **options)
+        else:
+            report = asyncio.run(run_suite(cases, **options))
+        _finished(feed, report)
+    return _conclude(report, args, base_url, run_id, "runner")
+
+
+@contextmanager
+def _live(args: argparse.Namespace, run_id: str, expected: int) -> Iterator[EventFeed | None]:
+    """A fresh event stream for the run, rendered live next to the JSON report."""
+    if not args.events:
+        yield None
+        return
+    with EventFeed(DEFAULT_EVENTS, truncate=True) as feed:
+        feed.emit("run_started", run_id=run_id, tests=expected)
+        with LiveReport(feed.path, args.report.with_suffix(".md"), args.report.with_suffix(".html")):
+            yield feed
+
+
+def _finished(feed: EventFeed | None, report: RunReport) -> None:
+    if feed:
+        feed.emit("run_finished", summary=report.summary())
+
+
+def _conclude(report: RunReport, args: argparse.Namespace, base_url: str, run_id: str, source: str) -> int:
+    """Record and write the run before purging its test data, which may hang or fail."""
+    report = _record(report, args, base_url, run_id, source)
+    report.write(args.report)
+    return _finish(_purge(report, args, base_url, run_id), args)
+
+
+def _purge(report: RunReport, args: argparse.Namespace, base_url: str, run_id: str) -> RunReport:
+    # A replayed run created nothing, and may be offline.
+    if args.purge_test_data and args.har != REPLAY:
+        report.extra["test_data"] = purge(base_url, run_id)
+    return report
+
+
+def _record(report: RunReport, args: argparse.Namespace, base_url: str, run_id: str, source: str) -> RunReport:
+    """Add the run to the history and flag the failures it shows as transient."""
+    if not args.history:
+        return report
+    with HistoryStore() as store:
+        store.record(report, run_id, source=source, base_url=base_url)
+        # The statistics cover the scripts on desktop Chromium.
+        failed = [
+            result for result in report.results
+            if result.status == FAILED and source == "runner" and not variant_of(result.extra)
+        ]
+        quarantined = store.quarantined([result.id for result in failed]) if failed else []
+    for result in failed:
+        if result.id in quarantined:
+            result.extra["quarantined"] = True
+    report.extra["quarantined"] = quarantined
+    return report
+
+
+def _finish(report: RunReport, args: argparse.Namespace) -> int:
+    path = report.write(args.report)
+    summary = report.summary()
+    if "aborted" in report.extra:
+        logging.error("Run aborted: %s", report.extra["aborted"])
+    logging.info(
+        "%d passed, %d failed, %d skipped in %.1fs (pool start %.1fs, mean overhead %.0fms, "
+        "~%.1f MB not downloaded) -> %s",
+        summary["passed"], summary["failed"], summary["skipped"], summary["wall_ms"] / 1000,
+        summary["startup_ms"] / 1000, summary["mean_overhead_ms"], report.extra.get("bytes_saved", 0) / 1e6, path,
+    )
+    if report.extra.get("slowest_steps"):
+        by_category = report.extra["step_ms_by_category"]
+        logging.info("Step time: %s", ", ".join(f"{category} {ms / 1000:.1f}s" for category, ms in by_category.items()))
+        logging.info("Slowest steps:")
+        for step in report.extra["slowest_steps"]:
+            logging.info(
+                "  %6.1fs %s:%d %s %s on %s %s", step["ms"] / 1000, step["test"], step["line"], step["category"],
+                step["step"], step["route"] or "-", step.get("selector", ""),
+            )
+    har = report.extra.get("har")
+    if har and "served" in har:
+        logging.info("HAR replay: %d responses served, %d requests not in the recordings", har["served"], har["missed"])
+    elif har:
+        logging.info("HAR recorded: %d requests, %.1f MB under tmp/har/", har["entries"], har["bytes"] / 1e6)
+    chaos = report.extra.get("chaos")
+    if chaos:
+        logging.info(
+            "Chaos: %s injected, +%.1fs latency; %d of %d faulted tests passed",
+            ", ".join(f"{count} {fault}" for fault, count in chaos["faults"].items()) or "no faults",
+            chaos["latency_ms"] / 1000, chaos["tests_survived"], chaos["tests_faulted"],
+        )
+    artifacts = report.extra.get("artifacts")
+    if artifacts:
+        logging.info(
+            "%d failures recorded: %.1f MB of traces and screenshots written, %d frames deduplicated",
+            artifacts["failures_recorded"], artifacts["bytes_written"] / 1e6, artifacts["frames_deduplicated"],
+        )
+    dimension = report.extra.get("matrix", {}).get("dimension")
+    for variant, summary in report.extra.get(f"{dimension}s", {}).items():
+        timings = (
+            f", mean load {summary['mean_load_ms']:.0f}ms, interaction {summary['mean_interaction_ms']:.0f}ms"
+            if "mean_load_ms" in summary else ""
+        )
+        logging.info(
+            "  %-22s %d passed, %d failed in %.1fs (mean test %.1fs%s)", variant, summary["passed"],
+            summary["failed"], summary["wall_ms"] / 1000, summary["mean_test_ms"] / 1000, timings,
+        )
+    for test_id, outcomes in report.extra.get(f"{dimension}_differences", {}).items():
+        logging.info("  %s differs: %s", test_id, "; ".join(f"{variant} {status}" for variant, status in outcomes.items()))
+    if report.extra.get("quarantined"):
+        logging.warning(
+            "Failing transiently (quarantined%s): %s",
+            ", not failing the run" if args.quarantine else "", " ".join(report.extra["quarantined"]),
+        )
+    blocking = [result for result in report.failed if not (args.quarantine and result.extra.get("quarantined"))]
+    return 1 if blocking else 0
@@ -0,0 +1,39 @@
+"""Time travel for the date-driven parts of the app.
+
+Drip locks (``isContentLocked`` in ``src/lib/drip.ts``), the trial in
+``useTrialAccess``, the devotional's verse of the day and the daily tasks
+``useChildTasks`` generates all read ``new Date()``. Instead of waiting days
+or editing rows, a :class:`TimeTravel` installs Playwright's fake clock in
+every page of a context, started ``offset_days`` ahead of now. Time then runs
+on normally, and :func:`advance_days` jumps it forward within the same
+session without firing the timers in between, so a 30-day journey takes a
+reload.
+
+A client clock ahead of the server makes supabase-js refresh its session,
+and refresh tokens are single-use: a travelling context must not share the
+cached login, nor be handed to another test afterwards.
+"""
+
+from __future__ import annotations
+
+import time
+
+from playwright.async_api import BrowserContext, Page
+
+DAY_S = 86400
+
+
+class TimeTravel:
+    """A fake clock for each context, ``offset_days`` ahead of the real one."""
+
+    def __init__(self, offset_days: float = 0.0):
+        self.offset_days = offset_days
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.clock.install(time=time.time() + self.offset_days * DAY_S)
+
+
+async def advance_days(page: Page, days: float) -> None:
+    """Move ``page``'s clock (installing one if needed) ``days`` forward."""
+    now_ms = await page.evaluate("Date.now()")
+    await page.clock.set_system_time(now_ms / 1000 + days * DAY_S)
@@ -0,0 +1,170 @@
+"""Warm browser contexts, reset between tests instead of re-created.
+
+A fresh ``new_context()`` per test throws away V8's code cache and the
+app's service worker (``vite-plugin-pwa`` precaches the whole bundle), so
+every test cold-starts the app. :class:`ContextPool` keeps each browser's
+context after the test and resets it before the next one:
+
+* on release, its pages are closed and its routes removed, so nothing keeps
+  running between tests;
+* on acquire, cookies and permissions are cleared, and a blank document
+  served on the app origin (bypassing the service worker) empties
+  localStorage (``user_xp``, ``user_avatar``, ``theme``, the Supabase
+  session ...), sessionStorage and IndexedDB. The service worker and its
+  caches are kept unless ``keep_service_worker`` is off. The test's
+  ``storage_state`` is then written back in the same step.
+
+What a warm context buys shows up in the first page load, so besides the
+create and reset times the pool reports the mean time from handing out a
+context to its first ``DOMContentLoaded``, for fresh and for reset contexts.
+Playwright turns the HTTP cache off while a context has routes, and the
+content tagger, resource blocking, navigation retry and HAR replay all
+route, so the HTTP cache is not among the savings.
+
+Resetting needs a CDP session, so non-Chromium browsers always get fresh
+contexts.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+RESET_PATH = "/__runner_reset__"
+
+# Playwright's own defaults, restored over whatever the last script set.
+DEFAULT_TIMEOUT_MS = 30000
+
+_RESET_JS = """async ({items, keepServiceWorker}) => {
+    localStorage.clear();
+    sessionStorage.clear();
+    for (const db of await indexedDB.databases()) {
+        await new Promise(done => {
+            const request = indexedDB.deleteDatabase(db.name);
+            request.onsuccess = request.onerror = request.onblocked = done;
+        });
+    }
+    if (!keepServiceWorker) {
+        for (const key of await caches.keys()) await caches.delete(key);
+        for (const registration of await navigator.serviceWorker.getRegistrations()) await registration.unregister();
+    }
+    for (const [name, value] of items) localStorage.setItem(name, value);
+}"""
+
+
+class WarmContext:
+    """A pooled context as a script sees it; ``close()`` hands it back."""
+
+    def __init__(self, context: BrowserContext, pool: "ContextPool"):
+        self._context = context
+        self._pool = pool
+        self._released = False
+
+    async def close(self, **kwargs: Any) -> None:
+        if not self._released:
+            self._released = True
+            await self._pool.release(self._context)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._context, name)
+
+
+class ContextPool:
+    """Idle contexts per browser, plus timings of creating vs resetting them."""
+
+    def __init__(self, base_url: str, *, keep_service_worker: bool = True):
+        self.origin = base_url.rstrip("/")
+        self.keep_service_worker = keep_service_worker
+        self.fresh_ms: list[float] = []
+        self.reset_ms: list[float] = []
+        self.first_load_ms: dict[str, list[float]] = {"fresh": [], "reset": []}
+        self._idle: dict[Browser, list[BrowserContext]] = {}
+
+    @staticmethod
+    def accepts(browser: Browser, context_options: dict[str, Any]) -> bool:
+        """Only plain contexts (a storage state at most) on Chromium are pooled."""
+        return browser.browser_type.name == "chromium" and set(context_options) <= {"storage_state"}
+
+    async def acquire(self, browser: Browser, context_options: dict[str, Any]) -> BrowserContext:
+        idle = self._idle.get(browser, [])
+        started = time.perf_counter()
+        if not idle:
+            context = await browser.new_context(**context_options)
+            self.fresh_ms.append((time.perf_counter() - started) * 1000)
+            self._time_first_load(context, "fresh")
+            return context
+        context = idle.pop()
+        await self._reset(context, context_options.get("storage_state"))
+        self.reset_ms.append((time.perf_counter() - started) * 1000)
+        self._time_first_load(context, "reset")
+        return context
+
+    def _time_first_load(self, context: BrowserContext, kind: str) -> None:
+        handed_out = time.perf_counter()
+
+        loads = self.first_load_ms[kind]
+
+        def on_page(page: Page) -> None:
+            page.once("domcontentloaded", lambda _: loads.append((time.perf_counter() - handed_out) * 1000))
+
+        context.once("page", on_page)
+
+    async def release(self, context: BrowserContext) -> None:
+        try:
+            await context.unroute_all(behavior="ignoreErrors")
+            for page in context.pages:
+                await page.close()
+        except Exception:
+            # A context that cannot be quiesced is not worth reusing.
+            await context.close()
+            return
+        if context.browser and context.browser.is_connected():
+            self._idle.setdefault(context.browser, []).append(context)
+
+    async def _reset(self, context: BrowserContext, storage_state: str | None) -> None:
+        state = json.loads(Path(storage_state).read_text(encoding="utf-8")) if storage_state else {}
+        items = [
+            (item["name"], item["value"])
+            for origin in state.get("origins", [])
+            if origin["origin"] == self.origin
+            for item in origin.get("localStorage", [])
+        ]
+        await context.clear_cookies()
+        await context.clear_permissions()
+        await context.set_extra_http_headers({})
+        await context.set_offline(False)
+        context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+        context.set_default_navigation_timeout(DEFAULT_TIMEOUT_MS)
+        if state.get("cookies"):
+            await context.add_cookies(state["cookies"])
+
+        page = await context.new_page()
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Network.enable")
+            await cdp.send("Network.setBypassServiceWorker", {"bypass": True})
+            await page.route(
+                f"{self.origin}{RESET_PATH}",
+                lambda route: route.fulfill(status=200, content_type="text/html", body="<!doctype html>"),
+            )
+            await page.goto(f"{self.origin}{RESET_PATH}", wait_until="commit")
+            await page.evaluate(_RESET_JS, {"items": items, "keepServiceWorker": self.keep_service_worker})
+        finally:
+            await page.close()
+
+    def stats(self) -> dict[str, Any]:
+        def mean(values: list[float]) -> float:
+            return round(sum(values) / len(values), 1) if values else 0.0
+
+        return {
+            "created": len(self.fresh_ms),
+            "reused": len(self.reset_ms),
+            "mean_fresh_ms": mean(self.fresh_ms),
+            "mean_reset_ms": mean(self.reset_ms),
+            "mean_first_load_fresh_ms": mean(self.first_load_ms["fresh"]),
+            "mean_first_load_reset_ms": mean(self.first_load_ms["reset"]),
+        }
@@ -0,0 +1,120 @@
+"""Phone and tablet emulation, with per-device load and interaction timings.
+
+The scripts all run in a 1280x720 desktop window, but the app is a
+phone-first PWA (``BottomNav``, touch games). A :class:`Device` gives each
+test's contexts a Playwright device descriptor (viewport, DPR, touch, mobile
+user agent) and, for the low-end Android, throttles the CPU the way a
+budget phone would be. Running a selection under several devices goes
+through :mod:`.matrix`, like the engine matrix.
+
+Each context also reports its own timings from inside the page: the
+navigation entry of every full page load (DOMContentLoaded and load) and,
+where the Event Timing API exists (Chromium), the duration of each click,
+tap and keypress from input to the next paint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from playwright.async_api import BrowserContext, Page
+
+# Name -> (Playwright descriptor, CPU slowdown factor).
+DEVICES = {
+    "android-low": ("Moto G4", 4),
+    "iphone-se": ("iPhone SE (3rd gen)", 1),
+    "tablet": ("Galaxy Tab S4", 1),
+}
+
+_BINDING = "__runnerTiming"
+
+_TIMING_JS = """(() => {
+    if (window.top !== window) return;
+    const report = data => window.__runnerTiming && window.__runnerTiming(data);
+    addEventListener('load', () => setTimeout(() => {
+        const [navigation] = performance.getEntriesByType('navigation');
+        if (navigation) report({kind: 'load', dcl: navigation.domContentLoadedEventEnd, load: navigation.loadEventEnd});
+    }, 0));
+    if ((PerformanceObserver.supportedEntryTypes || []).includes('event')) {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (entry.interactionId) report({kind: 'interaction', duration: entry.duration});
+            }
+        }).observe({type: 'event', durationThreshold: 16, buffered: true});
+    }
+})();"""
+
+
+def _mean(values: list[float]) -> float:
+    return round(sum(values) / len(values), 1) if values else 0.0
+
+
+class DeviceTimings:
+    """What one test's pages reported; installed on each of its contexts."""
+
+    def __init__(self, cpu_slowdown: int = 1):
+        self.cpu_slowdown = cpu_slowdown
+        self.dcl_ms: list[float] = []
+        self.load_ms: list[float] = []
+        self.interaction_ms: list[float] = []
+        self._throttling: set[asyncio.Future] = set()
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.expose_binding(_BINDING, self._record)
+        await context.add_init_script(_TIMING_JS)
+        if self.cpu_slowdown > 1 and context.browser and context.browser.browser_type.name == "chromium":
+            context.on("page", lambda page: self._track(asyncio.ensure_future(self._throttle(context, page))))
+
+    def _track(self, future: asyncio.Future) -> None:
+        self._throttling.add(future)
+        future.add_done_callback(self._throttling.discard)
+
+    async def _throttle(self, context: BrowserContext, page: Page) -> None:
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Emulation.setCPUThrottlingRate", {"rate": self.cpu_slowdown})
+        except Exception:
+            # The page closed before it could be throttled.
+            pass
+
+    def _record(self, source: Any, data: dict[str, Any]) -> None:
+        if data.get("kind") == "load":
+            self.dcl_ms.append(float(data["dcl"]))
+            self.load_ms.append(float(data["load"]))
+        elif data.get("kind") == "interaction":
+            self.interaction_ms.append(float(data["duration"]))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "loads": len(self.load_ms),
+            "mean_dcl_ms": _mean(self.dcl_ms),
+            "mean_load_ms": _mean(self.load_ms),
+            "interactions": len(self.interaction_ms),
+            "mean_interaction_ms": _mean(self.interaction_ms),
+            "max_interaction_ms": round(max(self.interaction_ms, default=0.0), 1),
+        }
+
+
+@dataclass(frozen=True)
+class Device:
+    name: str
+    descriptor: dict[str, Any]
+    cpu_slowdown: int = 1
+
+    @classmethod
+    def named(cls, name: str, descriptors: dict[str, dict[str, Any]]) -> "Device":
+        """``name`` from :data:`DEVICES`, resolved against ``playwright.devices``."""
+        descriptor_name, cpu_slowdown = DEVICES[name]
+        return cls(name, descriptors[descriptor_name], cpu_slowdown)
+
+    def context_options(self, engine: str) -> dict[str, Any]:
+        options = {key: value for key, value in self.descriptor.items() if key != "default_browser_type"}
+        if engine == "firefox":
+            # Firefox has no mobile mode; the viewport, DPR and touch remain.
+            options.pop("is_mobile", None)
+        return options
+
+    def timings(self) -> DeviceTimings:
+        return DeviceTimings(self.cpu_slowdown)
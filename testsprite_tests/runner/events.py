@@ -0,0 +1,76 @@
+"""A JSON-lines stream of what a run is doing, written while it runs.
+
+The JSON report only appears once every test has finished, so a long run
+cannot be watched and a crash loses everything. An :class:`EventFeed`
+appends one JSON object per line to ``tmp/runner_events.jsonl`` as things
+happen:
+
+* ``run_started``: the run id and how many results to expect;
+* ``test_started``: a test (and its engine/device variant) got a browser;
+* ``step``: one of its steps finished, with the fields of :mod:`.steps`;
+* ``test_finished``: its status, error, duration and overhead;
+* ``run_finished``: the report summary.
+
+Every event carries ``ts``, the wall-clock time in seconds. Each line is a
+single ``write()`` to a file opened for appending, so the worker processes
+of a sharded run can share the stream without interleaving, and a crash
+leaves every complete line readable. :mod:`.live` renders the stream.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from .loader import TMP_DIR
+
+DEFAULT_EVENTS = TMP_DIR / "runner_events.jsonl"
+
+
+class EventFeed:
+    """Appends events to ``path``; ``truncate`` starts a new stream."""
+
+    def __init__(self, path: Path = DEFAULT_EVENTS, *, truncate: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (os.O_TRUNC if truncate else 0)
+        self._fd = os.open(path, flags, 0o644)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False)
+        os.write(self._fd, (line + "\n").encode("utf-8"))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "EventFeed":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class EventReader:
+    """Reads the events appended to ``path`` since the last call."""
+
+    def __init__(self, path: Path = DEFAULT_EVENTS):
+        self.path = path
+        self._offset = 0
+        self._partial = b""
+
+    def read(self) -> Iterator[dict[str, Any]]:
+        if not self.path.exists():
+            return
+        with self.path.open("rb") as stream:
+            stream.seek(self._offset)
+            data = self._partial + stream.read()
+            self._offset = stream.tell()
+        *lines, self._partial = data.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,194 @@
+"""Reset a local Supabase database between stateful tests by cloning a template.
+
+Completing mission steps, saving favourites and creating admin content all
+leave rows behind that later tests see, and undoing them through the UI
+means a login plus a dozen clicks. Against a local stack (``supabase start``,
+which applies ``supabase/migrations``) :class:`DatabaseFixture` instead:
+
+* snapshots the migrated and seeded app database once into a template
+  database, tagged with a digest of the migrations so a schema change
+  rebuilds it;
+* before each stateful test, drops the app database (``WITH (FORCE)``
+  disconnects PostgREST and GoTrue, whose pools reconnect on their own) and
+  re-creates it from the template, which is a file-level copy.
+
+A savepoint would be cheaper still, but the app's writes arrive through
+PostgREST's own connections, which a transaction held by the runner cannot
+see into, so only a whole-database copy resets them.
+
+Sessions created after the snapshot disappear with each restore; the cached
+access token stays valid until it expires, so the shared login survives.
+Seeding the shared login goes through ``SUPABASE_URL``, so it is refused
+unless that is the local stack too.
+The statements go through ``psql``, which ships with every Postgres install.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import subprocess
+import time
+from typing import Any, Callable, Sequence
+from urllib.parse import urlsplit, urlunsplit
+
+from .accounts import ISOLATED_TESTS, Account, Needs, SupabaseAdmin
+from .config import DATABASE_URL, LOGIN_EMAIL, LOGIN_PASSWORD, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_URL
+from .impact import REPO_ROOT
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = REPO_ROOT / "supabase" / "migrations"
+
+# The tests whose writes later tests would see.
+STATEFUL_TESTS = frozenset(ISOLATED_TESTS)
+
+# Connected to while the app database itself is dropped or copied.
+MAINTENANCE_DB = "template1"
+
+LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# ALTER DATABASE ... SET values are not copied by CREATE DATABASE.
+_COPY_SETTINGS = """DO $$
+DECLARE setting text;
+BEGIN
+    FOR setting IN
+        SELECT unnest(setconfig) FROM pg_db_role_setting
+        WHERE setrole = 0 AND setdatabase = (SELECT oid FROM pg_database WHERE datname = '{source}')
+    LOOP
+        EXECUTE format('ALTER DATABASE {target} SET %s = %L',
+                       split_part(setting, '=', 1), substr(setting, strpos(setting, '=') + 1));
+    END LOOP;
+END $$"""
+
+
+def migrations_digest() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def is_stateful(test_id: str) -> bool:
+    return test_id in STATEFUL_TESTS
+
+
+def is_local_stack(supabase_url: str = SUPABASE_URL, database_url: str = DATABASE_URL) -> bool:
+    """Whether ``supabase_url`` is a local stack, or the host of ``database_url``."""
+    host = urlsplit(supabase_url).hostname or ""
+    return host in LOCAL_HOSTS or host == urlsplit(database_url).hostname
+
+
+def seed_shared_account() -> None:
+    """Create the shared test login in a fresh local stack, admin and with a child."""
+    if not is_local_stack():
+        raise RuntimeError(f"Refusing to seed {SUPABASE_URL or 'SUPABASE_URL'}: it is not the local stack")
+    admin = SupabaseAdmin()
+    account = Account(-1, LOGIN_EMAIL, LOGIN_PASSWORD)
+    account.user_id = admin.ensure_user(account)
+    admin.prepare(account, Needs(admin=True, child=True, routine=True))
+
+
+def default_seed() -> Callable[[], None] | None:
+    """Seed through the admin API when the local service-role key is known."""
+    if not SUPABASE_SERVICE_ROLE_KEY:
+        return None
+    if not is_local_stack():
+        log.warning("Not seeding the shared login: SUPABASE_URL %s is not the local stack", SUPABASE_URL)
+        return None
+    return seed_shared_account
+
+
+class DatabaseFixture:
+    """The app database at ``url`` and its template copy."""
+
+    def __init__(self, url: str = DATABASE_URL, *, seed: Callable[[], None] | None = None):
+        parts = urlsplit(url)
+        self.database = parts.path.lstrip("/") or "postgres"
+        self.template = f"{self.database}_testsprite_template"
+        if not _IDENTIFIER.fullmatch(self.database):
+            raise ValueError(f"Unsupported database name {self.database!r}")
+        self.maintenance_url = urlunsplit(parts._replace(path=f"/{MAINTENANCE_DB}"))
+        self.seed = seed
+        self.restore_ms: list[float] = []
+        self.snapshot_ms = 0.0
+
+    def _psql(self, *statements: str) -> str:
+        # One process per batch; each -c runs outside a transaction block,
+        # as CREATE and DROP DATABASE require.
+        command = ["psql", "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1", "-d", self.maintenance_url]
+        for statement in statements:
+            command += ["-c", statement]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode:
+            raise RuntimeError(f"psql failed: {completed.stderr.strip()}")
+        return completed.stdout.strip()
+
+    def _template_digest(self) -> str:
+        """The migrations digest the template was made from, or ``""``."""
+        return self._psql(
+            f"SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = '{self.template}'"
+        )
+
+    def _clone(self, source: str, target: str, *, drop_target: bool) -> list[str]:
+        statements = [f'DROP DATABASE IF EXISTS "{target}" WITH (FORCE)'] if drop_target else []
+        return statements + [
+            f'CREATE DATABASE "{target}" TEMPLATE "{source}"',
+            _COPY_SETTINGS.format(source=source, target=f'"{target}"'),
+        ]
+
+    def prepare(self) -> None:
+        """Make sure the template matches the migrations, then start from it."""
+        digest = migrations_digest()
+        if self._template_digest() == digest:
+            log.info("Database template %s is current", self.template)
+            self.restore()
+            return
+        if self.seed:
+            self.seed()
+        started = time.perf_counter()
+        # The source of a copy must have no other sessions, and PostgREST and
+        # GoTrue reconnect as soon as theirs are terminated, so connections
+        # are refused until the copy is made.
+        self._psql(f'ALTER DATABASE "{self.database}" ALLOW_CONNECTIONS false')
+        try:
+            self._psql(
+                f'DROP DATABASE IF EXISTS "{self.template}"',
+                f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                f"WHERE datname = '{self.database}' AND pid <> pg_backend_pid()",
+                *self._clone(self.database, self.template, drop_target=False),
+                f"COMMENT ON DATABASE \"{self.template}\" IS '{digest}'",
+            )
+        finally:
+            self._psql(f'ALTER DATABASE "{self.database}" ALLOW_CONNECTIONS true')
+        self.snapshot_ms = (time.perf_counter() - started) * 1000
+        log.info("Snapshotted %s into %s in %.0fms", self.database, self.template, self.snapshot_ms)
+
+    def restore(self) -> float:
+        """Replace the app database with a fresh copy of the template."""
+        started = time.perf_counter()
+        self._psql(*self._clone(self.template, self.database, drop_target=True))
+        elapsed = (time.perf_counter() - started) * 1000
+        self.restore_ms.append(elapsed)
+        return elapsed
+
+    def stats(self) -> dict[str, Any]:
+        restores = self.restore_ms
+        return {
+            "template": self.template,
+            "snapshot_ms": round(self.snapshot_ms, 1),
+            "restores": len(restores),
+            "mean_restore_ms": round(sum(restores) / len(restores), 1) if restores else 0.0,
+        }
+
+
+def split_stateful(cases: Sequence[Any]) -> tuple[list[Any], list[Any]]:
+    """``cases`` as (stateless, stateful), keeping their order."""
+    return (
+        [case for case in cases if not is_stateful(case.id)],
+        [case for case in cases if is_stateful(case.id)],
+    )
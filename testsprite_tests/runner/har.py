@@ -0,0 +1,386 @@
+"""Record each test's network traffic as HAR and replay it offline.
+
+Authenticated tests spend most of their time waiting on ``*.supabase.co``,
+YouTube, Bunny and gamemonetize, and none of them can run without a
+network. ``--har record`` captures every response a test's contexts receive
+into ``tmp/har/<TC>.har``; ``--har replay`` answers every request from that
+recording and aborts whatever it does not contain, so nothing leaves the
+machine.
+
+A recording is two files. ``<TC>.har`` is a HAR 1.2 log whose response
+bodies are not inlined but point (``_file``, ``_offset``) into
+``<TC>.bodies``, where each distinct body is stored once. For replay,
+:class:`HarStore` indexes the entries by request key and memory-maps the
+bodies, so serving a response is a dict lookup and a slice.
+
+A request key is the method and the URL, with the run's base URL replaced
+by a placeholder (a recording made against production replays against
+``--serve``), the query sorted and volatile parameters dropped
+(:attr:`HarMatching.ignore_params`), plus the headers named in
+:attr:`HarMatching.match_headers`. Bearer tokens are matched, and stored,
+by their ``role`` and ``sub`` claims only, so an anonymous request and the
+signed-in user's request to the same URL get their own responses, yet a
+fresh login still matches. Requests sharing a key get the recorded
+responses in order (the one with the same body first), then the last one
+again.
+
+Recording and replay both log in through each script's own steps, so the
+login traffic is part of the recording, and block service workers, so
+every request is routed. Replayed sessions get a fresh ``expires_at``, or
+the app would try to refresh them. The recordings hold the test account's
+session tokens; ``tmp/har/`` is ignored by git.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import mmap
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from playwright.async_api import BrowserContext, Error, Request, Route
+
+from .loader import TMP_DIR
+from .results import TestResult
+
+HAR_DIR = TMP_DIR / "har"
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+# Cache busters and client-side timestamps.
+DEFAULT_IGNORED_PARAMS = frozenset({"_", "t", "ts", "timestamp", "cb", "cachebust", "nocache", "rnd", "nonce"})
+DEFAULT_MATCH_HEADERS = ("authorization",)
+
+# Never written to a recording.
+REDACTED_HEADERS = frozenset({"cookie", "set-cookie"})
+# Their request bodies carry the password.
+_AUTH_PATH = "/auth/v1/token"
+# The body is replayed decoded, whatever the recorded response said.
+_DROPPED_RESPONSE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+MISSED_URLS = 10
+
+
+def token_claims(value: str) -> str:
+    """``Bearer <jwt>`` as ``Bearer role=<role> sub=<sub>``; anything else as is."""
+    scheme, _, token = value.partition(" ")
+    parts = token.split(".")
+    if scheme.lower() != "bearer" or len(parts) != 3:
+        return value
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except ValueError:
+        return value
+    return f"Bearer role={claims.get('role', '')} sub={claims.get('sub', '')}"
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _digest(data: bytes | None) -> str:
+    return hashlib.sha256(data).hexdigest()[:32] if data else ""
+
+
+@dataclass(frozen=True)
+class HarMatching:
+    """What a replayed request must share with a recorded one."""
+
+    ignore_params: frozenset[str] = DEFAULT_IGNORED_PARAMS
+    match_headers: tuple[str, ...] = DEFAULT_MATCH_HEADERS
+
+    def url(self, url: str, base_url: str) -> str:
+        parts = urlsplit(url)
+        base = _origin(base_url)
+        origin = _origin(url)
+        query = sorted(
+            (name, value.replace(base, "{base}"))
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name not in self.ignore_params
+        )
+        return ("{base}" if origin == base else origin) + parts.path + (f"?{urlencode(query)}" if query else "")
+
+    def key(self, method: str, url: str, headers: dict[str, str], base_url: str) -> str:
+        matched = [f"{name}={token_claims(headers.get(name.lower(), ''))}" for name in self.match_headers]
+        return " ".join([method, self.url(url, base_url), *matched])
+
+
+def _headers(pairs: dict[str, str]) -> list[dict[str, str]]:
+    return [
+        {"name": name, "value": "[redacted]" if name.lower() in REDACTED_HEADERS else token_claims(value)}
+        for name, value in pairs.items()
+    ]
+
+
+def _iso(epoch_ms: float) -> str:
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class HarRecorder:
+    """Captures one test's requests and writes them as ``<label>.har``."""
+
+    def __init__(self, label: str, directory: Path, base_url: str):
+        self.path = directory / f"{label}.har"
+        self.base_url = base_url
+        self._entries: list[tuple[float, dict[str, Any], bytes]] = []
+        self._pending: set[asyncio.Future] = set()
+        self._listeners: list[BrowserContext] = []
+        self._stats: dict[str, Any] = {"mode": RECORD, "entries": 0, "bytes": 0}
+
+    async def install(self, context: BrowserContext) -> None:
+        context.on("requestfinished", self._on_finished)
+        self._listeners.append(context)
+
+    def _on_finished(self, request: Request) -> None:
+        if request.url.startswith("http"):
+            task = asyncio.ensure_future(self._capture(request))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _capture(self, request: Request) -> None:
+        try:
+            response = await request.response()
+            if response is None:
+                return
+            try:
+                body = await response.body()
+            except Error:
+                # Redirects and aborted downloads have none.
+                body = b""
+            request_headers = await request.all_headers()
+            response_headers = await response.all_headers()
+        except Error:
+            # The context closed under it.
+            return
+        timing = request.timing
+        posted = request.post_data_buffer
+        entry = {
+            "startedDateTime": _iso(timing["startTime"]),
+            "time": max(0.0, timing["responseEnd"]),
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "httpVersion": "HTTP/1.1",
+                "cookies": [],
+                "headers": _headers(request_headers),
+                "queryString": [{"name": name, "value": value} for name, value in parse_qsl(urlsplit(request.url).query)],
+                "headersSize": -1,
+                "bodySize": len(posted or b""),
+                "_bodyHash": _digest(posted),
+            },
+            "response": {
+                "status": response.status,
+                "statusText": response.status_text,
+                "httpVersion": "HTTP/1.1",
+                "cookies": [],
+                "headers": _headers(response_headers),
+                "content": {"size": len(body), "mimeType": response_headers.get("content-type", "")},
+                "redirectURL": response_headers.get("location", ""),
+                "headersSize": -1,
+                "bodySize": len(body),
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": max(0.0, timing["responseStart"]), "receive": 0},
+            "_resourceType": request.resource_type,
+        }
+        if posted and _AUTH_PATH not in request.url:
+            entry["request"]["postData"] = {
+                "mimeType": request_headers.get("content-type", ""),
+                "text": posted.decode("utf-8", errors="replace"),
+            }
+        self._entries.append((timing["startTime"], entry, body))
+
+    async def finish(self) -> None:
+        for context in self._listeners:
+            context.remove_listener("requestfinished", self._on_finished)
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        bodies = self.path.with_suffix(".bodies")
+        offsets: dict[str, int] = {}
+        entries = []
+        partial = bodies.with_name(bodies.name + ".tmp")
+        with partial.open("wb") as blob:
+            for _, entry, body in sorted(self._entries, key=lambda item: item[0]):
+                digest = _digest(body)
+                if body and digest not in offsets:
+                    offsets[digest] = blob.tell()
+                    blob.write(body)
+                if body:
+                    entry["response"]["content"].update(_file=bodies.name, _offset=offsets[digest])
+                entries.append(entry)
+            size = blob.tell()
+        os.replace(partial, bodies)
+        log = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "testsprite_tests.runner", "version": "1"},
+                "pages": [],
+                "entries": entries,
+                "_baseUrl": self.base_url,
+            }
+        }
+        partial = self.path.with_name(self.path.name + ".tmp")
+        partial.write_text(json.dumps(log, ensure_ascii=False), encoding="utf-8")
+        os.replace(partial, self.path)
+        self._stats.update(entries=len(entries), bytes=size + self.path.stat().st_size)
+
+    def stats(self) -> dict[str, Any]:
+        return dict(self._stats)
+
+
+@dataclass
+class _Responses:
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    used: list[bool] = field(default_factory=list)
+
+    def take(self, body_hash: str) -> dict[str, Any]:
+        unused = [index for index, used in enumerate(self.used) if not used]
+        same_body = [index for index in unused if body_hash and self.entries[index]["request"]["_bodyHash"] == body_hash]
+        if not (same_body or unused):
+            return self.entries[-1]
+        index = (same_body or unused)[0]
+        self.used[index] = True
+        return self.entries[index]
+
+
+class HarStore:
+    """A recording's entries indexed by request key, its bodies memory-mapped."""
+
+    def __init__(self, path: Path, matching: HarMatching):
+        if not path.exists():
+            raise RuntimeError(f"No HAR recording at {path}; make one with --har record")
+        log = json.loads(path.read_text(encoding="utf-8"))["log"]
+        self.matching = matching
+        self.index: dict[str, _Responses] = {}
+        for entry in log["entries"]:
+            request = entry["request"]
+            headers = {header["name"].lower(): header["value"] for header in request["headers"]}
+            key = matching.key(request["method"], request["url"], headers, log["_baseUrl"])
+            responses = self.index.setdefault(key, _Responses())
+            responses.entries.append(entry)
+            responses.used.append(False)
+        bodies = path.with_suffix(".bodies")
+        self._file = bodies.open("rb") if bodies.exists() else None
+        size = os.fstat(self._file.fileno()).st_size if self._file else 0
+        self._bodies: mmap.mmap | bytes = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def match(self, method: str, url: str, headers: dict[str, str], body: bytes | None, base_url: str) -> dict[str, Any] | None:
+        responses = self.index.get(self.matching.key(method, url, headers, base_url))
+        return responses.take(_digest(body)) if responses else None
+
+    def body(self, entry: dict[str, Any]) -> bytes:
+        content = entry["response"]["content"]
+        if "_offset" not in content:
+            return b""
+        return bytes(self._bodies[content["_offset"]:content["_offset"] + content["size"]])
+
+    def close(self) -> None:
+        if isinstance(self._bodies, mmap.mmap):
+            self._bodies.close()
+        if self._file:
+            self._file.close()
+
+
+def _fresh_session(body: bytes) -> bytes:
+    """A replayed token response, expiring ``expires_in`` from now."""
+    try:
+        session = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(session, dict) or "expires_in" not in session:
+        return body
+    session["expires_at"] = int(time.time()) + int(session["expires_in"])
+    return json.dumps(session).encode("utf-8")
+
+
+class HarReplayer:
+    """Serves one test's requests from ``<label>.har`` and aborts the rest."""
+
+    def __init__(self, label: str, directory: Path, base_url: str, matching: HarMatching):
+        self.path = directory / f"{label}.har"
+        self.base_url = base_url
+        self.matching = matching
+        self.served = 0
+        self.missed: list[str] = []
+        self._store: HarStore | None = None
+
+    async def install(self, context: BrowserContext) -> None:
+        if self._store is None:
+            self._store = HarStore(self.path, self.matching)
+        await context.route("**/*", self._route)
+
+    async def _route(self, route: Route) -> None:
+        request = route.request
+        headers = await request.all_headers()
+        entry = self._store.match(request.method, request.url, headers, request.post_data_buffer, self.base_url)
+        if entry is None:
+            self.missed.append(f"{request.method} {request.url}")
+            await route.abort("internetdisconnected")
+            return
+        response = entry["response"]
+        body = self._store.body(entry)
+        if _AUTH_PATH in request.url:
+            body = _fresh_session(body)
+        self.served += 1
+        await route.fulfill(
+            status=response["status"],
+            headers={
+                header["name"]: header["value"]
+                for header in response["headers"]
+                if header["name"].lower() not in _DROPPED_RESPONSE_HEADERS | REDACTED_HEADERS
+            },
+            body=body,
+        )
+
+    async def finish(self) -> None:
+        if self._store:
+            self._store.close()
+            self._store = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": REPLAY,
+            "served": self.served,
+            "missed": len(self.missed),
+            "missed_urls": self.missed[:MISSED_URLS],
+        }
+
+
+@dataclass(frozen=True)
+class HarMode:
+    """``record`` or ``replay`` every test under ``directory``."""
+
+    mode: str
+    directory: Path = HAR_DIR
+    matching: HarMatching = HarMatching()
+
+    def __post_init__(self) -> None:
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown HAR mode {self.mode!r}; expected one of {', '.join(MODES)}")
+
+    def session(self, label: str, base_url: str) -> HarRecorder | HarReplayer:
+        if self.mode == RECORD:
+            return HarRecorder(label, self.directory, base_url)
+        return HarReplayer(label, self.directory, base_url, self.matching)
+
+
+def har_totals(results: Sequence[TestResult]) -> dict[str, int]:
+    """Entries and bytes recorded, or responses served and requests missed, across the run."""
+    totals: dict[str, int] = {}
+    for result in results:
+        for key, value in result.extra.get("har", {}).items():
+            if isinstance(value, int):
+                totals[key] = totals.get(key, 0) + value
+    return totals
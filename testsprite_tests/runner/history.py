@@ -0,0 +1,364 @@
+"""Run history in SQLite: one row per test per run, with flake statistics.
+
+``tmp/test_results.json`` holds only TestSprite's latest round and embeds
+every script's full source in each entry, so comparing rounds (5.6% to 37%
+in the MCP report) was done by hand. :class:`HistoryStore` keeps every run
+of the runner, and any imported TestSprite round, in ``tmp/history.sqlite3``:
+
+* ``runs``: one row per run, with the commit it ran on;
+* ``results``: one row per test, variant and run, indexed by test id and
+  status (and, through ``runs``, by commit);
+* ``code``: each script version once, keyed by its SHA-256, which results
+  refer to.
+
+A test is *transient* when, over its recent results on the current version
+of its script, it both passes and fails and its failures are scattered
+rather than clustered: a Wald-Wolfowitz runs test does not find
+significantly fewer pass/fail runs than chance would give. A regression
+shows up as one block of failures and is never quarantined. Quarantined
+tests still run; ``--quarantine`` stops their failures failing the run.
+
+``python -m testsprite_tests.runner.history`` lists runs, flaky tests and a
+test's duration trend, and imports ``test_results.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import sqlite3
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from .impact import REPO_ROOT
+from .loader import TMP_DIR, discover
+from .results import FAILED, PASSED, SKIPPED, RunReport
+
+HISTORY_PATH = TMP_DIR / "history.sqlite3"
+TESTSPRITE_RESULTS = TMP_DIR / "test_results.json"
+
+# Recent results per test that the flake statistics look at.
+WINDOW = 30
+MIN_RUNS = 8
+MIN_FAILURES = 2
+MAX_FAILURE_RATE = 0.5
+# One-sided 5% level: fewer runs than this means the failures cluster.
+CLUSTER_Z = -1.645
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT,
+    commit_sha TEXT,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    base_url TEXT,
+    wall_ms REAL
+);
+CREATE TABLE IF NOT EXISTS code (
+    hash TEXT PRIMARY KEY,
+    source TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs (id),
+    test_id TEXT NOT NULL,
+    variant TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    error TEXT NOT NULL DEFAULT '',
+    started TEXT NOT NULL,
+    duration_ms REAL,
+    code_hash TEXT REFERENCES code (hash),
+    PRIMARY KEY (run_id, test_id, variant)
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (test_id, variant, started);
+CREATE INDEX IF NOT EXISTS results_by_status ON results (status, test_id);
+CREATE INDEX IF NOT EXISTS runs_by_commit ON runs (commit_sha);
+"""
+
+_MAX_ERROR = 2000
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def current_commit() -> tuple[str | None, bool]:
+    """HEAD's SHA and whether the work tree has uncommitted changes."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return sha, bool(status.strip())
+
+
+def variant_of(extra: dict[str, Any]) -> str:
+    """A result's engine and/or device; desktop Chromium is ``''``."""
+    variant = extra.get("variant") or "/".join(
+        part for part in (extra.get("engine", ""), extra.get("device", "")) if part
+    )
+    return "" if variant == "chromium" else variant
+
+
+def runs_test_z(outcomes: Sequence[bool]) -> float:
+    """Wald-Wolfowitz z score of the pass/fail sequence ``outcomes``.
+
+    Negative when passes and failures cluster into fewer runs than a random
+    order would give; ``inf`` when there is only one kind of outcome.
+    """
+    passes = sum(outcomes)
+    failures = len(outcomes) - passes
+    if not passes or not failures:
+        return math.inf
+    total = passes + failures
+    runs = 1 + sum(a != b for a, b in zip(outcomes, outcomes[1:]))
+    expected = 1 + 2 * passes * failures / total
+    variance = 2 * passes * failures * (2 * passes * failures - total) / (total ** 2 * (total - 1))
+    return (runs - expected) / math.sqrt(variance) if variance > 0 else 0.0
+
+
+def flake_verdict(outcomes: Sequence[bool]) -> dict[str, Any]:
+    """Flake statistics of ``outcomes`` (oldest first, ``True`` = passed)."""
+    failures = outcomes.count(False)
+    flips = sum(a != b for a, b in zip(outcomes, outcomes[1:]))
+    z = runs_test_z(outcomes)
+    first_failure = outcomes.index(False) if failures else len(outcomes)
+    recovered = any(outcomes[first_failure:])
+    transient = (
+        len(outcomes) >= MIN_RUNS
+        and failures >= MIN_FAILURES
+        and failures / len(outcomes) <= MAX_FAILURE_RATE
+        and recovered
+        and z > CLUSTER_Z
+    )
+    return {
+        "runs": len(outcomes),
+        "failures": failures,
+        "failure_rate": round(failures / len(outcomes), 3) if outcomes else 0.0,
+        "flip_rate": round(flips / (len(outcomes) - 1), 3) if len(outcomes) > 1 else 0.0,
+        "runs_z": round(z, 2) if math.isfinite(z) else None,
+        "transient": transient,
+    }
+
+
+class HistoryStore:
+    """The run-history database; one connection, used from one thread."""
+
+    def __init__(self, path: Path = HISTORY_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _code(self, source: str) -> str:
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.db.execute("INSERT OR IGNORE INTO code (hash, source) VALUES (?, ?)", (digest, source))
+        return digest
+
+    def _insert_run(self, run: dict[str, Any], rows: Iterable[tuple]) -> int:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO runs (id, source, started, finished, commit_sha, dirty, base_url, wall_ms)"
+                " VALUES (:id, :source, :started, :finished, :commit_sha, :dirty, :base_url, :wall_ms)",
+                run,
+            )
+            cursor = self.db.executemany(
+                "INSERT OR REPLACE INTO results"
+                " (run_id, test_id, variant, status, error, started, duration_ms, code_hash)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return cursor.rowcount
+
+    def record(self, report: RunReport, run_id: str, *, source: str = "runner", base_url: str = "") -> int:
+        """Store ``report`` as run ``run_id``; returns the result rows written."""
+        sha, dirty = current_commit()
+        scripts = {case.id: case.path for case in discover()} if source == "runner" else {}
+        hashes = {
+            test_id: self._code(path.read_text(encoding="utf-8"))
+            for test_id, path in scripts.items()
+            if any(result.id == test_id for result in report.results)
+        }
+        run = {
+            "id": run_id, "source": source, "started": report.started, "finished": report.finished,
+            "commit_sha": sha, "dirty": int(dirty), "base_url": base_url, "wall_ms": round(report.wall_ms, 1),
+        }
+        rows = [
+            (
+                run_id, result.id, variant_of(result.extra), result.status, result.error[:_MAX_ERROR],
+                result.started or report.started, round(result.duration_ms, 1), hashes.get(result.id),
+            )
+            for result in report.results
+        ]
+        return self._insert_run(run, rows)
+
+    def import_testsprite(self, path: Path = TESTSPRITE_RESULTS) -> str | None:
+        """Store a TestSprite ``test_results.json`` round once; returns its run id."""
+        entries = json.loads(path.read_text(encoding="utf-8"))
+        if not entries:
+            return None
+        finished = max(entry["modified"] for entry in entries)
+        run_id = f"testsprite-{finished}"
+        if self.db.execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone():
+            return run_id
+        rows = []
+        for entry in entries:
+            elapsed = _parse_time(entry["modified"]) - _parse_time(entry["created"])
+            rows.append((
+                run_id, entry["title"].split("-", 1)[0], "", entry["testStatus"],
+                (entry.get("testError") or "")[:_MAX_ERROR], entry["created"],
+                round(elapsed.total_seconds() * 1000, 1), self._code(entry["code"]) if entry.get("code") else None,
+            ))
+        run = {
+            "id": run_id, "source": "testsprite", "started": min(entry["created"] for entry in entries),
+            "finished": finished, "commit_sha": None, "dirty": 0, "base_url": None, "wall_ms": None,
+        }
+        self._insert_run(run, rows)
+        return run_id
+
+    def runs(self, limit: int = 20) -> list[dict[str, Any]]:
+        """The latest runs with their pass rates, newest first."""
+        rows = self.db.execute(
+            """
+            SELECT runs.id, runs.source, runs.started, runs.commit_sha, runs.dirty,
+                   COUNT(*) AS total,
+                   SUM(results.status = ?) AS passed,
+                   SUM(results.status = ?) AS failed
+            FROM runs JOIN results ON results.run_id = runs.id
+            GROUP BY runs.id ORDER BY runs.started DESC LIMIT ?
+            """,
+            (PASSED, FAILED, limit),
+        ).fetchall()
+        return [{**dict(row), "pass_rate": round(row["passed"] / row["total"], 3)} for row in rows]
+
+    def _recent(self, test_ids: Sequence[str] | None, variant: str, window: int) -> dict[str, list[sqlite3.Row]]:
+        """Per test, its last ``window`` runner results on its current script, oldest first."""
+        where = "" if test_ids is None else f" AND test_id IN ({', '.join('?' * len(test_ids))})"
+        rows = self.db.execute(
+            f"""
+            SELECT test_id, status, duration_ms, code_hash, started FROM (
+                SELECT results.*, ROW_NUMBER() OVER (PARTITION BY test_id ORDER BY results.started DESC) AS age
+                FROM results JOIN runs ON runs.id = results.run_id
+                WHERE runs.source = 'runner' AND variant = ? AND status != ?{where}
+            ) WHERE age <= ? ORDER BY test_id, age
+            """,
+            (variant, SKIPPED, *(test_ids or ()), window),
+        ).fetchall()
+        recent: dict[str, list[sqlite3.Row]] = {}
+        for row in rows:
+            history = recent.setdefault(row["test_id"], [])
+            # Newest first here; an edited script starts its history afresh.
+            if not history or row["code_hash"] == history[0]["code_hash"]:
+                history.append(row)
+        return {test_id: history[::-1] for test_id, history in recent.items()}
+
+    def flake_stats(
+        self, test_ids: Sequence[str] | None = None, *, variant: str = "", window: int = WINDOW
+    ) -> dict[str, dict[str, Any]]:
+        """Flake statistics per test over its recent runs; see :func:`flake_verdict`."""
+        stats = {}
+        for test_id, history in self._recent(test_ids, variant, window).items():
+            durations = [row["duration_ms"] for row in history if row["duration_ms"]]
+            stats[test_id] = {
+                **flake_verdict([row["status"] == PASSED for row in history]),
+                "median_ms": round(statistics.median(durations), 1) if durations else None,
+                "last_status": history[-1]["status"],
+            }
+        return stats
+
+    def quarantined(self, test_ids: Sequence[str] | None = None, *, variant: str = "") -> list[str]:
+        """Tests whose recent failures look transient."""
+        stats = self.flake_stats(test_ids, variant=variant)
+        return sorted(test_id for test_id, verdict in stats.items() if verdict["transient"])
+
+    def median_durations(self, test_ids: Sequence[str], window: int = 5) -> dict[str, float]:
+        """Median seconds of each test's last ``window`` desktop runs."""
+        return {
+            test_id: statistics.median(row["duration_ms"] for row in history) / 1000
+            for test_id, history in self._recent(test_ids, "", window).items()
+            if history
+        }
+
+    def duration_trend(self, test_id: str, *, variant: str = "", limit: int = 20) -> list[dict[str, Any]]:
+        """``test_id``'s latest results, newest first, with the commit each ran on."""
+        rows = self.db.execute(
+            """
+            SELECT results.started, results.status, results.duration_ms, runs.commit_sha, runs.source,
+                   substr(results.code_hash, 1, 12) AS code
+            FROM results JOIN runs ON runs.id = results.run_id
+            WHERE results.test_id = ? AND results.variant = ?
+            ORDER BY results.started DESC LIMIT ?
+            """,
+            (test_id.upper(), variant, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m testsprite_tests.runner.history",
+        description="Query the run history in tmp/history.sqlite3.",
+    )
+    parser.add_argument("--db", type=Path, default=HISTORY_PATH, help="history database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs = commands.add_parser("runs", help="latest runs and their pass rates")
+    runs.add_argument("-n", type=int, default=20, help="how many (default: %(default)s)")
+    flakes = commands.add_parser("flakes", help="tests that both passed and failed recently")
+    flakes.add_argument("--variant", default="", help="engine/device variant (default: desktop Chromium)")
+    trend = commands.add_parser("trend", help="a test's recent durations")
+    trend.add_argument("test", metavar="TC")
+    trend.add_argument("-n", type=int, default=20, help="how many (default: %(default)s)")
+    imported = commands.add_parser("import", help="store a TestSprite test_results.json round")
+    imported.add_argument("path", type=Path, nargs="?", default=TESTSPRITE_RESULTS)
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.db) as store:
+        if args.command == "runs":
+            for run in store.runs(args.n):
+                commit = (run["commit_sha"] or "-")[:10] + ("+" if run["dirty"] else "")
+                print(
+                    f"{run['started']}  {run['source']:<10} {commit:<11} {run['passed']:>3}/{run['total']:<3}"
+                    f" {run['pass_rate']:6.1%}  {run['id']}"
+                )
+        elif args.command == "flakes":
+            for test_id, stats in store.flake_stats(variant=args.variant).items():
+                if stats["failures"] and stats["failures"] < stats["runs"]:
+                    print(
+                        f"{test_id}  {stats['failures']}/{stats['runs']} failed, flips {stats['flip_rate']:.0%},"
+                        f" runs z {stats['runs_z']}{'  QUARANTINED' if stats['transient'] else ''}"
+                    )
+        elif args.command == "trend":
+            for row in store.duration_trend(args.test, limit=args.n):
+                print(
+                    f"{row['started']}  {row['status']:<7} {(row['duration_ms'] or 0) / 1000:7.1f}s"
+                    f"  {(row['commit_sha'] or '-')[:10]}  {row['code'] or '-'}  {row['source']}"
+                )
+        else:
+            print(f"Imported {args.path} as {store.import_testsprite(args.path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
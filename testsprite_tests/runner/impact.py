@@ -0,0 +1,227 @@
+"""Select the TC scripts affected by a git diff.
+
+Changed files are mapped to routes and routes to tests:
+
+* ``tmp/code_summary.yaml`` gives the page file behind every route;
+* any other file under ``src/`` reaches routes through the reverse import
+  graph, stopping at routed pages. A file that reaches ``App.tsx`` or
+  ``main.tsx`` without passing through a page is global and selects
+  everything, as do build and deployment files;
+* a test visits the routes it navigates to or asserts in its URL, in the
+  script or the plan, plus the routes of the code-summary feature that
+  matches its plan category.
+"""
+
+from __future__ import annotations
+
+import ast
+import fnmatch
+import re
+import subprocess
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Sequence
+from urllib.parse import urlparse
+
+import yaml
+
+from .loader import TESTS_DIR, TMP_DIR, TestCase, parse
+from .plan import load_plan
+
+REPO_ROOT = TESTS_DIR.parent
+SRC_DIR = REPO_ROOT / "src"
+CODE_SUMMARY = TMP_DIR / "code_summary.yaml"
+
+ENTRY_FILES = frozenset({"src/App.tsx", "src/main.tsx"})
+
+# Changes to these select every test.
+GLOBAL_PATTERNS = (
+    "index.html",
+    "package.json",
+    "package-lock.json",
+    "bun.lockb",
+    "vite.config.ts",
+    "vercel.json",
+    "tailwind.config.ts",
+    "postcss.config.js",
+    "tsconfig*.json",
+    "public/*",
+    ".env",
+    "src/*.css",
+)
+
+_IMPORT = re.compile(r"""(?:\bfrom\s*|\bimport\s*\(?\s*)['"]([^'"]+)['"]""")
+_EXTENSIONS = (".tsx", ".ts", ".jsx", ".js")
+_URL_FRAGMENT = re.compile(r"""URL contains "([^"]+)"|Navigate to (/\S*)""")
+
+
+@dataclass(frozen=True)
+class Route:
+    path: str
+    file: str
+
+    @property
+    def pattern(self) -> re.Pattern[str]:
+        regex = re.escape(self.path).replace(r"/\*", "(/.*)?")
+        regex = re.sub(r":\w+", "[^/]+", regex)
+        return re.compile(f"^{regex}/?$")
+
+    def matches(self, path: str) -> bool:
+        return bool(self.pattern.match(path))
+
+
+@lru_cache(maxsize=None)
+def _summary(path: Path = CODE_SUMMARY) -> dict:
+    return yaml.safe_load(path.read_text(encoding="utf-8"))
+
+
+def load_routes() -> list[Route]:
+    return [Route(entry["path"], entry["file"]) for entry in _summary()["routes"]]
+
+
+def _resolve(importer: Path, specifier: str) -> Path | None:
+    if specifier.startswith("@/"):
+        base = SRC_DIR / specifier[2:]
+    elif specifier.startswith("."):
+        base = importer.parent / specifier
+    else:
+        return None
+    candidates = [base] if base.suffix in _EXTENSIONS else []
+    candidates += [base.with_name(base.name + extension) for extension in _EXTENSIONS]
+    candidates += [base / f"index{extension}" for extension in _EXTENSIONS]
+    return next((candidate.resolve() for candidate in candidates if candidate.is_file()), None)
+
+
+def _relative(path: Path) -> str:
+    return path.resolve().relative_to(REPO_ROOT).as_posix()
+
+
+def import_graph() -> dict[str, set[str]]:
+    """Reverse import graph of ``src/``: file -> files importing it."""
+    importers: dict[str, set[str]] = {}
+    for path in SRC_DIR.rglob("*"):
+        if path.suffix not in _EXTENSIONS:
+            continue
+        source = path.read_text(encoding="utf-8", errors="replace")
+        for specifier in _IMPORT.findall(source):
+            target = _resolve(path, specifier)
+            if target is not None:
+                importers.setdefault(_relative(target), set()).add(_relative(path))
+    return importers
+
+
+def routes_for_file(changed: str, routes: Sequence[Route], importers: dict[str, set[str]]) -> set[str] | None:
+    """Route paths ``changed`` can affect; ``None`` means every route."""
+    if any(fnmatch.fnmatch(changed, pattern) for pattern in GLOBAL_PATTERNS):
+        return None
+    if not changed.startswith("src/"):
+        return set()
+    by_file = {route.file: route.path for route in routes}
+    affected: set[str] = set()
+    # Walk importers, remembering whether the chain went through a page:
+    # App.tsx imports every page, which does not make a page change global.
+    seen = {(changed, False)}
+    pending = [(changed, False)]
+    while pending:
+        current, via_page = pending.pop()
+        if current in by_file:
+            affected.add(by_file[current])
+            continue
+        if current in ENTRY_FILES:
+            if via_page:
+                continue
+            return None
+        via_page = via_page or current.startswith("src/pages/")
+        for importer in importers.get(current, ()):
+            if (importer, via_page) not in seen:
+                seen.add((importer, via_page))
+                pending.append((importer, via_page))
+    return affected
+
+
+def _feature_routes(category: str, routes: Sequence[Route]) -> set[str]:
+    name = category.split("(", 1)[0].strip().lower()
+    paths = set()
+    for feature in _summary().get("features", []):
+        if feature["name"].lower() != name:
+            continue
+        if feature.get("entry_route"):
+            paths.add(feature["entry_route"])
+        files = set(feature.get("files", []))
+        paths.update(route.path for route in routes if route.file in files)
+    return paths
+
+
+def visited_paths(case: TestCase, routes: Sequence[Route]) -> set[str]:
+    """URL paths ``case`` visits, from its script and its plan entry."""
+    paths: set[str] = set()
+    for node in _string_constants(case):
+        if node.startswith("http"):
+            url = urlparse(node)
+            # Every script first opens TestSprite's localhost tunnel; only
+            # the deployed host's paths are real visits.
+            if url.hostname not in ("localhost", "127.0.0.1"):
+                paths.add(url.path or "/")
+        elif node.startswith("/") and not node.startswith("/html"):
+            paths.add(node)
+    plan_case = load_plan().get(case.id)
+    if plan_case:
+        for step in plan_case.steps:
+            for match in _URL_FRAGMENT.finditer(step.description):
+                paths.add(match.group(1) or match.group(2))
+        paths |= _feature_routes(plan_case.category, routes)
+    return paths
+
+
+def _string_constants(case: TestCase) -> Iterable[str]:
+    for node in ast.walk(parse(case)):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            yield node.value
+
+
+def tests_for_routes(cases: Sequence[TestCase], route_paths: set[str], routes: Sequence[Route]) -> list[TestCase]:
+    by_path = {route.path: route for route in routes}
+    selected = []
+    for case in cases:
+        visited = visited_paths(case, routes)
+        for route_path in route_paths:
+            route = by_path.get(route_path)
+            if route_path in visited or (route and any(route.matches(path) for path in visited)):
+                selected.append(case)
+                break
+    return selected
+
+
+def changed_files(base: str = "HEAD") -> list[str]:
+    """Files changed since ``base``, including uncommitted and untracked ones."""
+    def git(*args: str) -> list[str]:
+        output = subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        return [line for line in output.splitlines() if line]
+
+    return sorted(set(git("diff", "--name-only", base)) | set(git("ls-files", "--others", "--exclude-standard")))
+
+
+def select_affected(cases: Sequence[TestCase], changed: Iterable[str]) -> list[TestCase]:
+    """The subset of ``cases`` affected by the ``changed`` repo paths."""
+    routes = load_routes()
+    importers = import_graph()
+    by_name = {case.path.name: case for case in cases}
+    direct: set[TestCase] = set()
+    route_paths: set[str] = set()
+    for path in changed:
+        if path.startswith("testsprite_tests/runner/"):
+            return list(cases)
+        if path.startswith("testsprite_tests/"):
+            case = by_name.get(Path(path).name)
+            if case:
+                direct.add(case)
+            continue
+        affected = routes_for_file(path, routes, importers)
+        if affected is None:
+            return list(cases)
+        route_paths |= affected
+    selected = set(tests_for_routes(cases, route_paths, routes)) | direct
+    return [case for case in cases if case in selected]
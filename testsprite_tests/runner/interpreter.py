@@ -0,0 +1,538 @@
+"""Run ``testsprite_frontend_test_plan.json`` directly, without the scripts.
+
+Only 39 of the plan's 54 cases have generated scripts, and each script
+repeats its own browser setup. Here every plan step is compiled once into an
+:class:`Op` (cached per case) and the ops run on pooled browsers from a
+single process.
+
+Steps are English sentences from a small grammar ("Navigate to /x",
+"Click the \\"Y\\" button", "Verify URL contains \\"/z\\"" ...). English UI
+labels are matched together with their Portuguese equivalents. A case with a
+step outside the grammar is reported as SKIPPED with that step, rather than
+run half way.
+
+29 of the 54 cases compile. The other 25 are skipped because their steps
+name an element the UI does not show, and a rule for them would have to
+guess at the app's markup or data.
+
+Fourteen check for an element by an English description, such as
+"Hero section" or "video player", rather than by text the Portuguese UI
+shows. Only element names with an alias in :data:`LABEL_ALIASES` or a
+selector in :data:`ELEMENTS` compile:
+
+* TC001, TC005: "Hero section", "Primary call-to-action button";
+* TC002, TC005: "Offer section";
+* TC003: "Games carousel" and the game cards before and after;
+* TC004: "Final purchase button";
+* TC011, TC013: "Story title", "Story card";
+* TC016, TC017: "video list", "category filter", "video player",
+  "player controls";
+* TC031, TC032: "Mission steps", "Progress", "Missions list", "Mission";
+* TC036, TC037, TC040: "Devotional section title" / "content".
+
+The other eleven pick an element the plan does not name at all:
+
+* TC006, TC009: "at least one subscription plan option" / "benefit item" is
+  visible, with no label to look for;
+* TC007: "Scroll to the subscription plans section", a section with no label;
+* TC014: a story card "near the bottom of the list", chosen by position;
+* TC018, TC021: "a different" category, or one "that results in no videos",
+  which depends on the catalogue's contents;
+* TC019, TC020: a video card in an error state "(if present)", which a run
+  cannot bring about, so the case would pass without testing anything;
+* TC029, TC030: "the first incomplete mission step", which depends on the
+  shared account's progress;
+* TC052: a "Visibility"/"Published" toggle; the only one is the games
+  list's unlabelled switch, whose states read "Visível"/"Oculto".
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from playwright.async_api import Locator, Page, expect
+
+from .artifacts import ARTIFACTS_DIR, ArtifactRecorder, artifact_totals
+from .auth import AuthCache, login
+from .blocking import PROFILES, Blocker, ResourceSizes, bytes_saved, profile_for
+from .clock import TimeTravel, advance_days
+from .config import BASE_URL, LOGIN_EMAIL, LOGIN_PASSWORD
+from .contexts import ContextPool
+from .events import EventFeed
+from .plan import PlanCase, load_plan
+from .pool import BrowserPool
+from .results import FAILED, PASSED, SKIPPED, RunReport, TestResult, describe_error, utc_now
+from .steps import TRACES_DIR, StepTrace, slowest_steps, step_totals
+from .suite import DEFAULT_TEST_TIMEOUT
+from .testdata import ContentTagger, new_run_id
+
+log = logging.getLogger(__name__)
+
+STEP_TIMEOUT_MS = 10000
+
+PLACEHOLDERS = {"{{LOGIN_USER}}": LOGIN_EMAIL, "{{LOGIN_PASSWORD}}": LOGIN_PASSWORD}
+
+# Plan labels are English; the app is in Brazilian Portuguese.
+LABEL_ALIASES = {
+    "back": ("Voltar",),
+    "cancel": ("Cancelar",),
+    "create": ("Criar", "Nova"),
+    "delete": ("Excluir", "Apagar"),
+    "devotional": ("Devocional", "Orações"),
+    "edit": ("Editar",),
+    "favorites": ("Favoritos",),
+    "games": ("Jogos",),
+    "generate": ("Gerar", "Criar"),
+    "home": ("Início",),
+    "login": ("Entrar",),
+    "missions": ("Missões",),
+    "new": ("Nova", "Novo"),
+    "new story": ("Nova História",),
+    "next": ("Próximo", "Próxima"),
+    "pause": ("Pausar",),
+    "prayer": ("Oração", "Orações"),
+    "previous": ("Anterior",),
+    "retry": ("Tentar novamente",),
+    "save": ("Salvar",),
+    "save to favorites": ("Favoritar", "Salvar nos favoritos"),
+    "sign in": ("Entrar",),
+    "start": ("Começar", "Jogar", "Iniciar"),
+    "stories": ("Histórias",),
+    "subscribe": ("Assinar",),
+    "verse": ("Versículo",),
+    "videos": ("Vídeos",),
+}
+
+FIELDS = {
+    "email": "input[type=email]",
+    "email/username": "input[type=email]",
+    "password": "input[type=password]",
+}
+
+FIELD_LABELS = {"child name": "nome"}
+
+SCOPES = {"main navigation": "nav", "admin sidebar": "aside"}
+
+# Plan element names that are descriptions, not UI text, but have a selector.
+ELEMENTS = {"admin sidebar": "aside"}
+
+_QUOTED = re.compile(r'"([^"]*)"')
+
+
+def _labels(text: str) -> list[str]:
+    """Every quoted label in ``text`` plus its Portuguese aliases."""
+    labels = []
+    for label in _QUOTED.findall(text):
+        labels.append(label)
+        labels.extend(LABEL_ALIASES.get(label.lower(), ()))
+    return labels
+
+
+def _name_pattern(labels: Sequence[str]) -> re.Pattern[str]:
+    return re.compile("|".join(re.escape(label) for label in labels), re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Op:
+    """One compiled plan step."""
+
+    kind: str
+    description: str
+    args: tuple = ()
+
+
+def _clickable(root: Page | Locator, labels: Sequence[str]) -> Locator:
+    name = _name_pattern(labels)
+    return (
+        root.get_by_role("button", name=name)
+        .or_(root.get_by_role("link", name=name))
+        .or_(root.get_by_text(name))
+        .first
+    )
+
+
+async def _goto(page: Page, base_url: str, path: str) -> None:
+    await page.goto(f"{base_url}{path}", wait_until="domcontentloaded")
+
+
+async def _fill(page: Page, base_url: str, field: str, value: str) -> None:
+    if field in FIELDS:
+        target = page.locator(FIELDS[field])
+    else:
+        label = re.compile(FIELD_LABELS.get(field, re.escape(field)), re.IGNORECASE)
+        target = page.get_by_label(label).or_(page.get_by_placeholder(label))
+    await target.first.fill(value)
+
+
+async def _click(page: Page, base_url: str, labels: tuple[str, ...], scope: str | None) -> None:
+    root = page.locator(scope).first if scope else page
+    await _clickable(root, labels).click()
+
+
+async def _click_first(page: Page, base_url: str) -> None:
+    await page.locator("main").locator("a[href], button, [role=button]").first.click()
+
+
+async def _expect_url(page: Page, base_url: str, fragments: tuple[str, ...]) -> None:
+    await expect(page).to_have_url(_name_pattern(fragments))
+
+
+async def _expect_text(page: Page, base_url: str, labels: tuple[str, ...], visible: bool) -> None:
+    target = page.get_by_text(_name_pattern(labels)).first
+    if visible:
+        await expect(target).to_be_visible()
+    else:
+        await expect(target).not_to_be_visible()
+
+
+async def _expect_element(page: Page, base_url: str, labels: tuple[str, ...]) -> None:
+    name = _name_pattern(labels)
+    target = page.get_by_role("region", name=name).or_(page.get_by_role("heading", name=name)).or_(
+        _clickable(page, labels)
+    )
+    await expect(target.first).to_be_visible()
+
+
+async def _expect_selector(page: Page, base_url: str, selector: str) -> None:
+    await expect(page.locator(selector).first).to_be_visible()
+
+
+async def _scroll(page: Page, base_url: str, labels: tuple[str, ...], where: str) -> None:
+    if labels:
+        await page.get_by_text(_name_pattern(labels)).first.scroll_into_view_if_needed()
+    else:
+        await page.evaluate("y => window.scrollTo(0, y)", 0 if where == "top" else 1_000_000)
+
+
+async def _login(page: Page, base_url: str) -> None:
+    await login(page)
+
+
+async def _await_session(page: Page, base_url: str) -> None:
+    await page.wait_for_url(lambda url: "/home" in url or "/paywall" in url)
+
+
+async def _advance(page: Page, base_url: str, days: float) -> None:
+    # Locks and trial days are computed on mount.
+    await advance_days(page, days)
+    await page.reload(wait_until="domcontentloaded")
+
+
+EXECUTORS: dict[str, Callable[..., object]] = {
+    "goto": _goto,
+    "fill": _fill,
+    "click": _click,
+    "click_first": _click_first,
+    "expect_url": _expect_url,
+    "expect_text": _expect_text,
+    "expect_element": _expect_element,
+    "expect_selector": _expect_selector,
+    "scroll": _scroll,
+    "login": _login,
+    "await_session": _await_session,
+    "advance": _advance,
+}
+
+# Step-trace category of each op; the rest are actions.
+STEP_CATEGORIES = {
+    "goto": "navigation",
+    "login": "login",
+    "await_session": "login",
+    "expect_url": "assert",
+    "expect_text": "assert",
+    "expect_element": "assert",
+    "expect_selector": "assert",
+}
+
+
+def compile_step(description: str) -> Op | None:
+    """The op for one step description, or ``None`` if it is not supported."""
+    text = description.strip()
+    for placeholder, value in PLACEHOLDERS.items():
+        text = text.replace(placeholder, value)
+
+    if match := re.fullmatch(r'Navigate to "?(/[^"\s]*)"?', text):
+        return Op("goto", description, (match.group(1),))
+    if match := re.fullmatch(r'Type "([^"]*)" into the (.+?) field', text):
+        return Op("fill", description, (match.group(2), match.group(1)))
+    if match := re.fullmatch(r'Click (?:on )?"[^"]+" in the (main navigation|admin sidebar)', text):
+        return Op("click", description, (tuple(_labels(text)), SCOPES[match.group(1)]))
+    if re.fullmatch(r'Click (?:on )?(?:the )?(?:primary )?"[^"]+"(?:(?: or | / )"[^"]+")*(?: (?:button|control|section button|arrow|game card|call-to-action button)\b.*)?', text):
+        return Op("click", description, (tuple(_labels(text)), None))
+    if re.fullmatch(r"Click on the first (?:visible )?[\w ]+?(?: card| in the [\w ]+ list)", text):
+        return Op("click_first", description)
+    if re.fullmatch(r'Verify URL contains "[^"]+"(?: or "[^"]+")*', text):
+        return Op("expect_url", description, (tuple(_QUOTED.findall(text)),))
+    if match := re.fullmatch(r'Verify text "[^"]+"(?: or "[^"]+")* is (not )?visible', text):
+        return Op("expect_text", description, (tuple(_labels(text)), match.group(1) is None))
+    if re.fullmatch(r'Verify (?:element )?(?:a )?"[^"]+"(?: or "[^"]+")*(?: button| control)? is visible', text):
+        names = [name.lower() for name in _QUOTED.findall(text)]
+        if len(names) == 1 and names[0] in ELEMENTS:
+            return Op("expect_selector", description, (ELEMENTS[names[0]],))
+        # Otherwise only UI labels the app shows in Portuguese; "Hero section"
+        # and the like describe an element and match nothing on the page.
+        if all(name in LABEL_ALIASES for name in names):
+            return Op("expect_element", description, (tuple(_labels(text)),))
+        return None
+    if match := re.fullmatch(r"Verify a (\w+) text block is visible", text):
+        word = match.group(1)
+        return Op("expect_text", description, ((word, *LABEL_ALIASES.get(word, ())), True))
+    if match := re.fullmatch(r"(?:Advance the clock by|Wait) (\d+(?:\.\d+)?) days?", text):
+        return Op("advance", description, (float(match.group(1)),))
+    if re.fullmatch(r'Scroll to the "[^"]+" section', text):
+        return Op("scroll", description, (tuple(_labels(text)), ""))
+    if match := re.fullmatch(r"Scroll (?:back )?to the (bottom|hero section)\b.*", text):
+        return Op("scroll", description, ((), "bottom" if match.group(1) == "bottom" else "top"))
+    return None
+
+
+def _login_span(steps: Sequence[str]) -> tuple[int, int] | None:
+    """``[start, end)`` of "Navigate to /" + shared-account login in ``steps``."""
+    for start, step in enumerate(steps):
+        window = steps[start : start + 4]
+        if (
+            len(window) == 4
+            and re.fullmatch(r'Navigate to "?/"?', window[0])
+            and "{{LOGIN_USER}}" in window[1]
+            and "{{LOGIN_PASSWORD}}" in window[2]
+            and window[3].startswith("Click")
+        ):
+            return start, start + 4
+    return None
+
+
+def uses_shared_login(plan_case: PlanCase) -> bool:
+    return _login_span([step.description for step in plan_case.steps]) is not None
+
+
+def travels(plan_case: PlanCase) -> bool:
+    """Whether ``plan_case`` moves the clock, which rules out shared sessions and warm contexts."""
+    ops = (compile_step(step.description) for step in plan_case.steps)
+    return any(op is not None and op.kind == "advance" for op in ops)
+
+
+@lru_cache(maxsize=None)
+def compile_case(plan_case: PlanCase, cached_login: bool) -> tuple[tuple[Op, ...], tuple[str, ...]]:
+    """Compiled ops and the unsupported step descriptions of ``plan_case``.
+
+    The shared-account login becomes one op: the form login, or with
+    ``cached_login`` a wait for the redirect an injected session triggers.
+    """
+    descriptions = [step.description for step in plan_case.steps]
+    ops: list[Op] = []
+    unsupported: list[str] = []
+    span = _login_span(descriptions)
+    index = 0
+    while index < len(descriptions):
+        if span and index == span[0]:
+            ops.append(Op("goto", descriptions[index], ("/",)))
+            ops.append(Op("await_session" if cached_login else "login", "Log in as the shared account"))
+            index = span[1]
+            continue
+        op = compile_step(descriptions[index])
+        if op is None:
+            unsupported.append(descriptions[index])
+        else:
+            ops.append(op)
+        index += 1
+    return tuple(ops), tuple(unsupported)
+
+
+class PlanRunner:
+    """Executes compiled plan cases on a :class:`BrowserPool`."""
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        *,
+        auth: AuthCache | None = None,
+        base_url: str = BASE_URL,
+        timeout: float = DEFAULT_TEST_TIMEOUT,
+        resources: str = "auto",
+        contexts: ContextPool | None = None,
+        run_id: str | None = None,
+        clock: TimeTravel | None = None,
+        artifacts: Path | None = None,
+        traces: Path | None = None,
+        events: EventFeed | None = None,
+    ):
+        self.pool = pool
+        self.auth = auth
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.resources = resources
+        self.contexts = contexts
+        self.run_id = run_id
+        self.clock = clock
+        self.artifacts = artifacts
+        self.traces = traces
+        self.events = events
+        self.sizes = ResourceSizes()
+
+    def _emit(self, event: str, test_id: str, **fields: Any) -> None:
+        if self.events:
+            self.events.emit(event, test=test_id, **fields)
+
+    async def run_case(self, plan_case: PlanCase) -> TestResult:
+        result = await self._run_case(plan_case, TestResult(plan_case.id, plan_case.title, started=utc_now()))
+        self._emit(
+            "test_finished", result.id, status=result.status, error=result.error,
+            duration_ms=round(result.duration_ms, 1), overhead_ms=round(result.overhead_ms, 1),
+        )
+        return result
+
+    async def _run_case(self, plan_case: PlanCase, result: TestResult) -> TestResult:
+        travelling = self.clock is not None or travels(plan_case)
+        cached_login = self.auth is not None and uses_shared_login(plan_case) and not travelling
+        ops, unsupported = compile_case(plan_case, cached_login)
+        result.extra["source"] = "plan"
+        if unsupported:
+            result.status = SKIPPED
+            result.error = "No interpreter rule for: " + "; ".join(unsupported)
+            return result
+
+        queued = time.perf_counter()
+        context_options = {}
+        try:
+            if cached_login:
+                context_options["storage_state"] = await self.auth.storage_state()
+        except Exception as error:
+            result.status, result.error = FAILED, f"Login failed: {describe_error(error)}"
+            return result
+        profile = profile_for(plan_case.id) if self.resources == "auto" else PROFILES[self.resources]
+        blocker = Blocker(profile, self.base_url, self.sizes)
+        tagger = ContentTagger(self.run_id) if self.run_id else None
+        recorder = ArtifactRecorder(plan_case.id, self.artifacts) if self.artifacts else None
+        steps = None
+        if self.traces:
+            steps = StepTrace(plan_case.id, lambda step: self._emit("step", plan_case.id, **step))
+        async with self.pool.lease() as browser:
+            self._emit("test_started", plan_case.id, title=plan_case.title)
+            warm = self.contexts is not None and not travelling and self.contexts.accepts(browser, context_options)
+            if warm:
+                context = await self.contexts.acquire(browser, context_options)
+            else:
+                context = await browser.new_context(**context_options)
+            context.set_default_timeout(STEP_TIMEOUT_MS)
+            await blocker.install(context)
+            if tagger:
+                await tagger.install(context)
+            if self.clock:
+                await self.clock.install(context)
+            if recorder:
+                await recorder.install(context)
+            started = time.perf_counter()
+            result.overhead_ms = (started - queued) * 1000
+            current = -1
+            try:
+                page = await context.new_page()
+
+                async def execute() -> None:
+                    nonlocal current
+                    for current, op in enumerate(ops):
+                        execution = EXECUTORS[op.kind](page, self.base_url, *op.args)
+                        if steps:
+                            category = STEP_CATEGORIES.get(op.kind, "action")
+                            await steps.step(op.kind, category, current + 1, page, None, execution)
+                        else:
+                            await execution
+
+                await asyncio.wait_for(execute(), self.timeout)
+            except asyncio.TimeoutError:
+                result.status, result.error = FAILED, f"Timed out after {self.timeout:.0f}s"
+            except Exception as error:
+                result.status, result.error = FAILED, describe_error(error)
+                if current >= 0:
+                    result.error = f"Step {current + 1} ({ops[current].description}): {result.error}"
+            finally:
+                result.duration_ms = (time.perf_counter() - started) * 1000
+                if recorder:
+                    artifacts = await recorder.finish(result.status != PASSED)
+                    if artifacts:
+                        result.extra["artifacts"] = artifacts
+                await (self.contexts.release(context) if warm else context.close())
+        result.extra["resources"] = blocker.stats()
+        if steps:
+            result.extra["steps"] = {**steps.stats(), "trace": str(steps.write(self.traces / f"{plan_case.id}.json"))}
+        if tagger and tagger.tagged:
+            result.extra["tagged_rows"] = tagger.tagged
+        log.info("%s %s in %.1fs (plan)", plan_case.id, result.status, result.duration_ms / 1000)
+        return result
+
+    async def run(self, plan_cases: Sequence[PlanCase]) -> RunReport:
+        report = RunReport(started=utc_now(), startup_ms=self.pool.startup_ms)
+        started = time.perf_counter()
+        report.results = list(await asyncio.gather(*(self.run_case(plan_case) for plan_case in plan_cases)))
+        report.wall_ms = (time.perf_counter() - started) * 1000
+        report.finished = utc_now()
+        report.extra["unsupported_cases"] = len(report.skipped)
+        report.extra["bytes_saved"] = bytes_saved(report.results)
+        self.sizes.save()
+        if self.contexts:
+            report.extra["contexts"] = self.contexts.stats()
+        if self.artifacts:
+            report.extra["artifacts"] = artifact_totals(report.results)
+        if self.traces:
+            report.extra["step_ms_by_category"] = step_totals(report.results)
+            report.extra["slowest_steps"] = slowest_steps(report.results)
+        return report
+
+
+def select_plan_cases(test_ids: Sequence[str] | None = None) -> list[PlanCase]:
+    plan = load_plan()
+    if not test_ids:
+        return list(plan.values())
+    missing = [test_id for test_id in test_ids if test_id.upper() not in plan]
+    if missing:
+        raise KeyError(f"Unknown test ids: {', '.join(missing)}")
+    return [plan[test_id.upper()] for test_id in test_ids]
+
+
+async def run_plan(
+    plan_cases: Sequence[PlanCase],
+    *,
+    browsers: int = 4,
+    headless: bool = True,
+    timeout: float = DEFAULT_TEST_TIMEOUT,
+    auth_cache: bool = True,
+    base_url: str = BASE_URL,
+    resources: str = "auto",
+    warm_contexts: bool = True,
+    keep_service_worker: bool = True,
+    run_id: str | None = None,
+    clock_offset: float = 0.0,
+    artifacts: bool = False,
+    step_trace: bool = True,
+    events: Path | None = None,
+) -> RunReport:
+    """Start a pool and run ``plan_cases`` through the interpreter.
+
+    Steps such as "Advance the clock by 8 days" move a case's clock forward;
+    ``clock_offset`` starts every case that many days ahead. ``artifacts``
+    keeps screenshots and traces of the failures; ``step_trace`` times every
+    op of every case. Cases report their progress to the ``events`` stream.
+    """
+    clock = TimeTravel(clock_offset) if clock_offset else None
+    run_name = run_id or new_run_id()
+    artifacts_dir = ARTIFACTS_DIR / run_name if artifacts else None
+    traces_dir = TRACES_DIR / run_name if step_trace else None
+    async with BrowserPool(min(browsers, len(plan_cases)) or 1, headless=headless) as pool:
+        auth = AuthCache(pool, base_url=base_url) if auth_cache else None
+        contexts = ContextPool(base_url, keep_service_worker=keep_service_worker) if warm_contexts else None
+        feed = EventFeed(events) if events else None
+        runner = PlanRunner(
+            pool, auth=auth, base_url=base_url, timeout=timeout, resources=resources, contexts=contexts,
+            run_id=run_id, clock=clock, artifacts=artifacts_dir, traces=traces_dir, events=feed,
+        )
+        try:
+            return await runner.run(plan_cases)
+        finally:
+            if feed:
+                feed.close()
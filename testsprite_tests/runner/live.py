@@ -0,0 +1,271 @@
+"""Markdown and HTML reports rendered from the event stream while a run goes.
+
+:class:`LiveReport` follows :mod:`.events`' stream from a background thread
+and rewrites ``tmp/runner_report.md`` and ``tmp/runner_report.html``
+whenever new events arrive, so a 54-case run can be watched as it goes (the
+HTML page reloads itself until the run finishes) and a crash leaves the
+results so far on disk. Both files are replaced atomically, so a reader
+never sees half a report.
+
+Unlike TestSprite's ``raw_report.md``, whose findings are
+``{{TODO:AI_ANALYSIS}}`` placeholders, each result says where it ended: the
+failing step, its route and selector, or the step a running test is on.
+
+``python -m testsprite_tests.runner.live`` renders an existing stream, for
+example the one a crashed run left behind, or follows it with ``--follow``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+from .events import DEFAULT_EVENTS, EventReader
+from .plan import load_plan
+from .results import DEFAULT_REPORT, FAILED, PASSED, SKIPPED
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MARKDOWN = DEFAULT_REPORT.with_suffix(".md")
+DEFAULT_HTML = DEFAULT_REPORT.with_suffix(".html")
+
+POLL_INTERVAL_S = 1.0
+HTML_REFRESH_S = 3
+
+RUNNING = "RUNNING"
+_ICONS = {PASSED: "✅", FAILED: "❌", SKIPPED: "⏭️", RUNNING: "⏳"}
+
+
+@dataclass
+class _Test:
+    id: str
+    variant: str
+    title: str = ""
+    status: str = RUNNING
+    started: float = 0.0
+    duration_ms: float = 0.0
+    error: str = ""
+    steps: int = 0
+    last_step: dict[str, Any] | None = None
+    failed_step: dict[str, Any] | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.id} ({self.variant})" if self.variant else self.id
+
+    def details(self) -> str:
+        """Where the test ended, or where it is."""
+        step = self.failed_step or self.last_step
+        where = (
+            f"step at line {step['line']}: {step['step']} on {step['route'] or '-'}"
+            + (f" `{step['selector']}`" if step.get("selector") else "")
+            if step else ""
+        )
+        steps = f"{self.steps} step{'' if self.steps == 1 else 's'}"
+        if self.status == RUNNING:
+            return f"{steps} done, last {where}" if step else "starting"
+        if self.status == PASSED:
+            return steps
+        return f"{self.error} ({where})" if where else self.error
+
+
+def _time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class LiveReport:
+    """Folds the event stream into per-test state and renders it."""
+
+    def __init__(
+        self, events: Path = DEFAULT_EVENTS, markdown: Path = DEFAULT_MARKDOWN, html_path: Path = DEFAULT_HTML
+    ):
+        self.reader = EventReader(events)
+        self.markdown = markdown
+        self.html = html_path
+        self.run_id = ""
+        self.expected = 0
+        self.started = 0.0
+        self.updated = 0.0
+        self.summary: dict[str, Any] | None = None
+        self.tests: dict[tuple[str, str], _Test] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def apply(self, event: dict[str, Any]) -> None:
+        kind = event["event"]
+        self.updated = event["ts"]
+        if kind == "run_started":
+            self.run_id, self.expected, self.started = event["run_id"], event["tests"], event["ts"]
+            self.summary = None
+            self.tests.clear()
+        elif kind == "run_finished":
+            self.summary = event["summary"]
+        elif kind in ("test_started", "step", "test_finished"):
+            key = (event["test"], event.get("variant", ""))
+            test = self.tests.setdefault(key, _Test(*key, started=event["ts"]))
+            if kind == "test_started":
+                test.title = event.get("title", "")
+            elif kind == "step":
+                test.steps += 1
+                test.last_step = event
+                if event.get("error") and test.failed_step is None:
+                    test.failed_step = event
+            else:
+                test.status, test.error = event["status"], event.get("error", "")
+                test.duration_ms = event.get("duration_ms", 0.0)
+
+    def update(self) -> bool:
+        """Apply the new events and re-render; ``False`` if there were none."""
+        events = list(self.reader.read())
+        for event in events:
+            self.apply(event)
+        if events:
+            self.render()
+        return bool(events)
+
+    def _counts(self) -> dict[str, int]:
+        counts = {status: 0 for status in _ICONS}
+        for test in self.tests.values():
+            counts[test.status] = counts.get(test.status, 0) + 1
+        return counts
+
+    def _groups(self) -> dict[str, list[_Test]]:
+        plan = load_plan()
+        groups: dict[str, list[_Test]] = {}
+        for key in sorted(self.tests):
+            test = self.tests[key]
+            category = plan[test.id].category if test.id in plan else ""
+            groups.setdefault(category or "Other", []).append(test)
+        return groups
+
+    def status_line(self) -> str:
+        counts = self._counts()
+        if self.summary is not None:
+            return f"Finished in {self.summary['wall_ms'] / 1000:.1f}s"
+        finished = len(self.tests) - counts[RUNNING]
+        return f"Running: {finished}/{self.expected or '?'} finished, {counts[RUNNING]} in progress"
+
+    def render_markdown(self) -> str:
+        counts = self._counts()
+        lines = [
+            f"# Test Runner Report — {self.run_id or 'unnamed run'}",
+            "",
+            f"- **Started:** {_time(self.started) if self.started else '-'}",
+            f"- **Updated:** {_time(self.updated) if self.updated else '-'}",
+            f"- **Status:** {self.status_line()}",
+            f"- **Passed:** {counts[PASSED]} ✅ · **Failed:** {counts[FAILED]} ❌ · **Skipped:** {counts[SKIPPED]} ⏭️",
+            "",
+        ]
+        for category, tests in self._groups().items():
+            passed = sum(test.status == PASSED for test in tests)
+            lines += [
+                f"## {category} ({passed}/{len(tests)} passed)",
+                "",
+                "| Test | Description | Status | Time | Details |",
+                "|------|-------------|--------|------|---------|",
+            ]
+            for test in tests:
+                cells = [
+                    test.name, test.title, f"{_ICONS.get(test.status, '')} {test.status}",
+                    f"{test.duration_ms / 1000:.1f}s" if test.status != RUNNING else "", test.details(),
+                ]
+                lines.append("| " + " | ".join(cell.replace("|", "\\|").replace("\n", " ") for cell in cells) + " |")
+            lines.append("")
+        return "\n".join(lines)
+
+    def render_html(self) -> str:
+        counts = self._counts()
+        refresh = f'<meta http-equiv="refresh" content="{HTML_REFRESH_S}">' if self.summary is None else ""
+        rows = []
+        for category, tests in self._groups().items():
+            rows.append(f'<tr class="group"><th colspan="5">{html.escape(category)}</th></tr>')
+            for test in tests:
+                duration = f"{test.duration_ms / 1000:.1f}s" if test.status != RUNNING else ""
+                rows.append(
+                    f'<tr class="{test.status.lower()}"><td>{html.escape(test.name)}</td>'
+                    f"<td>{html.escape(test.title)}</td>"
+                    f"<td>{_ICONS.get(test.status, '')} {test.status}</td><td>{duration}</td>"
+                    f"<td>{html.escape(test.details())}</td></tr>"
+                )
+        return f"""<!doctype html>
+<html lang="en"><head><meta charset="utf-8">{refresh}
+<title>Test Runner Report — {html.escape(self.run_id)}</title>
+<style>
+body {{ font: 14px system-ui, sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+td, th {{ border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }}
+tr.group th {{ background: #f4f4f4; padding-top: 1em; }}
+tr.failed td {{ background: #fdecec; }} tr.running td {{ background: #fff8e1; }}
+</style></head><body>
+<h1>Test Runner Report — {html.escape(self.run_id or "unnamed run")}</h1>
+<p>{html.escape(self.status_line())} · {counts[PASSED]} passed · {counts[FAILED]} failed · {counts[SKIPPED]} skipped
+· updated {_time(self.updated) if self.updated else "-"}</p>
+<table><tr><th>Test</th><th>Description</th><th>Status</th><th>Time</th><th>Details</th></tr>
+{chr(10).join(rows)}
+</table></body></html>
+"""
+
+    def render(self) -> None:
+        for path, text in ((self.markdown, self.render_markdown()), (self.html, self.render_html())):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(path.name + ".tmp")
+            partial.write_text(text, encoding="utf-8")
+            os.replace(partial, path)
+
+    def _follow(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.update()
+            except Exception:
+                # A half-written report is retried on the next tick.
+                log.exception("Live report update failed")
+
+    def start(self, interval: float = POLL_INTERVAL_S) -> "LiveReport":
+        self._thread = threading.Thread(target=self._follow, args=(interval,), name="live-report", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.update()
+
+    def __enter__(self) -> "LiveReport":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m testsprite_tests.runner.live",
+        description="Render the runner's event stream as Markdown and HTML reports.",
+    )
+    parser.add_argument("events", type=Path, nargs="?", default=DEFAULT_EVENTS, help="default: %(default)s")
+    parser.add_argument("--markdown", type=Path, default=DEFAULT_MARKDOWN, help="default: %(default)s")
+    parser.add_argument("--html", type=Path, default=DEFAULT_HTML, help="default: %(default)s")
+    parser.add_argument("--follow", action="store_true", help="keep rendering until the run finishes")
+    args = parser.parse_args(argv)
+
+    report = LiveReport(args.events, args.markdown, args.html)
+    report.update()
+    if args.follow:
+        while report.summary is None:
+            time.sleep(POLL_INTERVAL_S)
+            report.update()
+    print(f"{report.status_line()} -> {args.markdown}, {args.html}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
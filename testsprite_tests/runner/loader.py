@@ -0,0 +1,114 @@
+"""Discovery and loading of the generated ``TC*.py`` scripts.
+
+The scripts end with a module-level ``asyncio.run(run_test())`` so importing
+them normally would run the test immediately. The loader compiles each file
+without that entry call and executes it in a fresh namespace, with the
+``async_api`` global swapped for whatever driver the runner hands in.
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType
+from typing import Any, Awaitable, Callable, Iterable
+
+Transform = Callable[[ast.Module], ast.Module]
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+TMP_DIR = TESTS_DIR / "tmp"
+
+_TC_FILE = re.compile(r"^(TC\d{3})_(.+)\.py$")
+
+
+@dataclass(frozen=True)
+class TestCase:
+    """A generated test script on disk."""
+
+    id: str
+    path: Path
+
+    @property
+    def title(self) -> str:
+        return _TC_FILE.match(self.path.name).group(2).replace("_", " ")
+
+
+def discover(test_ids: Iterable[str] | None = None, directory: Path = TESTS_DIR) -> list[TestCase]:
+    """Return the TC scripts in ``directory`` ordered by id.
+
+    ``test_ids`` restricts the result to the given ids (``TC001``); unknown
+    ids raise ``KeyError`` so a typo never silently runs nothing.
+    """
+    cases = {}
+    for path in sorted(directory.glob("TC*.py")):
+        match = _TC_FILE.match(path.name)
+        if match:
+            cases[match.group(1)] = TestCase(match.group(1), path)
+    if test_ids is None:
+        return list(cases.values())
+    wanted = [test_id.upper() for test_id in test_ids]
+    missing = [test_id for test_id in wanted if test_id not in cases]
+    if missing:
+        raise KeyError(f"Unknown test ids: {', '.join(missing)}")
+    return [cases[test_id] for test_id in wanted]
+
+
+def _is_entry_call(node: ast.stmt) -> bool:
+    """Match the trailing ``asyncio.run(run_test())`` statement."""
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    func = node.value.func
+    return (
+        isinstance(func, ast.Attribute)
+        and func.attr == "run"
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "asyncio"
+    )
+
+
+def parse(case: TestCase) -> ast.Module:
+    """Parse ``case`` without its ``asyncio.run`` entry statement."""
+    tree = ast.parse(case.path.read_text(encoding="utf-8"), filename=str(case.path))
+    tree.body = [node for node in tree.body if not _is_entry_call(node)]
+    return tree
+
+
+def run_test_body(tree: ast.Module) -> list[ast.stmt]:
+    """The statements inside ``run_test``'s ``try:`` block."""
+    for node in tree.body:
+        if isinstance(node, ast.AsyncFunctionDef) and node.name == "run_test":
+            for statement in node.body:
+                if isinstance(statement, ast.Try):
+                    return statement.body
+    raise ValueError("run_test() with a try block not found")
+
+
+@lru_cache(maxsize=None)
+def _compile(case: TestCase, mtime_ns: int, transforms: tuple[Transform, ...]) -> CodeType:
+    tree = parse(case)
+    for transform in transforms:
+        tree = transform(tree)
+    return compile(ast.fix_missing_locations(tree), str(case.path), "exec")
+
+
+def load_run_test(
+    case: TestCase, driver: Any, transforms: tuple[Transform, ...] = ()
+) -> Callable[[], Awaitable[None]]:
+    """Return ``case``'s ``run_test`` coroutine function bound to ``driver``.
+
+    ``driver`` replaces the script's ``async_api`` module, so
+    ``async_api.async_playwright()`` resolves to it. ``transforms`` rewrite
+    the parsed module before it is compiled. Compiled code is cached per
+    file version and transform set; the namespace is fresh on every call.
+    """
+    code = _compile(case, case.path.stat().st_mtime_ns, transforms)
+    namespace: dict[str, Any] = {
+        "__name__": f"testsprite_tests.{case.path.stem}",
+        "__file__": str(case.path),
+    }
+    exec(code, namespace)
+    namespace["async_api"] = driver
+    return namespace["run_test"]
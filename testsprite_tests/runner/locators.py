@@ -0,0 +1,227 @@
+"""Fingerprint fallback for the scripts' absolute XPaths.
+
+The generated scripts address elements as ``xpath=/html/body/div/...``, which
+breaks as soon as a portal or dialog shifts the tree (TC049 uses both
+``div[3]`` and ``div[4]`` for the same dialog), and every miss waits out the
+full action timeout.
+
+:func:`use_locator_index` rewrites those locators to go through a
+:class:`LocatorIndex`. The index records, per route, a fingerprint of the
+element each XPath resolved to: test id, placeholder, ARIA role and
+accessible name, or exact text. When an XPath has a fingerprint, its step
+first waits for either to attach; the XPath is still preferred, and the
+fingerprint is used only when the XPath matches nothing on the page and the
+fingerprint matches exactly one element. Without one the step goes ahead
+at once, so a miss costs the action's own timeout and nothing more.
+
+Fingerprints are kept in ``tmp/locator_index.json`` together with the
+deployed bundle they were recorded on. An XPath is fingerprinted when it has
+no entry for the bundle currently served: after its step succeeds (see
+:meth:`LocatorIndex.acted`), if the page is still on the route the step ran
+on and the XPath and the fingerprint each match just that one element. A
+deployment costs one fingerprint per element and unchanged builds cost none.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from playwright.async_api import Error, Locator, Page
+
+from .impact import load_routes
+from .loader import TMP_DIR
+
+log = logging.getLogger(__name__)
+
+INDEX_PATH = TMP_DIR / "locator_index.json"
+
+# How long a step with a fingerprint waits for it or its XPath to attach.
+PROBE_TIMEOUT_MS = 5000
+
+_ABSOLUTE_XPATH = "xpath=/html"
+
+_FINGERPRINT_JS = """el => ({
+    tag: el.tagName.toLowerCase(),
+    type: el.getAttribute("type") || "",
+    role: el.getAttribute("role") || "",
+    label: el.getAttribute("aria-label") || "",
+    test_id: el.getAttribute("data-testid") || "",
+    placeholder: el.getAttribute("placeholder") || "",
+    text: (el.innerText || "").replace(/\\s+/g, " ").trim().slice(0, 80),
+    build: document.querySelector("script[type=module][src]")?.getAttribute("src") || "",
+})"""
+
+# Implicit ARIA roles of the elements the scripts touch.
+_IMPLICIT_ROLES = {"a": "link", "button": "button", "select": "combobox", "textarea": "textbox", "img": "img"}
+_INPUT_ROLES = {"checkbox": "checkbox", "radio": "radio", "button": "button", "submit": "button", "": "textbox",
+                "text": "textbox", "email": "textbox", "search": "searchbox", "number": "spinbutton"}
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    tag: str
+    role: str = ""
+    name: str = ""
+    test_id: str = ""
+    placeholder: str = ""
+    text: str = ""
+    build: str = ""
+
+    @classmethod
+    def from_element(cls, raw: dict[str, str]) -> "Fingerprint":
+        tag = raw["tag"]
+        role = raw["role"] or (_INPUT_ROLES.get(raw["type"], "") if tag == "input" else _IMPLICIT_ROLES.get(tag, ""))
+        if tag[:1] == "h" and tag[1:].isdigit():
+            role = role or "heading"
+        return cls(
+            tag=tag,
+            role=role,
+            name=raw["label"] or (raw["text"] if role in ("button", "link", "heading") else ""),
+            test_id=raw["test_id"],
+            placeholder=raw["placeholder"],
+            text=raw["text"],
+            build=raw["build"],
+        )
+
+    def locator(self, page: Page) -> Locator | None:
+        """The most specific semantic locator, or ``None`` if too vague."""
+        if self.test_id:
+            return page.get_by_test_id(self.test_id)
+        if self.placeholder:
+            return page.get_by_placeholder(self.placeholder, exact=True)
+        if self.role and self.name:
+            return page.get_by_role(self.role, name=self.name, exact=True)
+        if self.text and self.tag not in ("div", "main", "section", "body"):
+            return page.locator(self.tag).get_by_text(self.text, exact=True)
+        return None
+
+
+class LocatorIndex:
+    """Route -> XPath -> :class:`Fingerprint`, shared by every test in a run."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = path
+        self.entries: dict[str, dict[str, Fingerprint]] = self._read()
+        self.build = ""
+        self.recorded = 0
+        self.fallbacks = 0
+        self.stale: set[tuple[str, str]] = set()
+        self._routes = load_routes()
+        # (page, XPath) -> route, for the steps that are to record a fingerprint.
+        self._pending: dict[tuple[int, str], str] = {}
+
+    def _read(self) -> dict[str, dict[str, Fingerprint]]:
+        if not self.path.exists():
+            return {}
+        raw = json.loads(self.path.read_text(encoding="utf-8"))
+        return {route: {xpath: Fingerprint(**entry) for xpath, entry in xpaths.items()} for route, xpaths in raw.items()}
+
+    def route(self, url: str) -> str:
+        path = urlparse(url).path or "/"
+        return next((route.path for route in self._routes if route.matches(path)), path)
+
+    async def locate(self, frame: Page, selector: str) -> Locator:
+        """``frame.locator(selector)``, or the fingerprint if the XPath no longer matches."""
+        locator = frame.locator(selector)
+        if not selector.startswith(_ABSOLUTE_XPATH):
+            return locator
+        route = self.route(frame.url)
+        known = self.entries.get(route, {}).get(selector)
+        if known is None or known.build != self.build:
+            self._pending[(id(frame), selector)] = route
+        fallback = known.locator(frame) if known else None
+        if fallback is None:
+            return locator
+        try:
+            await locator.or_(fallback).first.wait_for(state="attached", timeout=PROBE_TIMEOUT_MS)
+            matches = await locator.count()
+            if matches == 0:
+                # Only the fingerprint attached: the XPath is stale.
+                self.stale.add((route, selector))
+                if await fallback.count() == 1:
+                    self._pending.pop((id(frame), selector), None)
+                    self.fallbacks += 1
+                    return fallback
+        except Error:
+            # Nothing attached (or the page went away); the step's own
+            # action reports the miss against the script's XPath.
+            pass
+        return locator
+
+    async def acted(self, target: Page | Locator, selector: str) -> None:
+        """Fingerprint ``selector`` after a step on it succeeded, if :meth:`locate` asked for one."""
+        frame = target.page if isinstance(target, Locator) else target
+        route = self._pending.pop((id(frame), selector), None)
+        if route is None:
+            return
+        locator = frame.locator(selector)
+        try:
+            # A click may have navigated away or removed the element.
+            if self.route(frame.url) == route and await locator.count() == 1:
+                await self._record(frame, route, selector, locator, self.entries.get(route, {}).get(selector))
+        except Error:
+            pass
+
+    async def _record(
+        self, frame: Page, route: str, selector: str, locator: Locator, known: Fingerprint | None
+    ) -> None:
+        fingerprint = Fingerprint.from_element(await locator.evaluate(_FINGERPRINT_JS))
+        self.build = fingerprint.build
+        if fingerprint == known:
+            return
+        candidate = fingerprint.locator(frame)
+        if candidate is None or await candidate.count() != 1:
+            # A fingerprint shared with other elements could stand in for the wrong one.
+            return
+        self.entries.setdefault(route, {})[selector] = fingerprint
+        self.recorded += 1
+
+    def save(self) -> Path:
+        """Merge into the file on disk, so concurrent shards do not clobber each other."""
+        merged = self._read()
+        for route, xpaths in self.entries.items():
+            merged.setdefault(route, {}).update(xpaths)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {route: {xpath: asdict(entry) for xpath, entry in sorted(xpaths.items())} for route, xpaths in sorted(merged.items())}
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+        return self.path
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "indexed": sum(len(xpaths) for xpaths in self.entries.values()),
+            "recorded": self.recorded,
+            "fallbacks": self.fallbacks,
+            "stale": sorted(f"{route} {selector}" for route, selector in self.stale),
+        }
+
+
+class _LocateCalls(ast.NodeTransformer):
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        func = node.func
+        if (
+            isinstance(func, ast.Attribute)
+            and func.attr == "locator"
+            and len(node.args) == 1
+            and not node.keywords
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+            and node.args[0].value.startswith(_ABSOLUTE_XPATH)
+        ):
+            locate = ast.Attribute(ast.Name("async_api", ast.Load()), "locate", ast.Load())
+            return ast.copy_location(ast.Await(ast.Call(locate, [func.value, node.args[0]], [])), node)
+        return node
+
+
+def use_locator_index(tree: ast.Module) -> ast.Module:
+    """Rewrite ``x.locator("xpath=/html/...")`` to ``await async_api.locate(x, ...)``."""
+    return _LocateCalls().visit(tree)
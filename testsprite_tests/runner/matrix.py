@@ -0,0 +1,113 @@
+"""Run one selection of tests under several browser engines or devices at once.
+
+The app is installed as a PWA on iPhone Safari and Android Chrome, yet every
+script launches a desktop ``pw.chromium``. :func:`run_matrix` runs the same
+cases on one :class:`~.suite.SuiteRunner` per variant (an engine, a device
+from :mod:`.devices`, or an ``engine/device`` pair), all at the same time in
+one event loop, so a matrix costs about as long as its slowest variant rather
+than the sum. The merged report tags each result with its variant and adds a
+per-variant summary plus the tests whose outcome depends on the variant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Mapping, Sequence
+
+from .artifacts import artifact_totals
+from .chaos import chaos_totals
+from .har import har_totals
+from .loader import TestCase
+from .results import PASSED, RunReport, TestResult, utc_now
+from .steps import slowest_steps, step_totals
+
+if TYPE_CHECKING:
+    from .suite import SuiteRunner
+
+
+def _mean(values: list[float]) -> float:
+    return round(sum(values) / len(values), 1) if values else 0.0
+
+
+def _variant_summary(report: RunReport) -> dict[str, Any]:
+    ran = [result for result in report.results if result.duration_ms]
+    timings = [result.extra["timings"] for result in report.results if "timings" in result.extra]
+    summary = {
+        **report.summary(),
+        "mean_test_ms": _mean([result.duration_ms for result in ran]),
+        "failures": {result.id: result.error for result in report.failed},
+    }
+    if timings:
+        # Device runs: what the pages themselves measured.
+        summary["mean_load_ms"] = _mean([timing["mean_load_ms"] for timing in timings if timing["loads"]])
+        summary["mean_interaction_ms"] = _mean(
+            [timing["mean_interaction_ms"] for timing in timings if timing["interactions"]]
+        )
+    return {**summary, **report.extra}
+
+
+def differences(results: Sequence[TestResult], dimension: str = "engine") -> dict[str, dict[str, Any]]:
+    """Per test whose status is not the same for every variant: variant -> status and error."""
+    by_test: dict[str, dict[str, TestResult]] = {}
+    for result in results:
+        by_test.setdefault(result.id, {})[result.extra[dimension]] = result
+    return {
+        test_id: {
+            variant: result.status if result.status == PASSED else f"{result.status}: {result.error}"
+            for variant, result in outcomes.items()
+        }
+        for test_id, outcomes in sorted(by_test.items())
+        if len({result.status for result in outcomes.values()}) > 1
+    }
+
+
+async def run_matrix(
+    runners: Mapping[str, "SuiteRunner"],
+    cases: Sequence[TestCase],
+    *,
+    dimension: str = "engine",
+    priority_first: bool = False,
+) -> RunReport:
+    """Run ``cases`` on every variant's runner concurrently and merge the reports.
+
+    ``dimension`` names what the variants differ in; results carry their
+    variant under that key, and the report's summaries under ``<dimension>s``.
+    """
+    merged = RunReport(started=utc_now())
+    started = time.perf_counter()
+    reports = await asyncio.gather(*(runner.run(cases, priority_first=priority_first) for runner in runners.values()))
+    merged.wall_ms = (time.perf_counter() - started) * 1000
+    merged.finished = utc_now()
+    merged.startup_ms = max(report.startup_ms for report in reports)
+
+    order = list(runners)
+    for variant, report in zip(order, reports):
+        for result in report.results:
+            result.extra[dimension] = variant
+    merged.results = sorted(
+        (result for report in reports for result in report.results),
+        key=lambda result: (result.id, order.index(result.extra[dimension])),
+    )
+    merged.extra[f"{dimension}s"] = {variant: _variant_summary(report) for variant, report in zip(order, reports)}
+    merged.extra[f"{dimension}_differences"] = differences(merged.results, dimension)
+    merged.extra["matrix"] = {
+        "dimension": dimension,
+        "sum_variant_ms": round(sum(report.wall_ms for report in reports), 1),
+        "max_variant_ms": round(max(report.wall_ms for report in reports), 1),
+    }
+    aborted = [report.extra["aborted"] for report in reports if "aborted" in report.extra]
+    if aborted:
+        merged.extra["aborted"] = aborted[0]
+    for key in ("nav_retries", "bytes_saved"):
+        merged.extra[key] = sum(report.extra.get(key, 0) for report in reports)
+    if any("artifacts" in report.extra for report in reports):
+        merged.extra["artifacts"] = artifact_totals(merged.results)
+    if any("har" in report.extra for report in reports):
+        merged.extra["har"] = har_totals(merged.results)
+    if any("chaos" in report.extra for report in reports):
+        merged.extra["chaos"] = chaos_totals(merged.results)
+    if any("slowest_steps" in report.extra for report in reports):
+        merged.extra["step_ms_by_category"] = step_totals(merged.results)
+        merged.extra["slowest_steps"] = slowest_steps(merged.results)
+    return merged
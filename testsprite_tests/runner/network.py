@@ -0,0 +1,65 @@
+"""Classification of network-level failures from the browser."""
+
+from __future__ import annotations
+
+import re
+
+# Chromium net errors that mean the host or the connection failed, as
+# opposed to the app misbehaving. ERR_EMPTY_RESPONSE is what Vercel's edge
+# returns intermittently (see testsprite-mcp-test-report.md).
+NETWORK_ERRORS = frozenset({
+    "ERR_ADDRESS_UNREACHABLE",
+    "ERR_CONNECTION_ABORTED",
+    "ERR_CONNECTION_CLOSED",
+    "ERR_CONNECTION_REFUSED",
+    "ERR_CONNECTION_RESET",
+    "ERR_CONNECTION_TIMED_OUT",
+    "ERR_EMPTY_RESPONSE",
+    "ERR_HTTP2_PROTOCOL_ERROR",
+    "ERR_INTERNET_DISCONNECTED",
+    "ERR_NAME_NOT_RESOLVED",
+    "ERR_NETWORK_CHANGED",
+    "ERR_SSL_PROTOCOL_ERROR",
+    "ERR_TIMED_OUT",
+})
+
+# The subset worth retrying: the connection dropped mid-way rather than the
+# host being absent or misconfigured.
+TRANSIENT_ERRORS = frozenset({
+    "ERR_CONNECTION_ABORTED",
+    "ERR_CONNECTION_CLOSED",
+    "ERR_CONNECTION_RESET",
+    "ERR_CONNECTION_TIMED_OUT",
+    "ERR_EMPTY_RESPONSE",
+    "ERR_HTTP2_PROTOCOL_ERROR",
+    "ERR_NETWORK_CHANGED",
+    "ERR_TIMED_OUT",
+})
+
+_NET_ERROR = re.compile(r"net::(ERR_[A-Z0-9_]+)")
+
+# ``route.fetch()`` goes through Node's HTTP client, whose errors name the
+# socket failure instead; these are the Chromium codes they correspond to.
+SOCKET_ERRORS = {
+    "ECONNABORTED": "ERR_CONNECTION_ABORTED",
+    "ECONNREFUSED": "ERR_CONNECTION_REFUSED",
+    "ECONNRESET": "ERR_CONNECTION_RESET",
+    "ENOTFOUND": "ERR_NAME_NOT_RESOLVED",
+    "EPIPE": "ERR_CONNECTION_CLOSED",
+    "ETIMEDOUT": "ERR_TIMED_OUT",
+    "socket hang up": "ERR_EMPTY_RESPONSE",
+}
+
+
+def network_error(error: BaseException | str) -> str | None:
+    """The ``ERR_*`` code if ``error`` is a network-level failure."""
+    match = _NET_ERROR.search(str(error))
+    if match and match.group(1) in NETWORK_ERRORS:
+        return match.group(1)
+    return None
+
+
+def fetch_error(error: BaseException | str) -> str | None:
+    """:func:`network_error` for a ``route.fetch()`` failure."""
+    message = str(error)
+    return next((code for cause, code in SOCKET_ERRORS.items() if cause in message), None) or network_error(message)
@@ -0,0 +1,51 @@
+"""Access to ``testsprite_frontend_test_plan.json``."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from .loader import TESTS_DIR
+
+PLAN_PATH = TESTS_DIR / "testsprite_frontend_test_plan.json"
+
+PRIORITY_ORDER = {"High": 0, "Medium": 1, "Low": 2}
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    type: str
+    description: str
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    id: str
+    title: str
+    description: str
+    category: str
+    priority: str
+    steps: tuple[PlanStep, ...] = field(default=())
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_ORDER.get(self.priority, len(PRIORITY_ORDER))
+
+
+@lru_cache(maxsize=None)
+def load_plan(path: Path = PLAN_PATH) -> dict[str, PlanCase]:
+    """Plan cases keyed by id, in plan order."""
+    entries = json.loads(path.read_text(encoding="utf-8"))
+    return {
+        entry["id"]: PlanCase(
+            id=entry["id"],
+            title=entry["title"],
+            description=entry.get("description", ""),
+            category=entry.get("category", ""),
+            priority=entry.get("priority", ""),
+            steps=tuple(PlanStep(step["type"], step["description"]) for step in entry.get("steps", [])),
+        )
+        for entry in entries
+    }
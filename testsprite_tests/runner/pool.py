@@ -0,0 +1,248 @@
+"""A pool of warm browsers of one engine, shared by every test in a run.
+
+Scripts still believe they start their own driver and browser: the runner
+hands them a :class:`PooledDriver` in place of ``playwright.async_api``.
+``launch()`` returns a lease on a pooled browser, ``new_context()`` creates a
+real isolated context on it (or resets a warm one, see :mod:`.contexts`) and
+``close()``/``stop()`` only release the lease.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Sequence
+
+from playwright.async_api import Browser, BrowserContext, Locator, Page, Playwright, Response, async_playwright
+
+from .clock import advance_days
+from .contexts import ContextPool, WarmContext
+
+if TYPE_CHECKING:
+    from .locators import LocatorIndex
+    from .retry import NavigationRetry
+    from .steps import StepTrace
+
+ContextSetup = Callable[[BrowserContext], Awaitable[None]]
+
+ENGINES = ("chromium", "firefox", "webkit")
+
+# The generated scripts pass "--single-process" too; it makes a long-lived
+# browser crash-prone, so the pool launches without it. Chromium only.
+DEFAULT_LAUNCH_ARGS = (
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+)
+
+
+class BrowserPool:
+    """Launches ``size`` browsers once and lends them out one test at a time."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        *,
+        engine: str = "chromium",
+        headless: bool = True,
+        launch_args: tuple[str, ...] = DEFAULT_LAUNCH_ARGS,
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}")
+        self.size = size
+        self.engine = engine
+        self.headless = headless
+        self.launch_args = launch_args
+        self.startup_ms = 0.0
+        self._playwright: Playwright | None = None
+        self._idle: asyncio.Queue[Browser] = asyncio.Queue()
+
+    async def start(self) -> "BrowserPool":
+        started = time.perf_counter()
+        self._playwright = await async_playwright().start()
+        browsers = await asyncio.gather(*(self._launch() for _ in range(self.size)))
+        for browser in browsers:
+            self._idle.put_nowait(browser)
+        self.startup_ms = (time.perf_counter() - started) * 1000
+        return self
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            browser = self._idle.get_nowait()
+            if browser.is_connected():
+                await browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @property
+    def devices(self) -> dict[str, dict[str, Any]]:
+        """Playwright's device descriptors, once started."""
+        return self._playwright.devices
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _launch(self) -> Browser:
+        browser_type = getattr(self._playwright, self.engine)
+        args = list(self.launch_args) if self.engine == "chromium" else []
+        return await browser_type.launch(headless=self.headless, args=args)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Browser]:
+        """Borrow a browser; crashed browsers are replaced on return."""
+        browser = await self._idle.get()
+        try:
+            if not browser.is_connected():
+                browser = await self._launch()
+            yield browser
+        finally:
+            if not browser.is_connected():
+                browser = await self._launch()
+            self._idle.put_nowait(browser)
+
+
+class _DeferredContext:
+    """A context whose ``close()`` is left to :meth:`LeasedBrowser.close`."""
+
+    def __init__(self, context: BrowserContext | WarmContext):
+        self._context = context
+
+    async def close(self, **kwargs: Any) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._context, name)
+
+
+class LeasedBrowser:
+    """The browser a script sees. Closing it closes only its own contexts.
+
+    ``context_options`` are passed to every ``new_context()`` the script
+    makes, underneath whatever options the script itself supplies, and each
+    ``setup`` hook is awaited on the new context before the script gets it.
+    With a ``warm`` pool, a script asking for a plain context gets a reset
+    one from the pool, returned to it on ``close()``. With ``defer_close``,
+    the script's own ``context.close()`` does nothing, so the runner can
+    still inspect the context once the script is done.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        context_options: dict[str, Any] | None = None,
+        setup: Sequence[ContextSetup] = (),
+        warm: ContextPool | None = None,
+        defer_close: bool = False,
+    ):
+        self._browser = browser
+        self._context_options = context_options or {}
+        self._setup = tuple(setup)
+        self._warm = warm
+        self._defer_close = defer_close
+        self._contexts: list[BrowserContext | WarmContext] = []
+
+    async def new_context(self, **kwargs: Any) -> BrowserContext | WarmContext:
+        options = {**self._context_options, **kwargs}
+        if self._warm and self._warm.accepts(self._browser, options):
+            context = await self._warm.acquire(self._browser, options)
+            self._contexts.append(WarmContext(context, self._warm))
+        else:
+            context = await self._browser.new_context(**options)
+            self._contexts.append(context)
+        for hook in self._setup:
+            await hook(context)
+        return _DeferredContext(self._contexts[-1]) if self._defer_close else self._contexts[-1]
+
+    async def close(self, **kwargs: Any) -> None:
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._browser, name)
+
+
+class _PooledBrowserType:
+    def __init__(self, browser: LeasedBrowser):
+        self._browser = browser
+
+    async def launch(self, **kwargs: Any) -> LeasedBrowser:
+        return self._browser
+
+
+class _PooledPlaywright:
+    # Scripts hard-code pw.chromium; every name launches the pool's engine.
+    def __init__(self, browser: LeasedBrowser):
+        self.chromium = self.firefox = self.webkit = _PooledBrowserType(browser)
+
+    async def start(self) -> "_PooledPlaywright":
+        return self
+
+    async def stop(self) -> None:
+        pass
+
+
+class PooledDriver:
+    """Stands in for ``playwright.async_api`` inside a loaded script.
+
+    ``locate()`` and ``goto()`` are the targets of the :mod:`.locators` and
+    :mod:`.retry` rewrites; without an index or a retry policy they do what
+    the script's own call would. ``setup`` hooks run on every context the
+    script creates; ``warm`` lends it pooled contexts and ``defer_close``
+    keeps them open after the script (see :class:`LeasedBrowser`).
+    ``step()`` is the target of the :mod:`.steps` rewrite; it times each
+    step on ``steps`` and then lets ``locators`` fingerprint its element. Hand-written journeys can call ``advance_days()`` to
+    move the page's clock forward.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        context_options: dict[str, Any] | None = None,
+        *,
+        locators: LocatorIndex | None = None,
+        retry: NavigationRetry | None = None,
+        setup: Sequence[ContextSetup] = (),
+        warm: ContextPool | None = None,
+        defer_close: bool = False,
+        steps: StepTrace | None = None,
+    ):
+        setup = [*setup, retry.install] if retry else setup
+        self.browser = LeasedBrowser(browser, context_options, setup, warm, defer_close)
+        self.locators = locators
+        self.retry = retry
+        self.steps = steps
+
+    def async_playwright(self) -> _PooledPlaywright:
+        return _PooledPlaywright(self.browser)
+
+    async def locate(self, frame: Page, selector: str) -> Locator:
+        if self.locators is None:
+            return frame.locator(selector)
+        return await self.locators.locate(frame, selector)
+
+    async def advance_days(self, page: Page, days: float) -> None:
+        await advance_days(page, days)
+
+    async def step(
+        self, name: str, category: str, line: int, target: Any, selector: str | None, awaitable: Awaitable[Any]
+    ) -> Any:
+        if self.steps is None:
+            result = await awaitable
+        else:
+            result = await self.steps.step(name, category, line, target, selector, awaitable)
+        if self.locators is not None and selector and name != "locate":
+            await self.locators.acted(target, selector)
+        return result
+
+    async def goto(self, page: Page, url: str, **kwargs: Any) -> Response | None:
+        if self.retry is None:
+            return await page.goto(url, **kwargs)
+        return await self.retry.goto(page, url, **kwargs)
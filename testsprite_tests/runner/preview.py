@@ -0,0 +1,190 @@
+"""Build the app once and serve ``dist/`` locally, the way Vercel does.
+
+Running against the production URL makes every test depend on the CDN (and
+its intermittent ``ERR_EMPTY_RESPONSE``). :class:`PreviewServer` runs
+``vite build`` only when a source is newer than ``dist/index.html``, then
+serves the output from a thread with the ``rewrites`` and ``headers`` of
+``vercel.json`` applied. Missing files fall through to ``index.html``, as on
+Vercel. Hashed ``assets/`` get an immutable cache header, so warm browsers
+load each chunk once. :meth:`PreviewServer.start` returns only after ``/``
+answers.
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import re
+import subprocess
+import threading
+import time
+import urllib.request
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse, urlsplit
+
+from .config import LOCAL_ENDPOINT
+from .impact import REPO_ROOT, SRC_DIR
+
+log = logging.getLogger(__name__)
+
+DIST_DIR = REPO_ROOT / "dist"
+VERCEL_JSON = REPO_ROOT / "vercel.json"
+
+BUILD_COMMAND = ("npm", "run", "build")
+READY_TIMEOUT_S = 10.0
+
+# Besides src/, a change to any of these needs a rebuild.
+BUILD_INPUTS = ("index.html", "package.json", "vite.config.ts", "tailwind.config.ts", "postcss.config.js", ".env", "public")
+
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _newest_mtime(paths: list[Path]) -> float:
+    newest = 0.0
+    for path in paths:
+        if path.is_dir():
+            newest = max([newest, *(child.stat().st_mtime for child in path.rglob("*") if child.is_file())])
+        elif path.exists():
+            newest = max(newest, path.stat().st_mtime)
+    return newest
+
+
+def needs_build(dist: Path = DIST_DIR) -> bool:
+    index = dist / "index.html"
+    if not index.exists():
+        return True
+    inputs = [SRC_DIR, *(REPO_ROOT / name for name in BUILD_INPUTS)]
+    return _newest_mtime(inputs) > index.stat().st_mtime
+
+
+def build(dist: Path = DIST_DIR) -> None:
+    """``npm run build`` unless ``dist/`` is already up to date."""
+    if not needs_build(dist):
+        log.info("dist/ is up to date, skipping the build")
+        return
+    if not (REPO_ROOT / "node_modules").is_dir():
+        raise RuntimeError("node_modules is missing; run `npm install` before --serve")
+    started = time.perf_counter()
+    completed = subprocess.run(BUILD_COMMAND, cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f"{' '.join(BUILD_COMMAND)} failed:\n{completed.stdout[-2000:]}{completed.stderr[-2000:]}")
+    log.info("Built dist/ in %.1fs", time.perf_counter() - started)
+
+
+def _vercel_pattern(source: str) -> re.Pattern[str]:
+    # vercel.json sources are path-to-regexp; the ones used here are plain
+    # regex groups such as "/(.*)".
+    return re.compile(re.sub(r":(\w+)\*", r"(?P<\1>.*)", re.sub(r":(\w+)(?![\w*])", r"(?P<\1>[^/]+)", source)))
+
+
+class VercelRules:
+    """``rewrites`` and ``headers`` from ``vercel.json``."""
+
+    def __init__(self, config: dict[str, Any]):
+        self.rewrites = [(_vercel_pattern(rule["source"]), rule["destination"]) for rule in config.get("rewrites", [])]
+        self.headers = [
+            (_vercel_pattern(rule["source"]), [(header["key"], header["value"]) for header in rule["headers"]])
+            for rule in config.get("headers", [])
+        ]
+
+    @classmethod
+    def load(cls, path: Path = VERCEL_JSON) -> "VercelRules":
+        return cls(json.loads(path.read_text(encoding="utf-8")) if path.exists() else {})
+
+    def rewrite(self, path: str) -> str | None:
+        for pattern, destination in self.rewrites:
+            match = pattern.fullmatch(path)
+            if match:
+                return re.sub(r"\$(\d+)", lambda ref: match.group(int(ref.group(1))) or "", destination)
+        return None
+
+    def headers_for(self, path: str) -> list[tuple[str, str]]:
+        return [header for pattern, headers in self.headers if pattern.fullmatch(path) for header in headers]
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def __init__(self, *args: Any, rules: VercelRules, **kwargs: Any):
+        self.rules = rules
+        super().__init__(*args, **kwargs)
+
+    def send_head(self) -> Any:
+        self.request_path = urlsplit(self.path).path
+        # Vercel serves the filesystem first and rewrites only on a miss.
+        local = Path(self.translate_path(self.request_path))
+        if not local.is_file():
+            destination = self.rules.rewrite(self.request_path)
+            if destination:
+                self.path = destination
+        return super().send_head()
+
+    def end_headers(self) -> None:
+        path = getattr(self, "request_path", "/")
+        for key, value in self.rules.headers_for(path):
+            self.send_header(key, value)
+        self.send_header("Cache-Control", _IMMUTABLE if path.startswith("/assets/") else "no-cache")
+        super().end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.debug("preview: " + format, *args)
+
+
+class PreviewServer:
+    """``dist/`` on ``LOCAL_ENDPOINT``'s port, or a free one if that is taken."""
+
+    def __init__(self, dist: Path = DIST_DIR, *, port: int | None = None, rules: VercelRules | None = None):
+        self.dist = dist
+        self.port = (urlparse(LOCAL_ENDPOINT).port or 8080) if port is None else port
+        self.rules = rules or VercelRules.load()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self._server.server_address[1]}"
+
+    def start(self) -> str:
+        build(self.dist)
+        handler = partial(_Handler, directory=str(self.dist), rules=self.rules)
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        except OSError as error:
+            if error.errno != errno.EADDRINUSE:
+                raise
+            log.warning("Port %d is in use, serving dist/ on a free port", self.port)
+            self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="preview-server", daemon=True)
+        self._thread.start()
+        self._wait_ready()
+        log.info("Serving dist/ at %s", self.url)
+        return self.url
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + READY_TIMEOUT_S
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"{self.url}/", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.05)
+        url = self.url
+        self.stop()
+        raise RuntimeError(f"Preview server at {url} did not become ready")
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,98 @@
+"""Per-test results and the JSON run report."""
+
+from __future__ import annotations
+
+import json
+import traceback
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .loader import TMP_DIR
+
+DEFAULT_REPORT = TMP_DIR / "runner_report.json"
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+SKIPPED = "SKIPPED"
+
+
+def utc_now() -> str:
+    """ISO timestamp in the same shape as ``test_results.json``."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def describe_error(error: BaseException) -> str:
+    """One-line error text; bare ``assert`` failures carry no message."""
+    text = "".join(traceback.format_exception_only(type(error), error)).strip()
+    if isinstance(error, AssertionError) and not str(error):
+        frame = traceback.extract_tb(error.__traceback__)[-1]
+        text = f"AssertionError at line {frame.lineno}: {frame.line}"
+    return text
+
+
+@dataclass
+class TestResult:
+    """Outcome of a single TC script.
+
+    ``overhead_ms`` is the time spent before the script's own code ran
+    (waiting for a browser and loading the file); ``duration_ms`` is the
+    script itself.
+    """
+
+    id: str
+    title: str
+    status: str = PASSED
+    error: str = ""
+    started: str = ""
+    overhead_ms: float = 0.0
+    duration_ms: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RunReport:
+    results: list[TestResult] = field(default_factory=list)
+    started: str = ""
+    finished: str = ""
+    wall_ms: float = 0.0
+    startup_ms: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> list[TestResult]:
+        """Results that did not pass, skipped ones included."""
+        return [result for result in self.results if result.status != PASSED]
+
+    @property
+    def skipped(self) -> list[TestResult]:
+        return [result for result in self.results if result.status == SKIPPED]
+
+    def summary(self) -> dict[str, Any]:
+        total_ms = sum(result.duration_ms for result in self.results)
+        overhead_ms = sum(result.overhead_ms for result in self.results)
+        return {
+            "total": len(self.results),
+            "passed": len(self.results) - len(self.failed),
+            "failed": len(self.failed) - len(self.skipped),
+            "skipped": len(self.skipped),
+            "wall_ms": round(self.wall_ms, 1),
+            "startup_ms": round(self.startup_ms, 1),
+            "sum_test_ms": round(total_ms, 1),
+            "mean_overhead_ms": round(overhead_ms / len(self.results), 1) if self.results else 0.0,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "finished": self.finished,
+            "summary": self.summary(),
+            **self.extra,
+            "results": [asdict(result) for result in self.results],
+        }
+
+    def write(self, path: Path = DEFAULT_REPORT) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
@@ -0,0 +1,104 @@
+"""Retry transient network failures per navigation instead of per test.
+
+Most round-2 failures in ``testsprite-mcp-test-report.md`` were Vercel's
+intermittent ``ERR_EMPTY_RESPONSE``, and the only remedy was rerunning the
+whole test. Two places navigate:
+
+* the scripts' ``page.goto()`` calls, which :func:`use_navigation_retry`
+  rewrites to ``async_api.goto()`` so a transient failure repeats just that
+  ``goto``;
+* in-app navigations, which in this SPA load the route's lazy chunk. Script
+  requests to the app host are fetched through a context route and refetched
+  when the connection drops; the last attempt, and any other failure, is
+  left to the browser so it still surfaces as its ``net::ERR_*``.
+
+Both back off exponentially with jitter so parallel tests do not hit a cold
+edge in lockstep.
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import logging
+import random
+from typing import Any
+
+from playwright.async_api import BrowserContext, Error, Page, Response, Route
+
+from .network import TRANSIENT_ERRORS, fetch_error, network_error
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ATTEMPTS = 3
+BASE_DELAY_S = 0.5
+MAX_DELAY_S = 4.0
+
+
+class NavigationRetry:
+    """Retry policy for one test; ``retries`` lists what was retried."""
+
+    def __init__(self, base_url: str, attempts: int = DEFAULT_ATTEMPTS):
+        self.base_url = base_url.rstrip("/")
+        self.attempts = max(1, attempts)
+        self.retries: list[str] = []
+
+    async def _backoff(self, attempt: int, url: str, reason: str) -> None:
+        self.retries.append(f"{reason} {url}")
+        delay = min(MAX_DELAY_S, BASE_DELAY_S * 2 ** (attempt - 1))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        log.warning("%s on %s, retry %d in %.1fs", reason, url, attempt, delay)
+        await asyncio.sleep(delay)
+
+    async def goto(self, page: Page, url: str, **kwargs: Any) -> Response | None:
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return await page.goto(url, **kwargs)
+            except Error as error:
+                code = network_error(error)
+                if code not in TRANSIENT_ERRORS or attempt == self.attempts:
+                    raise
+                await self._backoff(attempt, url, code)
+
+    async def install(self, context: BrowserContext) -> None:
+        # A route turns off the context's HTTP cache, so only add one that retries.
+        if self.attempts > 1:
+            await context.route(f"{self.base_url}/**", self._fetch_script)
+
+    async def _fetch_script(self, route: Route) -> None:
+        if route.request.resource_type != "script":
+            await route.fallback()
+            return
+        url = route.request.url
+        try:
+            for attempt in range(1, self.attempts):
+                try:
+                    response = await route.fetch()
+                except Error as error:
+                    code = fetch_error(error)
+                    if code not in TRANSIENT_ERRORS:
+                        # Not a dropped connection; the browser's own request reports it.
+                        break
+                    await self._backoff(attempt, url, code)
+                    continue
+                await route.fulfill(response=response)
+                return
+            await route.continue_()
+        except Error:
+            # The test closed its context while the chunk was in flight.
+            pass
+
+
+class _GotoCalls(ast.NodeTransformer):
+    def visit_Await(self, node: ast.Await) -> ast.AST:
+        self.generic_visit(node)
+        call = node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr == "goto":
+            goto = ast.Attribute(ast.Name("async_api", ast.Load()), "goto", ast.Load())
+            node.value = ast.copy_location(ast.Call(goto, [call.func.value, *call.args], call.keywords), call)
+        return node
+
+
+def use_navigation_retry(tree: ast.Module) -> ast.Module:
+    """Route ``await x.goto(...)`` through the driver's retry policy."""
+    return _GotoCalls().visit(tree)
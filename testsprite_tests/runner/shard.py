@@ -0,0 +1,226 @@
+"""Split the suite into duration-balanced shards, one worker process each.
+
+Durations come from the last runner report when it covers every selected
+test, otherwise from ``tmp/test_results.json`` (``modified - created`` of
+the TestSprite run). Shards are packed longest-processing-time-first: tests are taken from
+longest to shortest and each goes to the currently lightest shard, so the
+slowest shard stays close to ``sum / shards``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Sequence
+
+from .artifacts import artifact_totals
+from .auth import AuthCache, uses_shared_login
+from .chaos import chaos_totals
+from .config import BASE_URL
+from .events import EventFeed
+from .har import har_totals
+from .history import HISTORY_PATH, TESTSPRITE_RESULTS, HistoryStore
+from .loader import TestCase, discover
+from .pool import BrowserPool
+from .results import DEFAULT_REPORT, SKIPPED, RunReport, TestResult, utc_now
+from .smoke import smoke_gate
+from .steps import slowest_steps, step_totals
+from .suite import run_suite
+
+log = logging.getLogger(__name__)
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _testsprite_durations(path: Path) -> dict[str, float]:
+    durations: dict[str, float] = {}
+    if path.exists():
+        for entry in json.loads(path.read_text(encoding="utf-8")):
+            try:
+                elapsed = _parse_time(entry["modified"]) - _parse_time(entry["created"])
+            except (KeyError, ValueError):
+                continue
+            durations[entry["title"].split("-", 1)[0]] = elapsed.total_seconds()
+    return durations
+
+
+def _runner_durations(path: Path) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    results = json.loads(path.read_text(encoding="utf-8")).get("results", [])
+    # Matrix reports repeat each test; desktop Chromium's timings are the baseline.
+    return {
+        result["id"]: result["duration_ms"] / 1000
+        for result in results
+        if result["status"] != SKIPPED
+        and result.get("extra", {}).get("engine", "chromium") == "chromium"
+        and not {"device", "variant"} & result.get("extra", {}).keys()
+    }
+
+
+def historical_durations(
+    test_ids: Sequence[str],
+    testsprite_results: Path = TESTSPRITE_RESULTS,
+    runner_report: Path = DEFAULT_REPORT,
+    history: Path = HISTORY_PATH,
+) -> dict[str, float]:
+    """Seconds per test id.
+
+    The median of the recent runs in the run history is used when it covers
+    every test in ``test_ids``, then the runner's last report; TestSprite's
+    timings are on a different scale (they include its cloud queueing), so
+    they are never mixed with the runner's.
+    """
+    if history.exists():
+        with HistoryStore(history) as store:
+            measured = store.median_durations(test_ids)
+        if all(test_id in measured for test_id in test_ids):
+            return measured
+    measured = _runner_durations(runner_report)
+    if measured and all(test_id in measured for test_id in test_ids):
+        return measured
+    return _testsprite_durations(testsprite_results)
+
+
+@dataclass
+class Shard:
+    index: int
+    cases: list[TestCase] = field(default_factory=list)
+    predicted_s: float = 0.0
+
+
+def plan_shards(cases: Sequence[TestCase], count: int, durations: dict[str, float]) -> list[Shard]:
+    """Longest-processing-time-first packing of ``cases`` into ``count`` shards.
+
+    Tests without history are assumed to take the median known duration.
+    """
+    known = [durations[case.id] for case in cases if case.id in durations]
+    fallback = statistics.median(known) if known else 1.0
+    shards = [Shard(index) for index in range(max(1, min(count, len(cases))))]
+    heap = [(0.0, shard.index) for shard in shards]
+    for case in sorted(cases, key=lambda case: durations.get(case.id, fallback), reverse=True):
+        load, index = heapq.heappop(heap)
+        shards[index].cases.append(case)
+        shards[index].predicted_s = load + durations.get(case.id, fallback)
+        heapq.heappush(heap, (shards[index].predicted_s, index))
+    for shard in shards:
+        shard.cases.sort(key=lambda case: case.id)
+    return shards
+
+
+def _run_shard(index: int, test_ids: list[str], options: dict[str, Any]) -> RunReport:
+    logging.basicConfig(level=logging.INFO, format=f"[shard {index}] %(message)s")
+    return asyncio.run(run_suite(discover(test_ids), **options))
+
+
+async def _prepare(cases: Sequence[TestCase], caching: bool, gate: bool, headless: bool, base_url: str) -> str | None:
+    """Create the shared login session and check the smoke gate, once for every shard.
+
+    Returns why the gate failed, or ``None``.
+    """
+    async with BrowserPool(1, headless=headless) as pool:
+        auth = AuthCache(pool, base_url=base_url) if caching else None
+        if gate:
+            return await smoke_gate(pool, base_url, cases, auth)
+        if auth and any(uses_shared_login(case) for case in cases):
+            await auth.storage_state()
+    return None
+
+
+def run_sharded(cases: Sequence[TestCase], shards: int, **options: Any) -> RunReport:
+    """Run ``cases`` in ``shards`` worker processes and merge their reports.
+
+    ``options`` are passed to :func:`run_suite` in every worker, so
+    ``browsers`` is per shard. The shared login session is created once up
+    front so the workers only read it. With ``priority_first`` the smoke
+    gate is also checked once up front: if it fails no shard starts, and
+    otherwise the workers skip their own.
+    """
+    plan = plan_shards(cases, shards, historical_durations([case.id for case in cases]))
+    for shard in plan:
+        log.info(
+            "shard %d: %d tests, ~%.0fs predicted (%s)",
+            shard.index, len(shard.cases), shard.predicted_s, " ".join(case.id for case in shard.cases),
+        )
+    merged = RunReport(started=utc_now())
+    started = time.perf_counter()
+    # A fake clock or a HAR mode turns the session cache off, see run_suite.
+    caching = options.get("auth_cache", True) and not options.get("clock_offset") and not options.get("har")
+    gate = options.get("priority_first", False)
+    if gate or (caching and any(uses_shared_login(case) for case in cases)):
+        reason = asyncio.run(_prepare(
+            cases, caching, gate, options.get("headless", True), options.get("base_url", BASE_URL)
+        ))
+        if reason:
+            log.error("Aborting run: %s", reason)
+            merged.results = [
+                TestResult(case.id, case.title, status=SKIPPED, error=f"Aborted: {reason}")
+                for case in sorted(cases, key=lambda case: case.id)
+            ]
+            merged.extra["aborted"] = reason
+            if options.get("events"):
+                with EventFeed(options["events"]) as feed:
+                    for result in merged.results:
+                        feed.emit(
+                            "test_finished", test=result.id, variant="", status=result.status, error=result.error,
+                            duration_ms=0.0, overhead_ms=0.0,
+                        )
+            merged.wall_ms = (time.perf_counter() - started) * 1000
+            merged.finished = utc_now()
+            return merged
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(plan), mp_context=context) as executor:
+        futures = [
+            executor.submit(
+                _run_shard, shard.index, [case.id for case in shard.cases],
+                {**options, "account_offset": shard.index * options.get("browsers", 4), "gated": False},
+            )
+            for shard in plan
+        ]
+        reports = [future.result() for future in futures]
+
+    merged.wall_ms = (time.perf_counter() - started) * 1000
+    merged.finished = utc_now()
+    merged.startup_ms = max(report.startup_ms for report in reports)
+    merged.results = sorted((result for report in reports for result in report.results), key=lambda result: result.id)
+    # A shard still aborts when its High-priority cases find the host down.
+    aborted = [
+        f"shard {shard.index}: {report.extra['aborted']}" for shard, report in zip(plan, reports)
+        if "aborted" in report.extra
+    ]
+    if aborted:
+        merged.extra["aborted"] = "; ".join(aborted)
+    merged.extra["nav_retries"] = sum(report.extra.get("nav_retries", 0) for report in reports)
+    merged.extra["bytes_saved"] = sum(report.extra.get("bytes_saved", 0) for report in reports)
+    if options.get("artifacts"):
+        merged.extra["artifacts"] = artifact_totals(merged.results)
+    if options.get("har"):
+        merged.extra["har"] = har_totals(merged.results)
+    if options.get("chaos"):
+        merged.extra["chaos"] = chaos_totals(merged.results)
+    if options.get("step_trace", True):
+        merged.extra["step_ms_by_category"] = step_totals(merged.results)
+        merged.extra["slowest_steps"] = slowest_steps(merged.results)
+    merged.extra["shards"] = [
+        {
+            "index": shard.index,
+            "tests": [case.id for case in shard.cases],
+            "predicted_s": round(shard.predicted_s, 1),
+            "wall_ms": round(report.wall_ms, 1),
+            **report.extra,
+        }
+        for shard, report in zip(plan, reports)
+    ]
+    return merged
@@ -0,0 +1,64 @@
+"""Smoke gates checked before the bulk of a priority-ordered run.
+
+A dead deployment otherwise costs every test its full timeout. The gates are
+cheap: one navigation to ``/`` and, when any selected test needs it, the
+shared login.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Sequence
+
+from .auth import AuthCache, uses_shared_login
+from .loader import TestCase
+from .network import network_error
+from .pool import BrowserPool
+from .results import describe_error
+
+log = logging.getLogger(__name__)
+
+PROBE_ATTEMPTS = 3
+
+
+async def probe_host(pool: BrowserPool, base_url: str, attempts: int = PROBE_ATTEMPTS) -> str | None:
+    """Why ``/`` cannot be loaded, or ``None`` if it can.
+
+    Edge errors are intermittent, so the gate only trips when every attempt
+    fails.
+    """
+    reason = None
+    for attempt in range(attempts):
+        if attempt:
+            await asyncio.sleep(attempt)
+        async with pool.lease() as browser:
+            context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                response = await page.goto(f"{base_url.rstrip('/')}/", wait_until="commit", timeout=15000)
+                if response is None or response.status < 500:
+                    return None
+                reason = f"HTTP {response.status} for /"
+            except Exception as error:
+                code = network_error(error)
+                reason = f"{code} for /" if code else describe_error(error)
+            finally:
+                await context.close()
+        log.warning("Host probe %d/%d failed: %s", attempt + 1, attempts, reason)
+    return reason
+
+
+async def smoke_gate(
+    pool: BrowserPool, base_url: str, cases: Sequence[TestCase], auth: AuthCache | None = None
+) -> str | None:
+    """The first failed gate as a message, or ``None`` if all pass."""
+    reason = await probe_host(pool, base_url)
+    if reason:
+        return f"host unreachable: {reason}"
+    if auth and any(uses_shared_login(case) for case in cases):
+        try:
+            await auth.storage_state()
+        except Exception as error:
+            return f"login broken: {describe_error(error)}"
+    return None
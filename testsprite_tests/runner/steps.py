@@ -0,0 +1,274 @@
+"""Step-level timings of every test, in Chrome's trace-event format.
+
+A result used to say only PASSED or FAILED, so nobody could tell whether a
+70 s test spent its time logging in, navigating or in its 3 s sleeps.
+:func:`use_step_trace` rewrites each awaited ``goto``, ``fill``, ``click``,
+sleep, query and assertion of a script into ``async_api.step(...)``, which
+times it on a :class:`StepTrace` together with the route it ran on and the
+selector it targeted. Selectors are resolved when the script is compiled,
+from the ``elem = frame.locator('xpath=...')`` assignment or the call itself.
+With a locator index, the ``await async_api.locate(...)`` that
+:mod:`.locators` puts in front of a step is timed as a ``locate`` step of its
+own, so the wait for a fingerprint shows up too.
+
+Steps are categorised as ``login`` (the scripted shared-account login, or
+the wait for its redirect that replaces it when the login is cached),
+``navigation``, ``action``, ``sleep``, ``wait``, ``query`` or ``assert``.
+Each test's steps are written to ``tmp/traces/<run>/<TC>.json``, which
+``chrome://tracing`` and https://ui.perfetto.dev open as is, and the report
+lists the slowest steps of the whole run.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Sequence
+from urllib.parse import urlparse
+
+from playwright.async_api import Page
+
+from .auth import login_span, login_wait
+from .impact import Route, load_routes
+from .loader import TMP_DIR, run_test_body
+from .results import TestResult
+
+TRACES_DIR = TMP_DIR / "traces"
+
+# Per test, and across the run.
+SLOWEST_STEPS = 10
+
+_CATEGORIES = {
+    "navigation": {"goto", "reload", "go_back", "go_forward", "wait_for_url", "wait_for_load_state"},
+    "action": {
+        "click", "dblclick", "tap", "fill", "type", "press", "press_sequentially", "check", "uncheck",
+        "select_option", "set_input_files", "hover", "scroll_into_view_if_needed", "drag_to",
+    },
+    "sleep": {"wait_for_timeout", "sleep"},
+    "wait": {"wait_for", "wait_for_selector", "wait_for_function", "wait_for_event", "locate"},
+    "query": {
+        "is_visible", "is_hidden", "is_enabled", "is_disabled", "is_checked", "is_editable", "count",
+        "inner_text", "inner_html", "text_content", "input_value", "get_attribute", "all_inner_texts",
+        "all_text_contents", "evaluate", "title",
+    },
+}
+_CATEGORY = {name: category for category, names in _CATEGORIES.items() for name in names}
+
+
+@lru_cache(maxsize=None)
+def _routes() -> tuple[Route, ...]:
+    return tuple(load_routes())
+
+
+def route_of(url: str) -> str:
+    """The app route ``url`` is on, e.g. ``/stories/:id``."""
+    path = urlparse(url).path or "/"
+    return next((route.path for route in _routes() if route.matches(path)), path)
+
+
+def _step(event: dict[str, Any]) -> dict[str, Any]:
+    return {"step": event["name"], "category": event["cat"], "ms": round(event["dur"] / 1000, 1), **event["args"]}
+
+
+class StepTrace:
+    """One test's timed steps; what :meth:`PooledDriver.step` records into.
+
+    ``listener`` is called with each finished step, as in :meth:`stats`.
+    """
+
+    def __init__(self, test_id: str, listener: Callable[[dict[str, Any]], None] | None = None):
+        self.test_id = test_id
+        self.listener = listener
+        self.events: list[dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._route = ""
+
+    def _locate(self, target: Any) -> str:
+        page = target if isinstance(target, Page) else getattr(target, "page", None)
+        if isinstance(page, Page) and not page.is_closed() and page.url.startswith("http"):
+            self._route = route_of(page.url)
+        return self._route
+
+    async def step(
+        self, name: str, category: str, line: int, target: Any, selector: str | None, awaitable: Awaitable[Any]
+    ) -> Any:
+        route = self._locate(target)
+        started = time.perf_counter()
+        error = None
+        try:
+            return await awaitable
+        except BaseException as raised:
+            error = str(raised).strip().splitlines()[0] if str(raised).strip() else type(raised).__name__
+            raise
+        finally:
+            finished = time.perf_counter()
+            if category == "navigation":
+                route = self._locate(target) or route
+            args: dict[str, Any] = {"line": line, "route": route}
+            if selector:
+                args["selector"] = selector
+            if error:
+                args["error"] = error[:300]
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started - self._origin) * 1e6),
+                "dur": round((finished - started) * 1e6),
+                "pid": 1,
+                "tid": 1,
+                "args": args,
+            })
+            if self.listener:
+                self.listener(_step(self.events[-1]))
+
+    def write(self, path: Path) -> Path:
+        """Write the steps as a Chrome trace-event file."""
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": self.test_id}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "steps"}},
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        return path
+
+    def stats(self) -> dict[str, Any]:
+        by_category: dict[str, float] = {}
+        for event in self.events:
+            by_category[event["cat"]] = by_category.get(event["cat"], 0.0) + event["dur"] / 1000
+        slowest = sorted(self.events, key=lambda event: event["dur"], reverse=True)[:SLOWEST_STEPS]
+        return {
+            "count": len(self.events),
+            "ms_by_category": {category: round(ms, 1) for category, ms in sorted(by_category.items())},
+            "slowest": [_step(event) for event in slowest],
+        }
+
+
+def slowest_steps(results: Sequence[TestResult], limit: int = SLOWEST_STEPS) -> list[dict[str, Any]]:
+    """The run's ``limit`` slowest steps, from every result's own slowest."""
+    steps = [
+        {"test": result.id, **{key: result.extra[key] for key in ("engine", "device") if key in result.extra}, **step}
+        for result in results
+        if "steps" in result.extra
+        for step in result.extra["steps"]["slowest"]
+    ]
+    return sorted(steps, key=lambda step: step["ms"], reverse=True)[:limit]
+
+
+def step_totals(results: Sequence[TestResult]) -> dict[str, float]:
+    """Milliseconds spent per step category across the run."""
+    totals: dict[str, float] = {}
+    for result in results:
+        for category, ms in result.extra.get("steps", {}).get("ms_by_category", {}).items():
+            totals[category] = totals.get(category, 0.0) + ms
+    return {category: round(ms, 1) for category, ms in sorted(totals.items(), key=lambda item: -item[1])}
+
+
+def _selector_in(node: ast.AST) -> str | None:
+    for child in ast.walk(node):
+        if not isinstance(child, ast.Call) or not isinstance(child.func, ast.Attribute):
+            continue
+        # x.locator(selector), or async_api.locate(x, selector) from the locator index.
+        index = {"locator": 0, "locate": 1}.get(child.func.attr)
+        if (
+            index is not None
+            and len(child.args) > index
+            and isinstance(child.args[index], ast.Constant)
+            and isinstance(child.args[index].value, str)
+        ):
+            return child.args[index].value
+    return None
+
+
+def _root(node: ast.AST | None) -> ast.Name | None:
+    """The name an expression such as ``frame.locator(...).nth(0)`` starts from."""
+    while isinstance(node, (ast.Call, ast.Attribute, ast.Subscript)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node if isinstance(node, ast.Name) else None
+
+
+class _StepCalls(ast.NodeTransformer):
+    def __init__(self) -> None:
+        self.category: str | None = None
+        self.asserting = False
+        self.selectors: dict[str, str | None] = {}
+
+    def visit_Assign(self, node: ast.Assign) -> ast.AST:
+        self.generic_visit(node)
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            self.selectors[node.targets[0].id] = _selector_in(node.value)
+        return node
+
+    def visit_Assert(self, node: ast.Assert) -> ast.AST:
+        self.asserting = True
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.asserting = False
+
+    def _target(self, call: ast.Call) -> ast.expr | None:
+        owner = call.func.value
+        if isinstance(owner, ast.Name) and owner.id == "async_api":
+            # Already routed through the driver: async_api.goto(page, url).
+            return call.args[0] if call.args else None
+        if isinstance(owner, ast.Name) and owner.id == "asyncio":
+            return None
+        if isinstance(owner, ast.Call) and isinstance(owner.func, ast.Name) and owner.func.id == "expect":
+            return owner.args[0] if owner.args else None
+        return owner
+
+    def visit_Await(self, node: ast.Await) -> ast.AST:
+        self.generic_visit(node)
+        call = node.value
+        if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Attribute):
+            return node
+        name = call.func.attr
+        owner = call.func.value
+        if isinstance(owner, ast.Call) and isinstance(owner.func, ast.Name) and owner.func.id == "expect":
+            category = "assert"
+        elif isinstance(owner, ast.Name) and owner.id == "asyncio" and name != "sleep":
+            return node
+        elif name in _CATEGORY:
+            category = "assert" if self.asserting and _CATEGORY[name] == "query" else _CATEGORY[name]
+        else:
+            return node
+        target = self._target(call)
+        if name == "locate":
+            selector = _selector_in(call)
+        else:
+            selector = self.selectors.get(target.id) if isinstance(target, ast.Name) else None
+        if selector is None and target is not None:
+            selector = _selector_in(target)
+        # Only the root name is passed, so the step evaluates nothing twice.
+        root = _root(target)
+        step = ast.Attribute(ast.Name("async_api", ast.Load()), "step", ast.Load())
+        args = [
+            ast.Constant(name),
+            ast.Constant(self.category or category),
+            ast.Constant(node.lineno),
+            ast.Name(root.id, ast.Load()) if root else ast.Constant(None),
+            ast.Constant(selector),
+            call,
+        ]
+        node.value = ast.copy_location(ast.Call(step, args, []), call)
+        return node
+
+
+def use_step_trace(tree: ast.Module) -> ast.Module:
+    """Time every awaited step of ``run_test`` through ``async_api.step()``."""
+    body = run_test_body(tree)
+    span = login_span(body)
+    if span is None:
+        wait = login_wait(body)
+        span = (wait, wait + 1) if wait is not None else (0, 0)
+    calls = _StepCalls()
+    for index, statement in enumerate(body):
+        calls.category = "login" if span[0] <= index < span[1] else None
+        body[index] = calls.visit(statement)
+    return tree
@@ -0,0 +1,444 @@
+"""Runs loaded TC scripts concurrently on a :class:`BrowserPool`."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, nullcontext
+from pathlib import Path
+from typing import Any, Sequence
+
+from .accounts import Account, AccountPool, SupabaseAdmin, use_account
+from .artifacts import ARTIFACTS_DIR, ArtifactRecorder, artifact_totals
+from .auth import AuthCache, strip_shared_login, uses_shared_login
+from .baseurl import rebase
+from .blocking import PROFILES, Blocker, ResourceSizes, bytes_saved, profile_for
+from .chaos import ChaosProxy, ChaosSchedule, chaos_totals
+from .clock import TimeTravel
+from .config import BASE_URL
+from .contexts import ContextPool
+from .devices import Device
+from .events import EventFeed
+from .fixtures import DatabaseFixture, default_seed, split_stateful
+from .har import DEFAULT_IGNORED_PARAMS, DEFAULT_MATCH_HEADERS, REPLAY, HarMatching, HarMode, har_totals
+from .loader import TestCase, load_run_test
+from .locators import LocatorIndex, use_locator_index
+from .matrix import run_matrix
+from .network import network_error
+from .plan import PRIORITY_ORDER, load_plan
+from .pool import BrowserPool, PooledDriver
+from .results import FAILED, PASSED, SKIPPED, RunReport, TestResult, describe_error, utc_now
+from .retry import DEFAULT_ATTEMPTS, NavigationRetry, use_navigation_retry
+from .smoke import probe_host, smoke_gate
+from .steps import TRACES_DIR, StepTrace, slowest_steps, step_totals, use_step_trace
+from .testdata import ContentTagger, new_run_id
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TEST_TIMEOUT = 300.0
+
+
+class SuiteRunner:
+    """Runs each case on a leased browser with its own fresh context.
+
+    Scripts are rebased onto ``base_url``: their TestSprite tunnel navigation
+    is dropped and production URLs point at ``base_url`` instead.
+
+    With an ``auth`` cache, cases that log in as the shared account get its
+    storage state injected and their scripted login steps removed.
+
+    ``priority_first`` runs the plan's High-priority cases before the rest,
+    after the smoke gate, and skips everything left once the gate fails or a
+    High-priority case hits a network-level error that a re-probe confirms.
+
+    With a ``locators`` index, absolute XPaths fall back to the recorded
+    element fingerprints. Navigations are tried ``nav_attempts`` times on
+    transient network errors. ``resources`` names a blocking profile for
+    every case, or ``"auto"`` to pick one from each case's plan category.
+    With a ``contexts`` pool, scripts run in warm contexts reset between
+    tests instead of fresh ones. With ``accounts``, stateful cases run as
+    their own provisioned user instead of the shared one. With a database
+    ``fixture``, stateful cases run one at a time after the stateless ones,
+    each on a database freshly restored from its template. With a
+    ``run_id``, the content rows the app inserts are tagged with it for
+    :func:`~.testdata.purge`. A ``clock`` starts every page's clock ahead
+    of the real one. A ``device`` emulates a phone or tablet and records the
+    pages' load and interaction timings. With an ``artifacts`` directory,
+    failing tests leave their recent screenshots and a trace there. With a
+    ``traces`` directory, every test writes the timings of its steps there.
+    ``events`` receives each test's start, steps and end as they happen.
+    A ``har`` mode records every test's traffic or replays it (see
+    :mod:`.har`); replayed navigations are not retried. With a ``chaos``
+    schedule, every test's traffic goes through its own fault-injecting
+    :class:`~.chaos.ChaosProxy`.
+    """
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        *,
+        timeout: float = DEFAULT_TEST_TIMEOUT,
+        auth: AuthCache | None = None,
+        base_url: str = BASE_URL,
+        locators: LocatorIndex | None = None,
+        nav_attempts: int = DEFAULT_ATTEMPTS,
+        resources: str = "auto",
+        contexts: ContextPool | None = None,
+        accounts: AccountPool | None = None,
+        fixture: DatabaseFixture | None = None,
+        run_id: str | None = None,
+        clock: TimeTravel | None = None,
+        device: Device | None = None,
+        artifacts: Path | None = None,
+        traces: Path | None = None,
+        events: EventFeed | None = None,
+        har: HarMode | None = None,
+        chaos: ChaosSchedule | None = None,
+    ):
+        self.pool = pool
+        self.timeout = timeout
+        self.auth = auth
+        self.base_url = base_url.rstrip("/")
+        self.locators = locators
+        self.nav_attempts = nav_attempts
+        self.resources = resources
+        self.contexts = contexts
+        self.accounts = accounts
+        self.fixture = fixture
+        self.run_id = run_id
+        self.clock = clock
+        self.device = device
+        self.artifacts = artifacts
+        self.traces = traces
+        self.events = events
+        self.har = har
+        self.chaos = chaos
+        self._account_auth: dict[str, AuthCache] = {}
+        self.sizes = ResourceSizes()
+
+    async def run_case(self, case: TestCase) -> TestResult:
+        result = TestResult(case.id, case.title, started=utc_now())
+        needs = self.accounts.needs(case.id) if self.accounts else None
+        if needs is None:
+            result = await self._run_case(case, result)
+        else:
+            try:
+                async with self.accounts.lease(needs) as account:
+                    result.extra["account"] = account.email
+                    result = await self._run_case(case, result, account)
+            except Exception as error:
+                result.status, result.error = FAILED, f"Account provisioning failed: {describe_error(error)}"
+        self._finished(result)
+        return result
+
+    def _variant(self) -> list[str]:
+        """The engine (unless Chromium) and device this runner emulates."""
+        variant = [self.pool.engine] if self.pool.engine != "chromium" else []
+        return variant + ([self.device.name] if self.device else [])
+
+    def _emit(self, event: str, test_id: str, **fields: Any) -> None:
+        if self.events:
+            self.events.emit(event, test=test_id, variant="/".join(self._variant()), **fields)
+
+    def _finished(self, result: TestResult) -> None:
+        self._emit(
+            "test_finished", result.id, status=result.status, error=result.error,
+            duration_ms=round(result.duration_ms, 1), overhead_ms=round(result.overhead_ms, 1),
+        )
+
+    def _auth_for(self, account: Account | None) -> AuthCache | None:
+        if account is None or self.auth is None:
+            return self.auth
+        if account.email not in self._account_auth:
+            self._account_auth[account.email] = AuthCache(
+                self.pool, base_url=self.base_url, email=account.email, password=account.password
+            )
+        return self._account_auth[account.email]
+
+    async def _run_case(self, case: TestCase, result: TestResult, account: Account | None = None) -> TestResult:
+        queued = time.perf_counter()
+        context_options = {}
+        transforms = (rebase(self.base_url),)
+        retry = None
+        auth = self._auth_for(account)
+        try:
+            if auth and uses_shared_login(case):
+                context_options["storage_state"] = await auth.storage_state()
+                transforms += (strip_shared_login,)
+                result.extra["auth"] = "cached"
+        except Exception as error:
+            result.status, result.error = FAILED, f"Login failed: {describe_error(error)}"
+            return result
+        if account:
+            # After the login stripping, which looks for the shared email.
+            transforms += (use_account(account),)
+        replaying = self.har is not None and self.har.mode == REPLAY
+        if self.nav_attempts > 1 and not replaying:
+            retry = NavigationRetry(self.base_url, self.nav_attempts)
+            transforms += (use_navigation_retry,)
+        profile = profile_for(case.id) if self.resources == "auto" else PROFILES[self.resources]
+        blocker = Blocker(profile, self.base_url, self.sizes)
+        setup = [blocker.install]
+        tagger = ContentTagger(self.run_id) if self.run_id else None
+        if tagger:
+            setup.append(tagger.install)
+        if self.clock:
+            setup.append(self.clock.install)
+        timings = None
+        if self.device:
+            context_options.update(self.device.context_options(self.pool.engine))
+            timings = self.device.timings()
+            setup.append(timings.install)
+        label = "-".join([case.id, *self._variant()])
+        recorder = None
+        if self.artifacts:
+            recorder = ArtifactRecorder(label, self.artifacts)
+            setup.append(recorder.install)
+        har = self.har.session(label, self.base_url) if self.har else None
+        if har:
+            # Registered last, so its route sees every request first.
+            context_options["service_workers"] = "block"
+            setup.append(har.install)
+        if self.locators:
+            # After the login stripping, which looks for the scripts' own
+            # locators, and before the step trace, which times the lookups.
+            transforms += (use_locator_index,)
+        steps = None
+        if self.traces:
+            steps = StepTrace(label, lambda step: self._emit("step", case.id, **step))
+        if self.traces or self.locators:
+            # The locator index fingerprints elements after their step succeeds.
+            transforms += (use_step_trace,)
+        proxy = ChaosProxy(self.chaos) if self.chaos else None
+        async with self.pool.lease() as browser, (proxy or nullcontext()) as proxy_url:
+            self._emit("test_started", case.id, title=case.title)
+            if proxy_url:
+                # Loopback too, so the app itself can be faulted under --serve.
+                context_options["proxy"] = {"server": proxy_url, "bypass": "<-loopback>"}
+            driver = PooledDriver(
+                browser, context_options, locators=self.locators, retry=retry, setup=setup,
+                warm=self.contexts, defer_close=recorder is not None or har is not None, steps=steps,
+            )
+            try:
+                run_test = load_run_test(case, driver, transforms)
+            except Exception as error:
+                result.status, result.error = FAILED, describe_error(error)
+                return result
+            started = time.perf_counter()
+            result.overhead_ms = (started - queued) * 1000
+            try:
+                await asyncio.wait_for(run_test(), self.timeout)
+            except asyncio.TimeoutError:
+                result.status, result.error = FAILED, f"Timed out after {self.timeout:.0f}s"
+            except Exception as error:
+                result.status, result.error = FAILED, describe_error(error)
+            finally:
+                result.duration_ms = (time.perf_counter() - started) * 1000
+                if recorder:
+                    artifacts = await recorder.finish(result.status != PASSED)
+                    if artifacts:
+                        result.extra["artifacts"] = artifacts
+                if har:
+                    await har.finish()
+                    result.extra["har"] = har.stats()
+                await driver.browser.close()
+        result.extra["resources"] = blocker.stats()
+        if proxy:
+            result.extra["chaos"] = proxy.stats()
+        if steps:
+            result.extra["steps"] = {**steps.stats(), "trace": str(steps.write(self.traces / f"{label}.json"))}
+        if tagger and tagger.tagged:
+            result.extra["tagged_rows"] = tagger.tagged
+        if timings:
+            result.extra["device"] = self.device.name
+            result.extra["timings"] = timings.stats()
+        if retry and retry.retries:
+            result.extra["nav_retries"] = len(retry.retries)
+            result.extra["retried"] = retry.retries
+        log.info("%s %s in %.1fs", case.id, result.status, result.duration_ms / 1000)
+        return result
+
+    async def _run_all(self, cases: Sequence[TestCase]) -> list[TestResult]:
+        if not self.fixture:
+            return list(await asyncio.gather(*(self.run_case(case) for case in cases)))
+        stateless, stateful = split_stateful(cases)
+        results = list(await asyncio.gather(*(self.run_case(case) for case in stateless)))
+        for case in stateful:
+            # A restore drops every connection to the database, so nothing
+            # else may be running.
+            restore_ms = await asyncio.to_thread(self.fixture.restore)
+            result = await self.run_case(case)
+            result.extra["db_restore_ms"] = round(restore_ms, 1)
+            results.append(result)
+        return results
+
+    async def _run_prioritized(
+        self, cases: Sequence[TestCase], report: RunReport, gated: bool = True
+    ) -> list[TestResult]:
+        """High-priority cases first, behind the smoke gate; abort on a dead host."""
+        plan = load_plan()
+        ranked = sorted(cases, key=lambda case: plan[case.id].rank if case.id in plan else len(PRIORITY_ORDER))
+        first = [case for case in ranked if case.id in plan and plan[case.id].priority == "High"]
+        rest = [case for case in ranked if case not in first]
+
+        results: list[TestResult] = []
+        reason = await smoke_gate(self.pool, self.base_url, ranked, self.auth) if gated else None
+        if reason is None:
+            results += await self._run_all(first)
+            # One edge error is usually transient; only a failing re-probe
+            # means the deployment is down.
+            dead = [(result.id, network_error(result.error)) for result in results if network_error(result.error)]
+            if dead and (probe := await probe_host(self.pool, self.base_url)):
+                reason = f"{dead[0][0]} failed with {dead[0][1]} and the host re-probe failed: {probe}"
+            remaining = rest
+        else:
+            remaining = ranked
+        if reason:
+            log.error("Aborting run: %s", reason)
+            report.extra["aborted"] = reason
+            aborted = [
+                TestResult(case.id, case.title, status=SKIPPED, error=f"Aborted: {reason}") for case in remaining
+            ]
+            for result in aborted:
+                self._finished(result)
+            results += aborted
+        else:
+            results += await self._run_all(remaining)
+        return results
+
+    async def run(self, cases: Sequence[TestCase], *, priority_first: bool = False, gated: bool = True) -> RunReport:
+        report = RunReport(started=utc_now(), startup_ms=self.pool.startup_ms)
+        started = time.perf_counter()
+        if priority_first:
+            report.results = await self._run_prioritized(cases, report, gated)
+        else:
+            report.results = await self._run_all(cases)
+        report.wall_ms = (time.perf_counter() - started) * 1000
+        report.finished = utc_now()
+        if self.auth:
+            report.extra["auth_logins"] = self.auth.logins
+        report.extra["nav_retries"] = sum(result.extra.get("nav_retries", 0) for result in report.results)
+        report.extra["bytes_saved"] = bytes_saved(report.results)
+        self.sizes.save()
+        if self.contexts:
+            report.extra["contexts"] = self.contexts.stats()
+        if self.accounts:
+            report.extra["accounts"] = self.accounts.stats()
+        if self.fixture:
+            report.extra["db_fixture"] = self.fixture.stats()
+        if self.artifacts:
+            report.extra["artifacts"] = artifact_totals(report.results)
+        if self.har:
+            report.extra["har"] = har_totals(report.results)
+        if self.chaos:
+            report.extra["chaos"] = chaos_totals(report.results)
+        if self.traces:
+            report.extra["step_ms_by_category"] = step_totals(report.results)
+            report.extra["slowest_steps"] = slowest_steps(report.results)
+        if self.locators:
+            self.locators.save()
+            report.extra["locators"] = self.locators.stats()
+        return report
+
+
+async def run_suite(
+    cases: Sequence[TestCase],
+    *,
+    browsers: int = 4,
+    headless: bool = True,
+    timeout: float = DEFAULT_TEST_TIMEOUT,
+    auth_cache: bool = True,
+    priority_first: bool = False,
+    gated: bool = True,
+    locator_index: bool = True,
+    nav_attempts: int = DEFAULT_ATTEMPTS,
+    base_url: str = BASE_URL,
+    resources: str = "auto",
+    warm_contexts: bool = True,
+    keep_service_worker: bool = True,
+    isolated_accounts: bool = False,
+    account_offset: int = 0,
+    db_fixtures: bool = False,
+    run_id: str | None = None,
+    clock_offset: float = 0.0,
+    engines: Sequence[str] = ("chromium",),
+    devices: Sequence[str] = (),
+    artifacts: bool = False,
+    step_trace: bool = True,
+    events: Path | None = None,
+    har: str | None = None,
+    har_ignore_params: Sequence[str] = (),
+    har_match_headers: Sequence[str] | None = None,
+    chaos: Path | None = None,
+) -> RunReport:
+    """Start a pool, run ``cases`` on it and return the report.
+
+    ``account_offset`` keeps the account slots of concurrent shards apart,
+    and ``gated=False`` skips the smoke gate of a ``priority_first`` run for
+    shards whose parent already checked it.
+    A ``clock_offset`` (days) runs every page on a fake clock that far
+    ahead; such contexts are neither warm nor logged in from the cache.
+    With several ``engines``, each gets its own pool of ``browsers`` and the
+    cases run on all of them at once (see :mod:`.matrix`). ``devices`` does
+    the same for each named device of :data:`~.devices.DEVICES`, on every
+    engine. ``artifacts`` keeps screenshots and traces of the failures
+    under :data:`~.artifacts.ARTIFACTS_DIR`; ``step_trace`` writes every
+    test's step timings under :data:`~.steps.TRACES_DIR`. Tests report
+    their progress to the ``events`` stream (see :mod:`.events`). ``har``
+    records every test's traffic under :data:`~.har.HAR_DIR`, or replays it
+    offline; ``har_ignore_params`` adds volatile query parameters to the
+    defaults and ``har_match_headers`` replaces the headers a request is
+    matched on. Either mode logs in through the scripts' own steps.
+    ``chaos`` is a fault schedule (see :mod:`.chaos`) applied to every test.
+    """
+    clock = TimeTravel(clock_offset) if clock_offset else None
+    run_name = run_id or new_run_id()
+    artifacts_dir = ARTIFACTS_DIR / run_name if artifacts else None
+    traces_dir = TRACES_DIR / run_name if step_trace else None
+    if clock:
+        auth_cache = warm_contexts = False
+    har_mode = None
+    if har:
+        # The login belongs in the recording.
+        auth_cache = False
+        matching = HarMatching(
+            DEFAULT_IGNORED_PARAMS | set(har_ignore_params),
+            DEFAULT_MATCH_HEADERS if har_match_headers is None else tuple(har_match_headers),
+        )
+        har_mode = HarMode(har, matching=matching)
+    size = min(browsers, len(cases)) or 1
+    variants = len(engines) * max(1, len(devices))
+    accounts = AccountPool(SupabaseAdmin(), size * variants, offset=account_offset) if isolated_accounts else None
+    fixture = DatabaseFixture(seed=default_seed()) if db_fixtures else None
+    if fixture:
+        await asyncio.to_thread(fixture.prepare)
+    # Devices of one engine share its pool, sized for all of them.
+    pools = {
+        engine: BrowserPool(size * max(1, len(devices)), engine=engine, headless=headless) for engine in engines
+    }
+    async with AsyncExitStack() as stack:
+        for pool in pools.values():
+            stack.push_async_callback(pool.close)
+        feed = stack.enter_context(EventFeed(events)) if events else None
+        await asyncio.gather(*(pool.start() for pool in pools.values()))
+        # One login, made on the first engine, serves them all.
+        auth = AuthCache(pools[engines[0]], base_url=base_url) if auth_cache else None
+        locators = LocatorIndex() if locator_index else None
+        contexts = ContextPool(base_url, keep_service_worker=keep_service_worker) if warm_contexts else None
+        runners = {}
+        for engine, pool in pools.items():
+            for name in devices or (None,):
+                device = Device.named(name, pool.devices) if name else None
+                label = "/".join(part for part in (engine if len(engines) > 1 else "", name) if part) or engine
+                runners[label] = SuiteRunner(
+                    pool, timeout=timeout, auth=auth, base_url=base_url, locators=locators,
+                    nav_attempts=nav_attempts, resources=resources, contexts=contexts, accounts=accounts,
+                    fixture=fixture, run_id=run_id, clock=clock, device=device,
+                    artifacts=artifacts_dir, traces=traces_dir, events=feed, har=har_mode,
+                    chaos=ChaosSchedule.load(chaos) if chaos else None,
+                )
+        if len(runners) > 1:
+            dimension = "variant" if len(engines) > 1 and devices else "device" if devices else "engine"
+            return await run_matrix(runners, cases, dimension=dimension, priority_first=priority_first)
+        return await next(iter(runners.values())).run(cases, priority_first=priority_first, gated=gated)
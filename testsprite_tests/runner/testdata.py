@@ -0,0 +1,124 @@
+"""Tag the content the suite creates and purge it in bulk after the run.
+
+TC049 saves a "História de Teste Automatizada" story on every run and
+nothing deletes it, so the admin tables, the Stories grid and every other
+listing grow from run to run. A :class:`ContentTagger` sits on each test's
+context and appends the run's marker (`` [ts-run:<run id>]``) to the
+``title`` of every row the app inserts into a content table. After the run
+:func:`purge` deletes this run's rows with one ``DELETE`` per table, along
+with rows from before the markers existed (:data:`LEGACY_TITLES`);
+``--purge-all-test-data`` deletes every marked row, from any run.
+
+Deleting needs either ``SUPABASE_SERVICE_ROLE_KEY`` or the shared account's
+cached session, which is an admin's.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import secrets
+import time
+import urllib.error
+from typing import Any
+from urllib.parse import quote, urlparse
+
+from playwright.async_api import BrowserContext, Route
+
+from .accounts import SupabaseAdmin
+from .auth import access_token, state_path
+from .config import SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_URL
+
+log = logging.getLogger(__name__)
+
+CONTENT_TABLES = ("stories", "videos", "games", "missions")
+
+MARKER_PREFIX = " [ts-run:"
+
+# Created by the scripts before rows were tagged.
+LEGACY_TITLES = ("História de Teste Automatizada",)
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%d%H%M%S") + secrets.token_hex(2)
+
+
+def marker(run_id: str) -> str:
+    return f"{MARKER_PREFIX}{run_id}]"
+
+
+def _table(url: str) -> str | None:
+    path = urlparse(url).path
+    if not path.startswith("/rest/v1/"):
+        return None
+    table = path[len("/rest/v1/"):]
+    return table if table in CONTENT_TABLES else None
+
+
+class ContentTagger:
+    """Marks the titles of one test's inserts into :data:`CONTENT_TABLES`."""
+
+    def __init__(self, run_id: str, supabase_url: str = SUPABASE_URL):
+        self.marker = marker(run_id)
+        self.pattern = f"{supabase_url.rstrip('/')}/rest/v1/**"
+        self.tagged = 0
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route(self.pattern, self._route)
+
+    async def _route(self, route: Route) -> None:
+        request = route.request
+        if request.method != "POST" or _table(request.url) is None:
+            await route.fallback()
+            return
+        try:
+            body = json.loads(request.post_data or "null")
+        except ValueError:
+            await route.fallback()
+            return
+        rows = body if isinstance(body, list) else [body]
+        for row in rows:
+            if isinstance(row, dict) and isinstance(row.get("title"), str) and self.marker not in row["title"]:
+                row["title"] += self.marker
+                self.tagged += 1
+        await route.fallback(post_data=json.dumps(body))
+
+
+def _client(base_url: str) -> SupabaseAdmin | None:
+    """The service role if configured, else the cached admin session."""
+    if SUPABASE_SERVICE_ROLE_KEY:
+        return SupabaseAdmin()
+    path = state_path(base_url)
+    token = access_token(json.loads(path.read_text(encoding="utf-8"))) if path.exists() else None
+    if not token or not SUPABASE_ANON_KEY:
+        return None
+    return SupabaseAdmin(SUPABASE_URL, SUPABASE_ANON_KEY, token=token)
+
+
+def purge(base_url: str, run_id: str | None = None) -> dict[str, Any]:
+    """Delete ``run_id``'s rows (every run's if ``None``) and the legacy ones.
+
+    Returns the rows deleted per table, or the reason nothing was.
+    """
+    client = _client(base_url)
+    if client is None:
+        return {"skipped": "no service-role key and no cached admin session"}
+    like = marker(run_id) if run_id else MARKER_PREFIX
+    legacy = ",".join(f'"{title}"' for title in LEGACY_TITLES)
+    condition = "or=" + quote(f'(title.like."*{like}*",title.in.({legacy}))')
+    deleted: dict[str, int] = {}
+    for table in CONTENT_TABLES:
+        try:
+            deleted[table] = client.delete(table, condition)
+        except urllib.error.HTTPError as error:
+            log.warning("Could not purge test data from %s: HTTP %d", table, error.code)
+            deleted[table] = 0
+        except OSError as error:
+            # URLError included: Supabase unreachable, or the request timed out.
+            log.warning("Could not purge test data from %s: %s", table, getattr(error, "reason", error))
+            deleted[table] = 0
+    log.info(
+        "Purged %d test rows (%s)",
+        sum(deleted.values()), ", ".join(f"{table}: {count}" for table, count in deleted.items()),
+    )
+    return {"run_id": run_id, "deleted": deleted}
@@ -0,0 +1,358 @@
+"""Rewrite the fixed sleeps in the TC scripts as event-driven waits.
+
+``python -m testsprite_tests.runner.waits [--check] [TC ...]``
+
+The generated scripts sleep before nearly every step. Each sleep is replaced
+in place, keeping comments and layout, by the wait it stands in for:
+
+* sleep before an action (``click``, ``fill``, ``text_content`` ...): the
+  sleep is dropped and its time added to the action's own timeout, which
+  already waits for the element to be actionable;
+* sleep before ``assert "<path>" in frame.url``: ``expect(...).to_have_url``;
+* sleep before ``assert await <locator>.is_visible()``:
+  ``expect(<locator>).to_be_visible``;
+* sleep before a ``raise``, and the trailing ``asyncio.sleep(5)``: removed;
+* sleep after a ``raise`` or ``return``, which never runs: removed, and left
+  out of the timings;
+* anything else: a network-idle wait bounded by the original sleep.
+
+Every new wait keeps the sleep's duration as its upper bound, so a test can
+only finish sooner. A Markdown report lists the fixed sleep time per test
+before and after conversion.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from .loader import TMP_DIR, TestCase, discover
+
+DEFAULT_REPORT = TMP_DIR / "wait_conversion_report.md"
+
+# Context default set by every script (``context.set_default_timeout(5000)``).
+DEFAULT_ACTION_TIMEOUT_MS = 5000
+
+AUTO_WAITING_ACTIONS = frozenset({
+    "check", "click", "dblclick", "fill", "hover", "inner_text", "press",
+    "select_option", "set_input_files", "tap", "text_content", "type", "uncheck",
+})
+
+# Statements after these in the same block never run.
+_TERMINAL = (ast.Raise, ast.Return, ast.Continue, ast.Break)
+
+TIMEOUT_ERROR_IMPORT = "from playwright.async_api import TimeoutError as PlaywrightTimeoutError"
+
+
+@dataclass
+class Conversion:
+    line: int
+    kind: str
+    sleep_ms: int
+
+
+@dataclass
+class FileConversion:
+    case: TestCase
+    conversions: list[Conversion] = field(default_factory=list)
+    source: str = ""
+    # Fixed sleep time the script can still reach after conversion.
+    remaining_ms: int = 0
+
+    @property
+    def reachable(self) -> list[Conversion]:
+        return [conversion for conversion in self.conversions if conversion.kind != "unreachable"]
+
+    @property
+    def sleep_ms(self) -> int:
+        return sum(conversion.sleep_ms for conversion in self.reachable)
+
+
+@dataclass
+class _Edit:
+    start: tuple[int, int]
+    end: tuple[int, int]
+    text: str
+
+
+def _sleep_ms(statement: ast.stmt) -> int | None:
+    """Duration of ``await page.wait_for_timeout(N)`` / ``await asyncio.sleep(S)``."""
+    if not isinstance(statement, ast.Expr) or not isinstance(statement.value, ast.Await):
+        return None
+    call = statement.value.value
+    if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Attribute) or len(call.args) != 1:
+        return None
+    owner, name = call.func.value, call.func.attr
+    value = call.args[0]
+    if not isinstance(owner, ast.Name) or not isinstance(value, ast.Constant):
+        return None
+    if name == "wait_for_timeout" and owner.id in ("page", "frame"):
+        return int(value.value)
+    if name == "sleep" and owner.id == "asyncio":
+        return int(value.value * 1000)
+    return None
+
+
+def _awaited_action(statement: ast.stmt) -> ast.Call | None:
+    """The call in ``await <locator>.<action>(...)`` or ``x = await ...``."""
+    value = statement.value if isinstance(statement, (ast.Expr, ast.Assign)) else None
+    if not isinstance(value, ast.Await) or not isinstance(value.value, ast.Call):
+        return None
+    call = value.value
+    if not isinstance(call.func, ast.Attribute) or call.func.attr not in AUTO_WAITING_ACTIONS:
+        return None
+    owner = call.func.value
+    if isinstance(owner, ast.Name) and owner.id in ("page", "frame", "context"):
+        return None
+    return call
+
+
+def _url_fragments(test: ast.expr) -> list[str] | None:
+    """``["/a", "/b"]`` for ``"/a" in frame.url or "/b" in frame.url``."""
+    if isinstance(test, ast.BoolOp) and isinstance(test.op, ast.Or):
+        parts = [_url_fragments(value) for value in test.values]
+        return None if None in parts else [fragment for part in parts for fragment in part]
+    if (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Constant)
+        and isinstance(test.left.value, str)
+        and len(test.ops) == 1
+        and isinstance(test.ops[0], ast.In)
+        and isinstance(test.comparators[0], ast.Attribute)
+        and test.comparators[0].attr == "url"
+    ):
+        return [test.left.value]
+    return None
+
+
+def _visible_target(test: ast.expr) -> ast.expr | None:
+    """``<locator>`` in ``await <locator>.is_visible()``."""
+    if (
+        isinstance(test, ast.Await)
+        and isinstance(test.value, ast.Call)
+        and isinstance(test.value.func, ast.Attribute)
+        and test.value.func.attr == "is_visible"
+    ):
+        return test.value.func.value
+    return None
+
+
+def _with_timeout(call: ast.Call, extra_ms: int) -> ast.Call:
+    current = next((keyword.value for keyword in call.keywords if keyword.arg == "timeout"), None)
+    base = current.value if isinstance(current, ast.Constant) else DEFAULT_ACTION_TIMEOUT_MS
+    keywords = [keyword for keyword in call.keywords if keyword.arg != "timeout"]
+    return ast.Call(call.func, call.args, [*keywords, ast.keyword("timeout", ast.Constant(base + extra_ms))])
+
+
+def _statement_lists(tree: ast.Module) -> Iterator[list[ast.stmt]]:
+    for node in ast.walk(tree):
+        for name in ("body", "orelse", "finalbody"):
+            statements = getattr(node, name, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                yield statements
+
+
+def _sleeps(tree: ast.Module) -> Iterator[tuple[list[ast.stmt], int, int, bool]]:
+    """``(body, index, sleep_ms, reachable)`` for every fixed sleep in ``tree``."""
+    for body in _statement_lists(tree):
+        reachable = True
+        for index, statement in enumerate(body):
+            sleep_ms = _sleep_ms(statement)
+            if sleep_ms is not None:
+                yield body, index, sleep_ms, reachable
+            if isinstance(statement, _TERMINAL):
+                reachable = False
+
+
+def remaining_sleep_ms(source: str) -> int:
+    """Fixed sleep time ``source`` can still reach."""
+    return sum(sleep_ms for _, _, sleep_ms, reachable in _sleeps(ast.parse(source)) if reachable)
+
+
+class _Converter:
+    def __init__(self, case: TestCase):
+        self.case = case
+        self.lines = case.path.read_text(encoding="utf-8").splitlines(keepends=True)
+        self.edits: list[_Edit] = []
+        self.imports: set[str] = set()
+        self.result = FileConversion(case)
+
+    def _indent(self, statement: ast.stmt) -> str:
+        return " " * statement.col_offset
+
+    def _replace(self, first: ast.stmt, last: ast.stmt, text: str) -> None:
+        self.edits.append(_Edit((first.lineno, first.col_offset), (last.end_lineno, last.end_col_offset), text))
+
+    def _column(self, line: int, column: int) -> int:
+        """Character index for an ast column, which counts UTF-8 bytes."""
+        return len(self.lines[line - 1].encode("utf-8")[:column].decode("utf-8"))
+
+    def _delete(self, statement: ast.stmt) -> None:
+        line = self.lines[statement.lineno - 1]
+        before = line[: self._column(statement.lineno, statement.col_offset)]
+        after = self.lines[statement.end_lineno - 1][self._column(statement.end_lineno, statement.end_col_offset) :]
+        if not before.strip() and not after.strip():
+            # The statement owns its lines: drop them entirely.
+            self.edits.append(_Edit((statement.lineno, 0), (statement.end_lineno + 1, 0), ""))
+        elif after.lstrip().startswith(";"):
+            # Drop "sleep; " and keep the statement that shared its line.
+            skip = len(after) - len(after.lstrip()[1:].lstrip())
+            end = (statement.end_lineno, statement.end_col_offset + len(after[:skip].encode("utf-8")))
+            self.edits.append(_Edit((statement.lineno, statement.col_offset), end, ""))
+        else:
+            self._replace(statement, statement, "pass")
+
+    def _convert(self, body: list[ast.stmt], index: int, sleep_ms: int) -> str:
+        sleep = body[index]
+        following = body[index + 1 :]
+        nxt = following[0] if following else None
+
+        if nxt is None or isinstance(nxt, ast.Raise):
+            self._delete(sleep)
+            return "removed"
+
+        action = _awaited_action(nxt)
+        if action is not None:
+            new_value = ast.Await(_with_timeout(action, sleep_ms))
+            if isinstance(nxt, ast.Assign):
+                text = ast.unparse(ast.Assign(nxt.targets, new_value, lineno=0))
+            else:
+                text = ast.unparse(new_value)
+            self._replace(sleep, nxt, text)
+            return "actionability"
+
+        if isinstance(nxt, ast.Assert) and (fragments := _url_fragments(nxt.test)):
+            page = nxt.test.comparators[0].value if isinstance(nxt.test, ast.Compare) else nxt.test.values[0].comparators[0].value
+            pattern = "|".join(re.escape(fragment) for fragment in fragments)
+            self.imports.add("import re")
+            self._replace(sleep, sleep, f"await expect({ast.unparse(page)}).to_have_url(re.compile({pattern!r}), timeout={sleep_ms})")
+            return "navigation"
+
+        target = None
+        if isinstance(nxt, ast.Assert):
+            target = _visible_target(nxt.test)
+        elif (
+            isinstance(nxt, ast.Assign)
+            and len(following) > 1
+            and isinstance(following[1], ast.Assert)
+            and (target := _visible_target(following[1].test)) is not None
+            and isinstance(target, ast.Name)
+            and any(isinstance(name, ast.Name) and name.id == target.id for name in nxt.targets)
+        ):
+            target = nxt.value
+        if target is not None:
+            self._replace(sleep, sleep, f"await expect({ast.unparse(target)}).to_be_visible(timeout={sleep_ms})")
+            return "visibility"
+
+        owner = sleep.value.value.func.value.id
+        page = "page" if owner == "asyncio" else owner
+        self.imports.add(TIMEOUT_ERROR_IMPORT)
+        indent = self._indent(sleep)
+        self._replace(
+            sleep,
+            sleep,
+            f"try:\n{indent}    await {page}.wait_for_load_state(\"networkidle\", timeout={sleep_ms})\n"
+            f"{indent}except PlaywrightTimeoutError:\n{indent}    pass",
+        )
+        return "network-idle"
+
+    def run(self) -> FileConversion:
+        tree = ast.parse("".join(self.lines), filename=str(self.case.path))
+        for body, index, sleep_ms, reachable in _sleeps(tree):
+            if reachable:
+                kind = self._convert(body, index, sleep_ms)
+            else:
+                self._delete(body[index])
+                kind = "unreachable"
+            self.result.conversions.append(Conversion(body[index].lineno, kind, sleep_ms))
+        self.result.source = self._apply()
+        self.result.remaining_ms = remaining_sleep_ms(self.result.source)
+        return self.result
+
+    def _offset(self, position: tuple[int, int], starts: list[int]) -> int:
+        line, column = position
+        if line > len(self.lines):
+            return starts[-1]
+        return starts[line - 1] + self._column(line, column)
+
+    def _apply(self) -> str:
+        source = "".join(self.lines)
+        starts = [0]
+        for line in self.lines:
+            starts.append(starts[-1] + len(line))
+        for edit in sorted(self.edits, key=lambda edit: edit.start, reverse=True):
+            source = source[: self._offset(edit.start, starts)] + edit.text + source[self._offset(edit.end, starts) :]
+        for statement in sorted(self.imports):
+            if statement not in source.splitlines():
+                anchor = "from playwright.async_api import expect\n" if statement.startswith("from") else "import asyncio\n"
+                source = source.replace(anchor, anchor + statement + "\n", 1)
+        return source
+
+
+def convert(case: TestCase) -> FileConversion:
+    """Convert ``case`` in memory; ``result.source`` holds the new text."""
+    return _Converter(case).run()
+
+
+def render_report(results: Sequence[FileConversion]) -> str:
+    lines = [
+        "# Fixed-sleep conversion report",
+        "",
+        "Fixed sleep time per test before and after conversion, counting only",
+        "the sleeps a run can reach. The replacement waits return as soon as",
+        "their condition holds and are bounded by the original sleep, so the",
+        "saving is an upper bound on idle time removed per run.",
+        "",
+        "| Test | Sleeps | Before (s) | After (s) | Saved (s) | Waits |",
+        "|------|-------:|-----------:|----------:|----------:|-------|",
+    ]
+    for result in results:
+        kinds: dict[str, int] = {}
+        for conversion in result.conversions:
+            kinds[conversion.kind] = kinds.get(conversion.kind, 0) + 1
+        waits = ", ".join(f"{kind} ×{count}" for kind, count in sorted(kinds.items()))
+        before, after = result.sleep_ms / 1000, result.remaining_ms / 1000
+        lines.append(
+            f"| {result.case.id} | {len(result.reachable)} | {before:.1f} | {after:.1f} | {before - after:.1f} | {waits} |"
+        )
+    before = sum(result.sleep_ms for result in results) / 1000
+    after = sum(result.remaining_ms for result in results) / 1000
+    count = sum(len(result.reachable) for result in results)
+    lines.append(f"| **Total** | {count} | {before:.1f} | {after:.1f} | {before - after:.1f} | |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m testsprite_tests.runner.waits",
+        description="Replace fixed sleeps in the TC scripts with event-driven waits.",
+    )
+    parser.add_argument("tests", nargs="*", metavar="TC", help="test ids to convert (default: all)")
+    parser.add_argument("--check", action="store_true", help="only report; exit 1 if any sleep remains")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT, help="Markdown report path (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = [convert(case) for case in discover(args.tests or None)]
+    results = [result for result in results if result.conversions]
+    if args.check:
+        results = [result for result in results if result.reachable]
+        for result in results:
+            print(f"{result.case.path.name}: {len(result.reachable)} fixed sleeps ({result.sleep_ms / 1000:.1f}s)")
+        return 1 if results else 0
+    for result in results:
+        compile(result.source, str(result.case.path), "exec")
+        result.case.path.write_text(result.source, encoding="utf-8")
+    if results:
+        args.report.write_text(render_report(results), encoding="utf-8")
+        print(f"Converted {len(results)} scripts; report written to {args.report}")
+    else:
+        print("No fixed sleeps left to convert")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
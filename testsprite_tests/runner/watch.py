@@ -0,0 +1,218 @@
+"""Rerun the tests a change affects, on save, against a warm setup.
+
+Rerunning a TC script by hand pays a browser cold start, a login and a
+production deploy before the first step. ``--watch`` pays them once:
+
+* :class:`DevServer` runs Vite's dev server (``npm run dev``), which serves
+  an edited module on the next request without a build;
+* :func:`watch` keeps one :class:`~.pool.BrowserPool`, the cached login,
+  the warm contexts and the locator index for the whole session;
+* :class:`SourceWatcher` polls ``src/`` and the TC scripts, and each batch
+  of saves reruns only the tests :func:`~.impact.select_affected` maps to
+  it: the tests of the routes an edited page or component reaches, or the
+  edited script itself.
+
+Warm contexts drop the app's service worker between tests here, since its
+precache would otherwise serve the modules as they were before the edit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Sequence
+from urllib.parse import urlparse
+
+from .artifacts import ARTIFACTS_DIR
+from .auth import AuthCache
+from .config import LOCAL_ENDPOINT
+from .contexts import ContextPool
+from .impact import REPO_ROOT, SRC_DIR, select_affected
+from .loader import TESTS_DIR, TMP_DIR, discover
+from .locators import LocatorIndex
+from .pool import BrowserPool
+from .results import RunReport
+from .retry import DEFAULT_ATTEMPTS
+from .steps import TRACES_DIR
+from .suite import DEFAULT_TEST_TIMEOUT, SuiteRunner
+from .testdata import new_run_id
+
+log = logging.getLogger(__name__)
+
+DEV_COMMAND = ("npm", "run", "dev", "--")
+DEV_LOG = TMP_DIR / "dev_server.log"
+DEV_READY_TIMEOUT_S = 60.0
+
+POLL_INTERVAL_S = 0.25
+# Editors save in several writes; a batch ends once nothing changed for this long.
+SETTLE_S = 0.3
+
+
+def _free_port(preferred: int) -> int:
+    with socket.socket() as probe:
+        try:
+            probe.bind(("127.0.0.1", preferred))
+        except OSError:
+            probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class DevServer:
+    """Vite's dev server on ``LOCAL_ENDPOINT``'s port, or a free one if that is taken."""
+
+    def __init__(self, *, port: int | None = None, log_path: Path = DEV_LOG):
+        self.port = (urlparse(LOCAL_ENDPOINT).port or 8080) if port is None else port
+        self.log_path = log_path
+        self._process: subprocess.Popen[bytes] | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> str:
+        if not (REPO_ROOT / "node_modules").is_dir():
+            raise RuntimeError("node_modules is missing; run `npm install` before --watch")
+        port = _free_port(self.port)
+        if port != self.port:
+            log.warning("Port %d is in use, starting the dev server on %d", self.port, port)
+            self.port = port
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.log_path.open("wb") as output:
+            # Its own process group, so stopping npm also stops the vite it spawned.
+            self._process = subprocess.Popen(
+                [*DEV_COMMAND, "--host", "127.0.0.1", "--port", str(port), "--strictPort"],
+                cwd=REPO_ROOT, stdout=output, stderr=subprocess.STDOUT, start_new_session=True,
+            )
+        self._wait_ready()
+        log.info("Dev server at %s (log: %s)", self.url, self.log_path)
+        return self.url
+
+    def _wait_ready(self) -> None:
+        started = time.monotonic()
+        while time.monotonic() - started < DEV_READY_TIMEOUT_S and self._process.poll() is None:
+            try:
+                with urllib.request.urlopen(f"{self.url}/", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        output = self.log_path.read_text(encoding="utf-8", errors="replace")[-2000:]
+        raise RuntimeError(f"Dev server at {self.url} did not become ready:\n{output}")
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        try:
+            os.killpg(self._process.pid, signal.SIGTERM)
+            self._process.wait(timeout=5)
+        except ProcessLookupError:
+            pass
+        except subprocess.TimeoutExpired:
+            os.killpg(self._process.pid, signal.SIGKILL)
+            self._process.wait()
+        self._process = None
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+class SourceWatcher:
+    """Polls ``src/`` and the TC scripts for saved, added and deleted files."""
+
+    def __init__(self, src: Path = SRC_DIR, scripts: Path = TESTS_DIR):
+        self.src = src
+        self.scripts = scripts
+        self._seen = self.snapshot()
+
+    def snapshot(self) -> dict[str, int]:
+        """Modification time of every watched file, by repo-relative path."""
+        files = [*(path for path in self.src.rglob("*") if path.is_file()), *self.scripts.glob("TC*.py")]
+        mtimes = {}
+        for path in files:
+            try:
+                mtimes[path.relative_to(REPO_ROOT).as_posix()] = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return mtimes
+
+    def _changed(self, before: dict[str, int], after: dict[str, int]) -> set[str]:
+        return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+    async def next_change(self) -> list[str]:
+        """Wait for a batch of changes and return the paths it touched."""
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_S)
+            current = self.snapshot()
+            if self._changed(self._seen, current):
+                break
+        while True:
+            await asyncio.sleep(SETTLE_S)
+            settled = self.snapshot()
+            if not self._changed(current, settled):
+                break
+            current = settled
+        changed = sorted(self._changed(self._seen, current))
+        self._seen = current
+        return changed
+
+
+async def watch(
+    base_url: str,
+    test_ids: Sequence[str] | None = None,
+    *,
+    browsers: int = 4,
+    headless: bool = True,
+    timeout: float = DEFAULT_TEST_TIMEOUT,
+    auth_cache: bool = True,
+    locator_index: bool = True,
+    nav_attempts: int = DEFAULT_ATTEMPTS,
+    resources: str = "auto",
+    warm_contexts: bool = True,
+    run_id: str | None = None,
+    artifacts: bool = False,
+    step_trace: bool = True,
+    on_report: Callable[[RunReport], Any] | None = None,
+) -> None:
+    """Rerun the tests affected by each batch of saves until cancelled.
+
+    ``test_ids`` limits the tests considered; scripts are rediscovered on
+    every batch, so a new one is picked up when it is saved. Each rerun's
+    report goes to ``on_report``.
+    """
+    watcher = SourceWatcher()
+    run_name = run_id or new_run_id()
+    async with BrowserPool(browsers, headless=headless) as pool:
+        auth = AuthCache(pool, base_url=base_url) if auth_cache else None
+        if auth:
+            # Also has Vite transform the app's shared modules before the first rerun.
+            await auth.storage_state()
+        runner = SuiteRunner(
+            pool, timeout=timeout, auth=auth, base_url=base_url,
+            locators=LocatorIndex() if locator_index else None, nav_attempts=nav_attempts, resources=resources,
+            contexts=ContextPool(base_url, keep_service_worker=False) if warm_contexts else None,
+            run_id=run_id, artifacts=ARTIFACTS_DIR / run_name if artifacts else None,
+            traces=TRACES_DIR / run_name if step_trace else None,
+        )
+        log.info("Watching %s and the TC scripts; save a file to rerun the tests it affects", SRC_DIR.name)
+        while True:
+            changed = await watcher.next_change()
+            cases = select_affected(discover(test_ids), changed)
+            log.info(
+                "%s changed: %s", ", ".join(changed), " ".join(case.id for case in cases) or "no tests affected"
+            )
+            if cases:
+                report = await runner.run(cases)
+                if on_report:
+                    on_report(report)